@@ -5,53 +5,112 @@ from livekit.agents import AutoSubscribe, JobContext, WorkerOptions, cli, llm
 from livekit.agents.pipeline import VoicePipelineAgent
 from livekit.plugins import google, deepgram, silero, elevenlabs
 from datetime import datetime
-import certifi
-from pymongo import MongoClient
 from typing import Optional, Annotated
-import os
 from bson import ObjectId
-import json
+from availability import get_availability_engine
+from booking import get_booking_service
+from database import get_repository
+from menu_catalog import get_menu_catalog_async
+from menu_encoder import encode_menu
+from policy_catalog import get_policy_catalog_async
+from schedule import get_schedule_async
+from search_keys import phone_filter
+from serialization import dumps
+from snapshot_watcher import start_snapshot_watcher
+from worker import StartupTimer, prewarm
+import hashlib
 
 load_dotenv(dotenv_path=".env")
 logger = logging.getLogger("CulinaryVertexBackend")
 logger.setLevel(logging.INFO)
 
-class MongoDBHelper:
-    def __init__(self, connection_uri: str):
-        self.client = MongoClient(
-            connection_uri,
-            tlsCAFile=certifi.where()
+MENU_CONTEXT_HEADER = "Menu Items"
+
+class MenuContextSeeder:
+    """Keeps exactly one compact menu snapshot message in a chat context."""
+
+    def __init__(self, load_catalog):
+        self._load_catalog = load_catalog
+        self._message: Optional[llm.ChatMessage] = None
+        self._catalog_version: Optional[int] = None
+        self.version: Optional[str] = None
+
+    async def refresh(self) -> bool:
+        """Rebuild the snapshot message when the cached menu catalog has been swapped."""
+        catalog = await self._load_catalog()
+        if self._message is not None and catalog.version == self._catalog_version:
+            return False
+
+        self._catalog_version = catalog.version
+        menu_text = encode_menu(catalog.items, lookup_tool="get_menu_item_by_name").text
+        version = hashlib.sha1(menu_text.encode("utf-8")).hexdigest()[:12]
+        if version == self.version:
+            return False
+
+        self.version = version
+        self._message = llm.ChatMessage.create(
+            text=f"{MENU_CONTEXT_HEADER} (version {version}):\n{menu_text}",
+            role="assistant",
         )
-        self.db = self.client["restaurant_db"]
-        self.menu_collection = self.db["menu"]
-        self.reservations_collection = self.db["reservations"]
-        self.orders_collection = self.db["orders"]
-        self.policies_collection = self.db["policies"]
+        logger.info(f"Menu snapshot refreshed to version {version}")
+        return True
+
+    def seed(self, chat_ctx: llm.ChatContext) -> None:
+        """Insert the snapshot once, or swap a stale snapshot in place."""
+        if self._message is None:
+            return
+
+        for index, message in enumerate(chat_ctx.messages):
+            content = message.content
+            if isinstance(content, str) and content.startswith(MENU_CONTEXT_HEADER):
+                if not content.startswith(f"{MENU_CONTEXT_HEADER} (version {self.version}):"):
+                    chat_ctx.messages[index] = self._message
+                return
 
-    def close_connection(self):
-        if self.client:
-            self.client.close()
+        # Keep the snapshot right after the system prompt so it is part of the stable prefix
+        insert_at = 1 if chat_ctx.messages and chat_ctx.messages[0].role == "system" else 0
+        chat_ctx.messages.insert(insert_at, self._message)
 
 async def entrypoint(ctx: JobContext):
+    timer = StartupTimer("voice_pipeline")
     logger.info("starting culinary vertex backend")
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    timer.mark("connected")
     
-    uri = os.getenv("MONGO_DB_URL")
-    db_helper = MongoDBHelper(uri)
+    repo = get_repository()
+    await repo.run(start_snapshot_watcher)
+    timer.mark("snapshots")
     fnc_ctx = llm.FunctionContext()
     
     # @fnc_ctx.ai_callable()
     async def get_menu_items():
         """Retrieve all items from the restaurant menu."""
-        return list(db_helper.menu_collection.find({}, {"_id": 0}))
+        catalog = await get_menu_catalog_async()
+        return catalog.items
     
     @fnc_ctx.ai_callable()
     async def get_menu_item_by_name(
         name: Annotated[str, llm.TypeInfo(description="Name of the menu item to find")]
     ):
         """Find a specific menu item by its name."""
-        return db_helper.menu_collection.find_one({"name": name}, {"_id": 0})
+        catalog = await get_menu_catalog_async()
+        item = catalog.lookup(name)
+        if item:
+            return dumps(item)
+        return dumps({
+            "message": f"No menu item named {name}.",
+            "suggestions": [candidate["name"] for candidate in catalog.resolve(name)]
+        })
     
+    @fnc_ctx.ai_callable()
+    async def check_availability(
+        date: Annotated[str, llm.TypeInfo(description="Date in YYYY-MM-DD format")],
+        time: Annotated[str, llm.TypeInfo(description="Time in HH:MM format")],
+        party_size: Annotated[int, llm.TypeInfo(description="Number of people in the party")]
+    ):
+        """Check whether a table is free at the requested date and time; suggests the nearest free times if not."""
+        return dumps(await get_availability_engine().check(date, time, party_size))
+
     # Register reservation-related functions
     @fnc_ctx.ai_callable()
     async def create_reservation(
@@ -62,23 +121,32 @@ async def entrypoint(ctx: JobContext):
         party_size: Annotated[int, llm.TypeInfo(description="Number of people in the party")]
     ):
         """Create a new restaurant reservation."""
+        availability = await get_availability_engine().check(date, time, party_size)
+        if not availability["available"]:
+            return dumps({"message": "Reservation not created.", **availability})
+
         reservation = {
             "customer_name": customer_name,
             "contact_number": contact_number,
-            "date": date,
-            "time": time,
+            "date": availability["date"],
+            "time": availability["time"],
             "party_size": party_size,
             "status": "confirmed",
             "created_at": datetime.now()
         }
         
-        result = db_helper.reservations_collection.insert_one(reservation)
-        reservation_id = str(result.inserted_id)
+        # Seats are claimed atomically; a retried call returns the original booking
+        booking = await get_booking_service().book(reservation)
+        if booking.status == "unavailable":
+            return dumps({"message": booking.reason})
+        if booking.status == "full":
+            return dumps({"message": "Sorry, that time was just booked up. Please check availability again."})
+        reservation_id = booking.reservation_id
         
-        return {
+        return dumps({
             "reservation_id": reservation_id,
-            "message": f"Reservation confirmed for {customer_name} on {date} at {time} for {party_size} people."
-        }
+            "message": f"Reservation confirmed for {customer_name} on {reservation['date']} at {reservation['time']} for {party_size} people."
+        })
 
     @fnc_ctx.ai_callable()
     async def modify_reservation(
@@ -90,60 +158,61 @@ async def entrypoint(ctx: JobContext):
         party_size: Annotated[Optional[int], llm.TypeInfo(description="Updated number of people in the party")] = None
     ):
         """Modify an existing restaurant reservation."""
-        # Prepare update dict with only the fields that are provided
-        update_fields = {}
+        # Prepare the changes with only the fields that are provided
+        changes = {}
         if customer_name is not None:
-            update_fields["customer_name"] = customer_name
+            changes["customer_name"] = customer_name
         if contact_number is not None:
-            update_fields["contact_number"] = contact_number
+            changes["contact_number"] = contact_number
         if date is not None:
-            update_fields["date"] = date
+            changes["date"] = date
         if time is not None:
-            update_fields["time"] = time
+            changes["time"] = time
         if party_size is not None:
-            update_fields["party_size"] = party_size
-        
-        # Add updated_at timestamp
-        update_fields["updated_at"] = datetime.now()
-        
-        # Update the reservation in the database
-        result = db_helper.reservations_collection.update_one(
-            {"_id": ObjectId(reservation_id)},
-            {"$set": update_fields}
-        )
-        
-        if result.modified_count > 0:
-            # Get the updated reservation to return it
-            updated_reservation = db_helper.reservations_collection.find_one(
-                {"_id": ObjectId(reservation_id)},
-                {"_id": 0}  # Exclude _id field from the result
-            )
-            
-            return {
+            changes["party_size"] = party_size
+
+        # One find_one_and_update returns the updated reservation; a new slot also moves its seats
+        result = await get_booking_service().modify(reservation_id, changes)
+
+        if result.status == "updated":
+            updated_reservation = {key: value for key, value in result.reservation.items() if key != "_id"}
+            return dumps({
                 "success": True,
                 "message": f"Reservation updated successfully for {updated_reservation['customer_name']} on {updated_reservation['date']} at {updated_reservation['time']}.",
                 "reservation": updated_reservation
-            }
+            })
+        elif result.status == "full":
+            return dumps({
+                "success": False,
+                "message": "Sorry, that time is fully booked. Please check availability for another time."
+            })
+        elif result.status == "unavailable":
+            return dumps({"success": False, "message": result.reason})
+        elif result.status == "conflict":
+            return dumps({
+                "success": False,
+                "message": "The reservation was changed at the same time. Please try again."
+            })
         else:
-            return {
+            return dumps({
                 "success": False,
-                "message": "Reservation not found or no changes were made."
-            }
+                "message": "Reservation not found."
+            })
     
     @fnc_ctx.ai_callable()
     async def get_reservation_by_id(
         reservation_id: Annotated[str, llm.TypeInfo(description="ID of the reservation to retrieve")]
     ):
         """Retrieve a specific reservation by its ID."""
-        reservation = db_helper.reservations_collection.find_one(
+        reservation = await repo.reservations.find_one(
             {"_id": ObjectId(reservation_id)},
             {"_id": 0}  # Exclude _id field from the result
         )
         
         if reservation:
-            return reservation
+            return dumps(reservation)
         else:
-            return {"message": "Reservation not found."}
+            return dumps({"message": "Reservation not found."})
             
     @fnc_ctx.ai_callable()
     async def search_reservations(
@@ -151,63 +220,52 @@ async def entrypoint(ctx: JobContext):
     ):
         """Search for reservations by contact number."""
         if not contact_number:
-            return {"message": "Please provide a contact number."}
-        
-        query = {"contact_number": contact_number}
+            return dumps({"message": "Please provide a contact number."})
         
-        reservations = list(db_helper.reservations_collection.find(query, {"_id": 1, "customer_name": 1, "date": 1, "time": 1, "party_size": 1}))
+        query = phone_filter(contact_number)
         
-        # Convert ObjectId to string for JSON serialization
-        for reservation in reservations:
-            reservation["_id"] = str(reservation["_id"])
+        reservations = await repo.reservations.find(query, {"_id": 1, "customer_name": 1, "date": 1, "time": 1, "party_size": 1})
         
         if reservations:
-            return reservations
+            return dumps(reservations)
         else:
-            return {"message": "No reservations found with this contact number."}
+            return dumps({"message": "No reservations found with this contact number."})
 
     # Register policy-related functions
     # @fnc_ctx.ai_callable()
     async def get_all_policies():
         """Retrieve all restaurant policies."""
-        return list(db_helper.policies_collection.find({}, {"_id": 0}))
+        catalog = await get_policy_catalog_async()
+        return catalog.documents
 
     @fnc_ctx.ai_callable()
     async def get_policy_by_type(
         type: Annotated[str, llm.TypeInfo(description="Type of policy to retrieve (e.g., restaurant_info, hours_of_operation, reservation_policy, dress_code)")] 
     ):
         """Retrieve a specific restaurant policy by its type."""
-        return db_helper.policies_collection.find_one({"type": type}, {"_id": 0})
+        catalog = await get_policy_catalog_async()
+        return dumps(catalog.get(type))
 
     @fnc_ctx.ai_callable()
     async def get_special_experience_by_name(
         name: Annotated[str, llm.TypeInfo(description="Name of the special experience to retrieve")]
     ):
         """Retrieve details about a specific special experience by its name."""
-        policy = db_helper.policies_collection.find_one(
-            {"type": "special_experiences"}, 
-            {"_id": 0}
-        )
-        if policy and "options" in policy:
-            for option in policy["options"]:
-                if option.get("name") == name:
-                    return option
-        return {"message": "Special experience not found."}
+        catalog = await get_policy_catalog_async()
+        experience = catalog.special_experience(name)
+        if experience:
+            return dumps(experience)
+        return dumps({"message": "Special experience not found."})
         
     @fnc_ctx.ai_callable()
     async def get_hours_for_day(
         day: Annotated[str, llm.TypeInfo(description="Day of the week (e.g., Monday, Tuesday)")]
     ):
         """Retrieve operating hours for a specific day of the week."""
-        policy = db_helper.policies_collection.find_one(
-            {"type": "hours_of_operation"}, 
-            {"_id": 0}
-        )
-        if policy and "regularHours" in policy:
-            for hours in policy["regularHours"]:
-                if hours.get("dayOfWeek") == day:
-                    return hours
-        return {"message": f"Hours for {day} not found."}
+        hours = (await get_schedule_async()).hours_for_day(day)
+        if hours:
+            return dumps(hours)
+        return dumps({"message": f"Hours for {day} not found."})
 
     # Register Order related functions
     # @fnc_ctx.ai_callable()
@@ -496,38 +554,20 @@ async def entrypoint(ctx: JobContext):
 
     current_date = datetime.now().strftime("%Y-%m-%d")
 
+    menu_seeder = MenuContextSeeder(get_menu_catalog_async)
+
     async def initialize_restaurant_context(agent: VoicePipelineAgent, chat_ctx: llm.ChatContext):
         """
-        Enriches the chat context with menu items and restaurant policies.
-        This function retrieves the restaurant's menu and policies and adds
-        them to the chat context for reference during conversation.
+        Keeps the restaurant menu in the chat context without growing it.
+        The menu snapshot is seeded once per session and only swapped in
+        place when the menu version changes.
         """
-        # Retrieve menu items
-        menu_items = await get_menu_items()
-        
-        # Retrieve all restaurant policies
-        policies = await get_all_policies()
-        
-        # Format the menu and policy information as context
-        menu_context = "Menu Items:\n" + json.dumps(menu_items, indent=2)
-        # policy_context = "Restaurant Policies:\n" + json.dumps(policies, indent=2)
-        
-        # Add the context to the chat context
-        menu_msg = llm.ChatMessage.create(
-            text=menu_context,
-            role="assistant",
-        )
-        
-        # policy_msg = llm.ChatMessage.create(
-        #     text=policy_context,
-        #     role="assistant",
-        # )
-        
-        # Add messages to chat context
-        chat_ctx.messages.append(menu_msg)
-        # chat_ctx.messages.append(policy_msg)
-        
-        logger.info("Initialized chat context with menu items and restaurant policies")
+        # Only rebuilds when the snapshot watcher has swapped in a new catalog
+        await menu_seeder.refresh()
+
+        # Update the session context as well as the per-turn copy
+        menu_seeder.seed(agent.chat_ctx)
+        menu_seeder.seed(chat_ctx)
     
     # Initialize the chat context   
     initial_ctx = llm.ChatContext().append(
@@ -584,7 +624,7 @@ async def entrypoint(ctx: JobContext):
                 <tools>
                 AVAILABLE TOOLS:
                 - Menu Information: get_menu_item_by_name
-                - Reservation Management: create_reservation, modify_reservation, get_reservation_by_id, search_reservations
+                - Reservation Management: check_availability, create_reservation, modify_reservation, get_reservation_by_id, search_reservations
                 - Policy Information: get_policy_by_type, get_special_experience_by_name, get_hours_for_day
                 - Order Management: create_order, get_order_by_id, modify_order, update_order_status, delete_order, search_orders
                 </tools>
@@ -600,6 +640,7 @@ async def entrypoint(ctx: JobContext):
                 Reservation Management: 
                     - Collect required information: customer name, contact number, date, time, and party size
                     - Verify all details before creating or modifying reservations
+                    - Before booking, use check_availability() and offer the suggested alternatives if the time is not free
                     - For new reservations: use create_reservation() and provide the returned reservation_id as confirmation
                     - For modifying reservations: verify identity first, then use modify_reservation() with only changed fields
                     - For finding reservations: use search_reservations() after identity verification
@@ -664,6 +705,10 @@ async def entrypoint(ctx: JobContext):
             role="system",
     )
 
+    # Seed the menu snapshot once for the whole session
+    await menu_seeder.refresh()
+    menu_seeder.seed(initial_ctx)
+
     agent = VoicePipelineAgent(
         stt=deepgram.STT(),
         llm=google.LLM(model="gemini-2.0-flash"),
@@ -686,14 +731,15 @@ async def entrypoint(ctx: JobContext):
                 chunk_length_schedule=[80, 120, 200, 260],
             ),
         fnc_ctx=fnc_ctx,
-        vad=silero.VAD.load(),
+        vad=ctx.proc.userdata.get("vad") or silero.VAD.load(),
         chat_ctx=initial_ctx,
         allow_interruptions=True,
         before_llm_cb=initialize_restaurant_context
     )
 
+    timer.attach(agent, "agent_started_speaking")
     agent.start(room=ctx.room)
     await agent.say("Welcome to Gourmet Bistro! I'm Culinary Vertex, your virtual dining assistant. I'd be delighted to help you with reservations, menu recommendations, or information about our restaurant. How may I assist you today?", allow_interruptions=True)
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
@@ -4,58 +4,79 @@ from dotenv import load_dotenv
 from livekit.agents import AutoSubscribe, JobContext, WorkerOptions, WorkerType, cli, multimodal, llm
 from livekit.plugins import google
 from datetime import datetime 
-import certifi
-from pymongo import MongoClient
 from typing import Optional, Annotated
-import os
 from bson import ObjectId
+from availability import get_availability_engine
+from booking import get_booking_service
+from database import get_repository
+from menu_catalog import get_menu_catalog_async
+from policy_catalog import get_policy_catalog_async
+from schedule import get_schedule_async
+from search_keys import name_filter, phone_filter
+from serialization import dumps
+from snapshot_watcher import start_snapshot_watcher
+from worker import StartupTimer, prewarm
 
 load_dotenv(dotenv_path=".env")
 logger = logging.getLogger("CulinaryVertexBackend")
 logger.setLevel(logging.INFO)
 
-class MongoDBHelper:
-    def __init__(self, connection_uri: str):
-        self.client = MongoClient(
-            connection_uri,
-            tlsCAFile=certifi.where()
-        )
-        self.db = self.client["restaurant_db"]
-        self.menu_collection = self.db["menu"]
-        self.reservations_collection = self.db["reservations"]
-        self.orders_collection = self.db["orders"]
-        self.policies_collection = self.db["policies"]
-
-    def close_connection(self):
-        if self.client:
-            self.client.close()
-
 async def entrypoint(ctx: JobContext):
+    timer = StartupTimer("agent")
     logger.info("starting culinary vertex backend")
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    timer.mark("connected")
 
-    uri = os.getenv("MONGO_DB_URL")
-    db_helper = MongoDBHelper(uri)
+    repo = get_repository()
+    await repo.run(start_snapshot_watcher)
+    timer.mark("snapshots")
     fnc_ctx = llm.FunctionContext()
 
     @fnc_ctx.ai_callable()
     async def get_menu_items():
         """Retrieve all items from the restaurant menu."""
-        return list(db_helper.menu_collection.find({}, {"_id": 0}))
+        catalog = await get_menu_catalog_async()
+        return dumps(catalog.items)
 
     @fnc_ctx.ai_callable()
     async def get_menu_by_category(
         category: Annotated[str, llm.TypeInfo(description="Category of menu items to retrieve")]
     ):
         """Retrieve menu items filtered by category."""
-        return list(db_helper.menu_collection.find({"category": category}, {"_id": 0}))
+        catalog = await get_menu_catalog_async()
+        return dumps(catalog.by_category(category))
 
     @fnc_ctx.ai_callable()
     async def get_menu_item_by_name(
         name: Annotated[str, llm.TypeInfo(description="Name of the menu item to find")]
     ):
         """Find a specific menu item by its name."""
-        return db_helper.menu_collection.find_one({"name": name}, {"_id": 0})
+        catalog = await get_menu_catalog_async()
+        item = catalog.lookup(name)
+        if item:
+            return dumps(item)
+        return dumps({
+            "message": f"No menu item named {name}.",
+            "suggestions": [candidate["name"] for candidate in catalog.resolve(name)]
+        })
+
+    @fnc_ctx.ai_callable()
+    async def get_menu_by_dietary(
+        dietary: Annotated[str, llm.TypeInfo(description="Dietary tag, e.g. Vegetarian, Vegan, GF, DF")],
+        menu_type: Annotated[Optional[str], llm.TypeInfo(description="Optional menu type, e.g. Lunch, Dinner, Drinks")] = None
+    ):
+        """Retrieve menu items matching a dietary requirement, optionally limited to one menu type."""
+        catalog = await get_menu_catalog_async()
+        return dumps(catalog.filter(dietary=[dietary], menu_type=menu_type))
+
+    @fnc_ctx.ai_callable()
+    async def check_availability(
+        date: Annotated[str, llm.TypeInfo(description="Date in YYYY-MM-DD format")],
+        time: Annotated[str, llm.TypeInfo(description="Time in HH:MM format")],
+        party_size: Annotated[int, llm.TypeInfo(description="Number of people in the party")]
+    ):
+        """Check whether a table is free at the requested date and time; suggests the nearest free times if not."""
+        return dumps(await get_availability_engine().check(date, time, party_size))
 
     # Register reservation-related functions
     @fnc_ctx.ai_callable()
@@ -67,23 +88,32 @@ async def entrypoint(ctx: JobContext):
         party_size: Annotated[int, llm.TypeInfo(description="Number of people in the party")]
     ):
         """Create a new restaurant reservation."""
+        availability = await get_availability_engine().check(date, time, party_size)
+        if not availability["available"]:
+            return dumps({"message": "Reservation not created.", **availability})
+
         reservation = {
             "customer_name": customer_name,
             "contact_number": contact_number,
-            "date": date,
-            "time": time,
+            "date": availability["date"],
+            "time": availability["time"],
             "party_size": party_size,
             "status": "confirmed",
             "created_at": datetime.now()
         }
 
-        result = db_helper.reservations_collection.insert_one(reservation)
-        reservation_id = str(result.inserted_id)
+        # Seats are claimed atomically; a retried call returns the original booking
+        booking = await get_booking_service().book(reservation)
+        if booking.status == "unavailable":
+            return dumps({"message": booking.reason})
+        if booking.status == "full":
+            return dumps({"message": "Sorry, that time was just booked up. Please check availability again."})
+        reservation_id = booking.reservation_id
 
-        return {
+        return dumps({
             "reservation_id": reservation_id,
-            "message": f"Reservation confirmed for {customer_name} on {date} at {time} for {party_size} people."
-        }
+            "message": f"Reservation confirmed for {customer_name} on {reservation['date']} at {reservation['time']} for {party_size} people."
+        })
 
     @fnc_ctx.ai_callable()
     async def modify_reservation(
@@ -95,60 +125,61 @@ async def entrypoint(ctx: JobContext):
         party_size: Annotated[Optional[int], llm.TypeInfo(description="Updated number of people in the party")] = None
     ):
         """Modify an existing restaurant reservation."""
-        # Prepare update dict with only the fields that are provided
-        update_fields = {}
+        # Prepare the changes with only the fields that are provided
+        changes = {}
         if customer_name is not None:
-            update_fields["customer_name"] = customer_name
+            changes["customer_name"] = customer_name
         if contact_number is not None:
-            update_fields["contact_number"] = contact_number
+            changes["contact_number"] = contact_number
         if date is not None:
-            update_fields["date"] = date
+            changes["date"] = date
         if time is not None:
-            update_fields["time"] = time
+            changes["time"] = time
         if party_size is not None:
-            update_fields["party_size"] = party_size
-
-        # Add updated_at timestamp
-        update_fields["updated_at"] = datetime.now()
-
-        # Update the reservation in the database
-        result = db_helper.reservations_collection.update_one(
-            {"_id": ObjectId(reservation_id)},
-            {"$set": update_fields}
-        )
+            changes["party_size"] = party_size
 
-        if result.modified_count > 0:
-            # Get the updated reservation to return it
-            updated_reservation = db_helper.reservations_collection.find_one(
-                {"_id": ObjectId(reservation_id)},
-                {"_id": 0}  # Exclude _id field from the result
-            )
+        # One find_one_and_update returns the updated reservation; a new slot also moves its seats
+        result = await get_booking_service().modify(reservation_id, changes)
 
-            return {
+        if result.status == "updated":
+            updated_reservation = {key: value for key, value in result.reservation.items() if key != "_id"}
+            return dumps({
                 "success": True,
                 "message": f"Reservation updated successfully for {updated_reservation['customer_name']} on {updated_reservation['date']} at {updated_reservation['time']}.",
                 "reservation": updated_reservation
-            }
+            })
+        elif result.status == "full":
+            return dumps({
+                "success": False,
+                "message": "Sorry, that time is fully booked. Please check availability for another time."
+            })
+        elif result.status == "unavailable":
+            return dumps({"success": False, "message": result.reason})
+        elif result.status == "conflict":
+            return dumps({
+                "success": False,
+                "message": "The reservation was changed at the same time. Please try again."
+            })
         else:
-            return {
+            return dumps({
                 "success": False,
-                "message": "Reservation not found or no changes were made."
-            }
+                "message": "Reservation not found."
+            })
 
     @fnc_ctx.ai_callable()
     async def get_reservation_by_id(
         reservation_id: Annotated[str, llm.TypeInfo(description="ID of the reservation to retrieve")]
     ):
         """Retrieve a specific reservation by its ID."""
-        reservation = db_helper.reservations_collection.find_one(
+        reservation = await repo.reservations.find_one(
             {"_id": ObjectId(reservation_id)},
             {"_id": 0}  # Exclude _id field from the result
         )
 
         if reservation:
-            return reservation
+            return dumps(reservation)
         else:
-            return {"message": "Reservation not found."}
+            return dumps({"message": "Reservation not found."})
 
     @fnc_ctx.ai_callable()
     async def search_reservations(
@@ -159,68 +190,57 @@ async def entrypoint(ctx: JobContext):
         """Search for reservations by customer name, date, or contact number."""
         query = {}
         if customer_name:
-            query["customer_name"] = {"$regex": customer_name, "$options": "i"}  # Case-insensitive search
+            query.update(name_filter(customer_name))  # Indexed, case- and accent-insensitive token prefix search
         if date:
             query["date"] = date
         if contact_number:
-            query["contact_number"] = contact_number
+            query.update(phone_filter(contact_number))
 
         if not query:
-            return {"message": "Please provide at least one search parameter."}
-
-        reservations = list(db_helper.reservations_collection.find(query, {"_id": 1, "customer_name": 1, "date": 1, "time": 1, "party_size": 1}))
+            return dumps({"message": "Please provide at least one search parameter."})
 
-        # Convert ObjectId to string for JSON serialization
-        for reservation in reservations:
-            reservation["_id"] = str(reservation["_id"])
+        reservations = await repo.reservations.find(query, {"_id": 1, "customer_name": 1, "date": 1, "time": 1, "party_size": 1})
 
         if reservations:
-            return reservations
+            return dumps(reservations)
         else:
-            return {"message": "No reservations found matching the search criteria."}
+            return dumps({"message": "No reservations found matching the search criteria."})
 
     # Register policy-related functions
     @fnc_ctx.ai_callable()
     async def get_all_policies():
         """Retrieve all restaurant policies."""
-        return list(db_helper.policies_collection.find({}, {"_id": 0}))
+        catalog = await get_policy_catalog_async()
+        return dumps(catalog.documents)
 
     @fnc_ctx.ai_callable()
     async def get_policy_by_type(
         type: Annotated[str, llm.TypeInfo(description="Type of policy to retrieve (e.g., restaurant_info, hours_of_operation, reservation_policy, dress_code)")] 
     ):
         """Retrieve a specific restaurant policy by its type."""
-        return db_helper.policies_collection.find_one({"type": type}, {"_id": 0})
+        catalog = await get_policy_catalog_async()
+        return dumps(catalog.get(type))
 
     @fnc_ctx.ai_callable()
     async def get_special_experience_by_name(
         name: Annotated[str, llm.TypeInfo(description="Name of the special experience to retrieve")]
     ):
         """Retrieve details about a specific special experience by its name."""
-        policy = db_helper.policies_collection.find_one(
-            {"type": "special_experiences"}, 
-            {"_id": 0}
-        )
-        if policy and "options" in policy:
-            for option in policy["options"]:
-                if option.get("name") == name:
-                    return option
-        return {"message": "Special experience not found."}
+        catalog = await get_policy_catalog_async()
+        experience = catalog.special_experience(name)
+        if experience:
+            return dumps(experience)
+        return dumps({"message": "Special experience not found."})
 
     @fnc_ctx.ai_callable()
     async def get_hours_for_day(
         day: Annotated[str, llm.TypeInfo(description="Day of the week (e.g., Monday, Tuesday)")]
     ):
         """Retrieve operating hours for a specific day of the week."""
-        policy = db_helper.policies_collection.find_one(
-            {"type": "hours_of_operation"}, 
-            {"_id": 0}
-        )
-        if policy and "regularHours" in policy:
-            for hours in policy["regularHours"]:
-                if hours.get("dayOfWeek") == day:
-                    return hours
-        return {"message": f"Hours for {day} not found."}
+        hours = (await get_schedule_async()).hours_for_day(day)
+        if hours:
+            return dumps(hours)
+        return dumps({"message": f"Hours for {day} not found."})
 
     current_date = datetime.now().strftime("%Y-%m-%d")
     
@@ -282,8 +302,8 @@ async def entrypoint(ctx: JobContext):
 
                             <tools>
                             AVAILABLE TOOLS:
-                            - Menu Information: get_menu_items, get_menu_by_category, get_menu_item_by_name
-                            - Reservation Management: create_reservation, modify_reservation, get_reservation_by_id, search_reservations
+                            - Menu Information: get_menu_items, get_menu_by_category, get_menu_item_by_name, get_menu_by_dietary
+                            - Reservation Management: check_availability, create_reservation, modify_reservation, get_reservation_by_id, search_reservations
                             - Policy Information: get_all_policies, get_policy_by_type, get_special_experience_by_name, get_hours_for_day
                             - Order Management: create_order, get_order_by_id, modify_order, update_order_status, delete_order, search_orders
                             </tools>
@@ -300,6 +320,7 @@ async def entrypoint(ctx: JobContext):
                             Reservation Management: 
                                 - Collect required information: customer name, contact number, date, time, and party size
                                 - Verify all details before creating or modifying reservations
+                                - Before booking, use check_availability() and offer the suggested alternatives if the time is not free
                                 - For new reservations: use create_reservation() and provide the returned reservation_id as confirmation
                                 - For modifying reservations: verify identity first, then use modify_reservation() with only changed fields
                                 - For finding reservations: use search_reservations() after identity verification
@@ -310,6 +331,7 @@ async def entrypoint(ctx: JobContext):
                                 - Use get_menu_items() for complete menu access
                                 - For category-specific inquiries, use get_menu_by_category()
                                 - For specific dish details, use get_menu_item_by_name()
+                                - For dietary requests (vegetarian, vegan, gluten-free, dairy-free), use get_menu_by_dietary()
                                 - Recommend dishes based on preferences while respecting dietary restrictions
                             </menu>
 
@@ -369,7 +391,8 @@ async def entrypoint(ctx: JobContext):
         transcription=multimodal.AgentTranscriptionOptions(user_transcription=True, agent_transcription=True),
         fnc_ctx=fnc_ctx
     )
+    timer.attach(agent, "agent_started_speaking")
     agent.start(ctx.room)
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, worker_type=WorkerType.ROOM))
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm, worker_type=WorkerType.ROOM))
@@ -5,38 +5,59 @@ from dotenv import load_dotenv
 from livekit.agents import AutoSubscribe, JobContext, WorkerOptions, WorkerType, cli, multimodal, llm
 from livekit.plugins import openai
 from datetime import datetime, timedelta
-import certifi
-from pymongo import MongoClient
-from typing import Optional, Annotated
-import os
+from typing import Any, Dict, Optional, Annotated, Tuple
 from bson import ObjectId
+from pymongo import ReturnDocument
+from availability import get_availability_engine
+from booking import get_booking_service
+from database import get_repository
+from menu_catalog import get_menu_catalog_async
+from order_lifecycle import EDITABLE_STATUSES, TransitionError, edit_filter, get_kitchen_queue_async, transition
+from order_updates import missing_removals, order_edit_pipeline, removal_filter
+from policy_catalog import get_policy_catalog_async
+from pricing import PriceTable, PricingError
+from schedule import get_schedule_async
+from search_keys import name_filter, phone_filter, with_search_keys
+from serialization import dumps
+from snapshot_watcher import start_snapshot_watcher
+from worker import StartupTimer, prewarm
 
 load_dotenv(dotenv_path=".env")
 logger = logging.getLogger("CulinaryVertexBackend")
 logger.setLevel(logging.INFO)
 
-class MongoDBHelper:
-    def __init__(self, connection_uri: str):
-        self.client = MongoClient(
-            connection_uri,
-            tlsCAFile=certifi.where()
-        )
-        self.db = self.client["restaurant_db"]
-        self.menu_collection = self.db["menu"]
-        self.reservations_collection = self.db["reservations"]
-        self.orders_collection = self.db["orders"]
-        self.policies_collection = self.db["policies"]
-
-    def close_connection(self):
-        if self.client:
-            self.client.close()
+def _line_key(line: Dict[str, Any]) -> Tuple:
+    return (line["item_name"], line.get("variant"), tuple(line.get("add_ons") or ()))
+
+def _merge_line(lines: Dict[Tuple, Dict[str, Any]], prices: PriceTable, menu_item: Dict[str, Any], item: Dict[str, Any]) -> None:
+    """Add a requested item to the order lines, merging quantities of identical lines.
+
+    Raises PricingError when the variant or an add-on cannot be resolved.
+    """
+    quote = prices.quote(menu_item["name"], item.get("variant"), item.get("add_ons") or ())
+    line = {
+        "item_name": quote.item_name,
+        "variant": quote.variant,
+        "add_ons": list(quote.add_ons),
+        "quantity": item.get("quantity", 1),
+        "price": quote.unit_price,
+        "special_instructions": item.get("special_instructions", "")
+    }
+    existing = lines.get(_line_key(line))
+    if existing:
+        existing["quantity"] += line["quantity"]
+    else:
+        lines[_line_key(line)] = line
 
 async def entrypoint(ctx: JobContext):
+    timer = StartupTimer("agent_openai")
     logger.info("starting culinary vertex backend")
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    timer.mark("connected")
     
-    uri = os.getenv("MONGO_DB_URL")
-    db_helper = MongoDBHelper(uri)
+    repo = get_repository()
+    await repo.run(start_snapshot_watcher)
+    timer.mark("snapshots")
     fnc_ctx = llm.FunctionContext()
     
     # MENU FUNCTIONS
@@ -44,9 +65,10 @@ async def entrypoint(ctx: JobContext):
     async def get_menu_items() -> str:
         """Retrieve all menu items as JSON string"""
         try:
-            return json.dumps(list(db_helper.menu_collection.find({}, {"_id": 0})))
+            catalog = await get_menu_catalog_async()
+            return dumps(catalog.items)
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
 
     @fnc_ctx.ai_callable()
     async def get_menu_by_category(
@@ -54,10 +76,10 @@ async def entrypoint(ctx: JobContext):
     ) -> str:
         """Retrieve menu items by category as JSON string"""
         try:
-            items = list(db_helper.menu_collection.find({"category": category}, {"_id": 0}))
-            return json.dumps(items)
+            catalog = await get_menu_catalog_async()
+            return dumps(catalog.by_category(category))
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
 
     @fnc_ctx.ai_callable()
     async def get_menu_item_by_name(
@@ -65,42 +87,73 @@ async def entrypoint(ctx: JobContext):
     ) -> str:
         """Retrieve a specific menu item by name as JSON string"""
         try:
-            item = db_helper.menu_collection.find_one({"name": name}, {"_id": 0})
+            catalog = await get_menu_catalog_async()
+            item = catalog.lookup(name)
             if item:
-                return json.dumps(item)
+                return dumps(item)
             else:
-                return json.dumps({"error": "Menu item not found"})
+                return dumps({
+                    "error": "Menu item not found",
+                    "suggestions": [candidate["name"] for candidate in catalog.resolve(name)]
+                })
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
+
+    @fnc_ctx.ai_callable()
+    async def get_menu_by_dietary(
+        dietary: Annotated[str, llm.TypeInfo(description="Dietary tag (e.g., 'Vegetarian', 'Vegan', 'GF', 'DF')")],
+        menu_type: Annotated[Optional[str], llm.TypeInfo(description="Menu type filter (e.g., 'Lunch', 'Dinner', 'Drinks')")] = None
+    ) -> str:
+        """Retrieve menu items matching a dietary tag as JSON string"""
+        try:
+            catalog = await get_menu_catalog_async()
+            return dumps(catalog.filter(dietary=[dietary], menu_type=menu_type))
+        except Exception as e:
+            return dumps({"error": str(e)})
 
     # ORDER FUNCTIONS
     @fnc_ctx.ai_callable()
     async def create_order(
         customer_name: Annotated[str, llm.TypeInfo(description="Customer name")],
-        items: Annotated[str, llm.TypeInfo(description="JSON array of items")],
+        items: Annotated[str, llm.TypeInfo(description="JSON array of items, each with item_name, quantity and optional variant, add_ons and special_instructions")],
         special_instructions: Annotated[Optional[str], llm.TypeInfo(description="Special instructions")] = None
     ) -> str:
         """Create new order, returns order ID as string"""
         try:
             items_list = json.loads(items)
-            total_price = 0.0
-            order_items = []
-            
+            catalog = await get_menu_catalog_async()
+            policies = await get_policy_catalog_async()
+            menu_items = catalog.get_many(item["item_name"] for item in items_list)
+
+            # Repeated lines for the same dish, variant and add-ons are merged
+            lines: Dict[Tuple, Dict[str, Any]] = {}
+            unavailable, needs_choice = [], []
             for item in items_list:
-                menu_item = db_helper.menu_collection.find_one({"name": item["item_name"]})
-                if menu_item:
-                    item_price = menu_item.get("price", 0.0) * item.get("quantity", 1)
-                    total_price += item_price
-                    order_items.append({
-                        "item_name": item["item_name"],
-                        "quantity": item.get("quantity", 1),
-                        "price": menu_item.get("price", 0.0),
-                        "special_instructions": item.get("special_instructions", "")
-                    })
+                menu_item = menu_items[item["item_name"]]
+                if not menu_item:
+                    unavailable.append(item["item_name"])
+                    continue
+                try:
+                    _merge_line(lines, catalog.prices, menu_item, item)
+                except PricingError as e:
+                    needs_choice.append(str(e))
+
+            if needs_choice:
+                return dumps({"error": "Order needs clarification", "details": needs_choice})
+
+            order_items = list(lines.values())
+            if not order_items:
+                # Nothing orderable: no empty order is stored or sent to the kitchen
+                return dumps({"error": "No items could be ordered", "unavailable_items": unavailable})
+            subtotal, service_charge, total_price = (
+                float(value) for value in catalog.prices.price_baskets([order_items], policies.service_charge_rate)[0]
+            )
             
             order = {
                 "customer_name": customer_name,
                 "items": order_items,
+                "subtotal": subtotal,
+                "service_charge": service_charge,
                 "total_price": total_price,
                 "special_instructions": special_instructions,
                 "status": "pending",
@@ -108,14 +161,20 @@ async def entrypoint(ctx: JobContext):
                 "updated_at": datetime.now()
             }
             
-            result = db_helper.orders_collection.insert_one(order)
-            return json.dumps({
+            result = await repo.orders.insert_one(with_search_keys(order))
+            queue = await get_kitchen_queue_async()
+            queue.update(order)
+            return dumps({
                 "order_id": str(result.inserted_id),
+                "subtotal": subtotal,
+                "service_charge": service_charge,
                 "total_price": total_price,
-                "status": "pending"
+                "status": "pending",
+                "estimated_minutes": queue.eta(str(result.inserted_id)),
+                "unavailable_items": unavailable
             })
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
 
     @fnc_ctx.ai_callable()
     async def get_order_by_id(
@@ -123,75 +182,104 @@ async def entrypoint(ctx: JobContext):
     ) -> str:
         """Retrieve order by ID, returns order as JSON string"""
         try:
-            order = db_helper.orders_collection.find_one({"_id": ObjectId(order_id)})
+            order = await repo.orders.find_one({"_id": ObjectId(order_id)})
             if not order:
-                return json.dumps({"error": "Order not found"})
+                return dumps({"error": "Order not found"})
             
-            order["_id"] = str(order["_id"])
-            return json.dumps(order)
+            return dumps(order)
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
 
     @fnc_ctx.ai_callable()
     async def modify_order(
         order_id: Annotated[str, llm.TypeInfo(description="Order ID to modify")],
-        add_items: Annotated[Optional[str], llm.TypeInfo(description="JSON array of items to add")] = None,
+        add_items: Annotated[Optional[str], llm.TypeInfo(description="JSON array of items to add, each with item_name, quantity and optional variant and add_ons")] = None,
         remove_items: Annotated[Optional[str], llm.TypeInfo(description="JSON array of items to remove")] = None,
         special_instructions: Annotated[Optional[str], llm.TypeInfo(description="New instructions")] = None
     ) -> str:
         """Modify existing order, returns status as string"""
         try:
-            current_order = db_helper.orders_collection.find_one({"_id": ObjectId(order_id)})
-            if not current_order:
-                return json.dumps({"error": "Order not found"})
+            catalog = await get_menu_catalog_async()
+            policies = await get_policy_catalog_async()
 
-            updated_items = current_order.get("items", [])
-            
+            # New lines are priced here; merging, removal and totals run server-side
+            added: Dict[Tuple, Dict[str, Any]] = {}
             if add_items:
-                for new_item in json.loads(add_items):
-                    menu_item = db_helper.menu_collection.find_one({"name": new_item["item_name"]})
+                add_list = json.loads(add_items)
+                menu_items = catalog.get_many(item["item_name"] for item in add_list)
+                needs_choice = []
+                for new_item in add_list:
+                    menu_item = menu_items[new_item["item_name"]]
                     if menu_item:
-                        existing_item = next((item for item in updated_items if item["item_name"] == new_item["item_name"]), None)
-                        if existing_item:
-                            existing_item["quantity"] += new_item.get("quantity", 1)
-                        else:
-                            updated_items.append({
-                                "item_name": new_item["item_name"],
-                                "quantity": new_item.get("quantity", 1),
-                                "price": menu_item.get("price", 0.0),
-                                "special_instructions": new_item.get("special_instructions", "")
-                            })
-
+                        try:
+                            _merge_line(added, catalog.prices, menu_item, new_item)
+                        except PricingError as e:
+                            needs_choice.append(str(e))
+                if needs_choice:
+                    return dumps({"error": "Order needs clarification", "details": needs_choice})
+
+            removals = []
+            not_removed = []
             if remove_items:
-                for remove_item in json.loads(remove_items):
-                    for existing_item in updated_items[:]:
-                        if existing_item["item_name"] == remove_item["item_name"]:
-                            if remove_item.get("quantity", 1) >= existing_item["quantity"]:
-                                updated_items.remove(existing_item)
-                            else:
-                                existing_item["quantity"] -= remove_item.get("quantity", 1)
-            
-            total_price = sum(item["price"] * item["quantity"] for item in updated_items)
-            
-            update_doc = {
-                "items": updated_items,
-                "total_price": total_price,
-                "updated_at": datetime.now(),
-                "special_instructions": special_instructions or current_order.get("special_instructions")
-            }
-            
-            db_helper.orders_collection.update_one(
-                {"_id": ObjectId(order_id)},
-                {"$set": update_doc}
+                remove_list = json.loads(remove_items)
+                menu_items = catalog.get_many(item["item_name"] for item in remove_list)
+                for remove_item in remove_list:
+                    menu_item = menu_items[remove_item["item_name"]]
+                    if not menu_item:
+                        not_removed.append(f"{remove_item['item_name']} is not on the menu")
+                        continue
+                    # Stored lines carry the canonical variant label, so spoken variants are resolved first
+                    variant = remove_item.get("variant")
+                    if variant:
+                        try:
+                            variant = catalog.prices.encode(menu_item["name"], variant)[0]
+                        except PricingError as e:
+                            not_removed.append(str(e))
+                            continue
+                    removals.append({
+                        "item_name": menu_item["name"],
+                        "variant": variant,
+                        "quantity": remove_item.get("quantity", 1)
+                    })
+                if not_removed:
+                    return dumps({"error": "Nothing was changed; some items to remove were not recognised", "details": not_removed})
+
+            fields = {"updated_at": datetime.now()}
+            if special_instructions:
+                fields["special_instructions"] = special_instructions
+
+            # One atomic update, so concurrent edits to the same order cannot lose lines;
+            # it only applies while the order is editable and holds every line to remove
+            _id = ObjectId(order_id)
+            updated_order = await repo.orders.find_one_and_update(
+                {**edit_filter(_id), **removal_filter(removals)},
+                order_edit_pipeline(added.values(), removals, policies.service_charge_rate, fields),
+                projection={"total_price": 1, "items": 1, "status": 1, "customer_name": 1},
+                return_document=ReturnDocument.AFTER
             )
-            
-            return json.dumps({
+            if not updated_order:
+                # Costs one extra read to say why nothing was changed
+                current = await repo.orders.find_one({"_id": _id}, {"status": 1, "items": 1})
+                if not current:
+                    return dumps({"error": "Order not found"})
+                current_status = current.get("status") or "pending"
+                if current_status not in EDITABLE_STATUSES:
+                    return dumps({"error": f"Order is {current_status} and can no longer be modified"})
+                missing = [
+                    f"{item['item_name']}{' (' + item['variant'] + ')' if item.get('variant') else ''}"
+                    for item in missing_removals(current, removals)
+                ]
+                return dumps({"error": "Nothing was changed; these items are not on the order", "details": missing})
+            queue = await get_kitchen_queue_async()
+            queue.update(updated_order)
+
+            return dumps({
                 "status": "updated",
-                "total_price": total_price,
-                "items_count": len(updated_items)
+                "total_price": updated_order["total_price"],
+                "items_count": len(updated_order["items"])
             })
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
 
     @fnc_ctx.ai_callable()
     async def update_order_status(
@@ -200,22 +288,13 @@ async def entrypoint(ctx: JobContext):
     ) -> str:
         """Update order status, returns status as string"""
         try:
-            valid_statuses = ["pending", "preparing", "ready", "served", "completed", "cancelled"]
-            if status not in valid_statuses:
-                return json.dumps({"error": f"Invalid status. Must be one of: {', '.join(valid_statuses)}"})
-            
-            order = db_helper.orders_collection.find_one({"_id": ObjectId(order_id)})
-            if not order:
-                return json.dumps({"error": "Order not found"})
-            
-            db_helper.orders_collection.update_one(
-                {"_id": ObjectId(order_id)},
-                {"$set": {"status": status, "updated_at": datetime.now()}}
-            )
-            
-            return json.dumps({"status": "updated", "order_id": order_id, "new_status": status})
+            # Only allowed transitions (e.g. pending -> preparing -> ready) are applied
+            order = await transition(order_id, status)
+            return dumps({"status": "updated", "order_id": order_id, "new_status": order["status"]})
+        except TransitionError as e:
+            return dumps({"error": str(e)})
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
 
     @fnc_ctx.ai_callable()
     async def delete_order(
@@ -223,18 +302,39 @@ async def entrypoint(ctx: JobContext):
     ) -> str:
         """Delete/cancel order, returns status as string"""
         try:
-            order = db_helper.orders_collection.find_one({"_id": ObjectId(order_id)})
-            if not order:
-                return json.dumps({"error": "Order not found"})
-            
-            db_helper.orders_collection.update_one(
-                {"_id": ObjectId(order_id)},
-                {"$set": {"status": "cancelled", "updated_at": datetime.now()}}
-            )
-            
-            return json.dumps({"status": "cancelled", "order_id": order_id})
+            # Orders already ready, served or completed can no longer be cancelled
+            await transition(order_id, "cancelled")
+            return dumps({"status": "cancelled", "order_id": order_id})
+        except TransitionError as e:
+            return dumps({"error": str(e)})
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
+
+    # Registered under its tool name; the Python name must not shadow order_lifecycle.get_kitchen_queue
+    @fnc_ctx.ai_callable(name="get_kitchen_queue")
+    async def kitchen_queue_tool(
+        limit: Annotated[int, llm.TypeInfo(description="How many pending orders to list")] = 5
+    ) -> str:
+        """List the next pending orders to prepare and the active order counts, returns JSON string"""
+        try:
+            queue = await get_kitchen_queue_async()
+            return dumps({"next_up": queue.next_up(limit), "counts": queue.counts()})
+        except Exception as e:
+            return dumps({"error": str(e)})
+
+    @fnc_ctx.ai_callable()
+    async def get_order_eta(
+        order_id: Annotated[str, llm.TypeInfo(description="Order ID to estimate")]
+    ) -> str:
+        """Estimate minutes until an order is ready, returns JSON string"""
+        try:
+            queue = await get_kitchen_queue_async()
+            minutes = queue.eta(order_id)
+            if minutes is None:
+                return dumps({"error": "Order is not waiting in the kitchen queue"})
+            return dumps({"order_id": order_id, "estimated_minutes": minutes})
+        except Exception as e:
+            return dumps({"error": str(e)})
 
     @fnc_ctx.ai_callable()
     async def search_orders(
@@ -247,7 +347,7 @@ async def entrypoint(ctx: JobContext):
         try:
             query = {}
             if customer_name:
-                query["customer_name"] = {"$regex": customer_name, "$options": "i"}
+                query.update(name_filter(customer_name))
             if status:
                 query["status"] = status
             
@@ -259,14 +359,24 @@ async def entrypoint(ctx: JobContext):
                     date_query["$lte"] = datetime.strptime(date_to, "%Y-%m-%d") + timedelta(days=1)
                 query["created_at"] = date_query
             
-            orders = list(db_helper.orders_collection.find(query))
-            for order in orders:
-                order["_id"] = str(order["_id"])
-            return json.dumps(orders)
+            orders = await repo.orders.find(query)
+            return dumps(orders)
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
 
     # RESERVATION FUNCTIONS
+    @fnc_ctx.ai_callable()
+    async def check_availability(
+        date: Annotated[str, llm.TypeInfo(description="Reservation date (YYYY-MM-DD)")],
+        time: Annotated[str, llm.TypeInfo(description="Reservation time (HH:MM)")],
+        party_size: Annotated[int, llm.TypeInfo(description="Number of people")]
+    ) -> str:
+        """Check table availability, returns availability and nearest free times as JSON string"""
+        try:
+            return dumps(await get_availability_engine().check(date, time, party_size))
+        except Exception as e:
+            return dumps({"error": str(e)})
+
     @fnc_ctx.ai_callable()
     async def create_reservation(
         customer_name: Annotated[str, llm.TypeInfo(description="Customer name")],
@@ -277,19 +387,28 @@ async def entrypoint(ctx: JobContext):
     ) -> str:
         """Create reservation, returns reservation ID as string"""
         try:
+            availability = await get_availability_engine().check(date, time, party_size)
+            if not availability["available"]:
+                return dumps({"error": "Requested time is not available", **availability})
+
             reservation = {
                 "customer_name": customer_name,
                 "contact_number": contact_number,
-                "date": date,
-                "time": time,
+                "date": availability["date"],
+                "time": availability["time"],
                 "party_size": party_size,
                 "status": "confirmed",
                 "created_at": datetime.now()
             }
-            result = db_helper.reservations_collection.insert_one(reservation)
-            return json.dumps({"reservation_id": str(result.inserted_id)})
+            # Seats are claimed atomically; a retried call returns the original booking
+            booking = await get_booking_service().book(reservation)
+            if booking.status == "unavailable":
+                return dumps({"error": booking.reason})
+            if booking.status == "full":
+                return dumps({"error": "Requested time was just booked up", "date": reservation["date"], "time": reservation["time"]})
+            return dumps({"reservation_id": booking.reservation_id})
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
 
     @fnc_ctx.ai_callable()
     async def modify_reservation(
@@ -302,32 +421,37 @@ async def entrypoint(ctx: JobContext):
     ) -> str:
         """Modify existing reservation, returns status as string"""
         try:
-            current_reservation = db_helper.reservations_collection.find_one({"_id": ObjectId(reservation_id)})
-            if not current_reservation:
-                return json.dumps({"error": "Reservation not found"})
-            
-            update_doc = {}
+            changes = {}
             if customer_name:
-                update_doc["customer_name"] = customer_name
+                changes["customer_name"] = customer_name
             if contact_number:
-                update_doc["contact_number"] = contact_number
+                changes["contact_number"] = contact_number
             if date:
-                update_doc["date"] = date
+                changes["date"] = date
             if time:
-                update_doc["time"] = time
+                changes["time"] = time
             if party_size:
-                update_doc["party_size"] = party_size
-            
-            update_doc["updated_at"] = datetime.now()
-            
-            db_helper.reservations_collection.update_one(
-                {"_id": ObjectId(reservation_id)},
-                {"$set": update_doc}
-            )
-            
-            return json.dumps({"status": "updated", "reservation_id": reservation_id})
+                changes["party_size"] = party_size
+
+            result = await get_booking_service().modify(reservation_id, changes)
+            if result.status == "not_found":
+                return dumps({"error": "Reservation not found"})
+            if result.status == "full":
+                return dumps({"error": "That time is fully booked"})
+            if result.status == "unavailable":
+                return dumps({"error": result.reason})
+            if result.status == "conflict":
+                return dumps({"error": "Reservation was changed concurrently, please retry"})
+
+            return dumps({
+                "status": "updated",
+                "reservation_id": reservation_id,
+                "date": result.reservation.get("date"),
+                "time": result.reservation.get("time"),
+                "party_size": result.reservation.get("party_size")
+            })
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
 
     @fnc_ctx.ai_callable()
     async def get_reservation_by_id(
@@ -335,14 +459,13 @@ async def entrypoint(ctx: JobContext):
     ) -> str:
         """Retrieve reservation by ID, returns reservation as JSON string"""
         try:
-            reservation = db_helper.reservations_collection.find_one({"_id": ObjectId(reservation_id)})
+            reservation = await repo.reservations.find_one({"_id": ObjectId(reservation_id)})
             if not reservation:
-                return json.dumps({"error": "Reservation not found"})
+                return dumps({"error": "Reservation not found"})
             
-            reservation["_id"] = str(reservation["_id"])
-            return json.dumps(reservation)
+            return dumps(reservation)
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
 
     @fnc_ctx.ai_callable()
     async def search_reservations(
@@ -355,31 +478,28 @@ async def entrypoint(ctx: JobContext):
         try:
             query = {}
             if customer_name:
-                query["customer_name"] = {"$regex": customer_name, "$options": "i"}
+                query.update(name_filter(customer_name))
             if contact_number:
-                query["contact_number"] = contact_number
+                query.update(phone_filter(contact_number))
             if date:
                 query["date"] = date
             if status:
                 query["status"] = status
             
-            reservations = list(db_helper.reservations_collection.find(query))
-            for reservation in reservations:
-                reservation["_id"] = str(reservation["_id"])
-            
-            return json.dumps(reservations)
+            reservations = await repo.reservations.find(query)
+            return dumps(reservations)
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
 
     # POLICY FUNCTIONS
     @fnc_ctx.ai_callable()
     async def get_all_policies() -> str:
         """Retrieve all restaurant policies as JSON string"""
         try:
-            policies = list(db_helper.policies_collection.find({}, {"_id": 0}))
-            return json.dumps(policies)
+            catalog = await get_policy_catalog_async()
+            return dumps(catalog.documents)
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
 
     @fnc_ctx.ai_callable()
     async def get_policy_by_type(
@@ -387,10 +507,10 @@ async def entrypoint(ctx: JobContext):
     ) -> str:
         """Retrieve policies by type as JSON string"""
         try:
-            policies = list(db_helper.policies_collection.find({"type": policy_type}, {"_id": 0}))
-            return json.dumps(policies)
+            catalog = await get_policy_catalog_async()
+            return dumps(catalog.by_type(policy_type))
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
 
     @fnc_ctx.ai_callable()
     async def get_special_experience_by_name(
@@ -398,16 +518,14 @@ async def entrypoint(ctx: JobContext):
     ) -> str:
         """Retrieve special dining experience information by name as JSON string"""
         try:
-            experience = db_helper.policies_collection.find_one(
-                {"type": "special_experience", "name": experience_name}, 
-                {"_id": 0}
-            )
+            catalog = await get_policy_catalog_async()
+            experience = catalog.special_experience(experience_name)
             if experience:
-                return json.dumps(experience)
+                return dumps(experience)
             else:
-                return json.dumps({"error": "Special experience not found"})
+                return dumps({"error": "Special experience not found"})
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
 
     @fnc_ctx.ai_callable()
     async def get_hours_for_day(
@@ -415,20 +533,17 @@ async def entrypoint(ctx: JobContext):
     ) -> str:
         """Retrieve restaurant hours for a specific day as JSON string"""
         try:
-            hours = db_helper.policies_collection.find_one(
-                {"type": "operating_hours", "day": day.lower()}, 
-                {"_id": 0}
-            )
+            hours = (await get_schedule_async()).hours_for_day(day)
             if hours:
-                return json.dumps(hours)
+                return dumps(hours)
             else:
-                return json.dumps({"error": f"Hours for {day} not found"})
+                return dumps({"error": f"Hours for {day} not found"})
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return dumps({"error": str(e)})
 
     # System initialization
     chat_ctx = llm.ChatContext()
-    text = get_menu_items()
+    text = await get_menu_items()
     chat_ctx.append(
         text=text,
         role="assistant",
@@ -495,10 +610,10 @@ async def entrypoint(ctx: JobContext):
 
                             <tools>
                             AVAILABLE TOOLS:
-                            - Menu Information: get_menu_items, get_menu_by_category, get_menu_item_by_name
-                            - Reservation Management: create_reservation, modify_reservation, get_reservation_by_id, search_reservations
+                            - Menu Information: get_menu_items, get_menu_by_category, get_menu_item_by_name, get_menu_by_dietary
+                            - Reservation Management: check_availability, create_reservation, modify_reservation, get_reservation_by_id, search_reservations
                             - Policy Information: get_all_policies, get_policy_by_type, get_special_experience_by_name, get_hours_for_day
-                            - Order Management: create_order, get_order_by_id, modify_order, update_order_status, delete_order, search_orders
+                            - Order Management: create_order, get_order_by_id, modify_order, update_order_status, delete_order, search_orders, get_kitchen_queue, get_order_eta
                             </tools>
 
                             <initialization>
@@ -513,6 +628,7 @@ async def entrypoint(ctx: JobContext):
                             Reservation Management: 
                                 - Collect required information: customer name, contact number, date, time, and party size
                                 - Verify all details before creating or modifying reservations
+                                - Before booking, use check_availability() and offer the suggested alternatives if the time is not free
                                 - For new reservations: use create_reservation() and provide the returned reservation_id as confirmation
                                 - For modifying reservations: verify identity first, then use modify_reservation() with only changed fields
                                 - For finding reservations: use search_reservations() after identity verification
@@ -523,6 +639,7 @@ async def entrypoint(ctx: JobContext):
                                 - Use get_menu_items() for complete menu access
                                 - For category-specific inquiries, use get_menu_by_category()
                                 - For specific dish details, use get_menu_item_by_name()
+                                - For dietary requests (vegetarian, vegan, gluten-free, dairy-free), use get_menu_by_dietary()
                                 - Recommend dishes based on preferences while respecting dietary restrictions
                                 - Only mention the dish name, if the user asks more details, then provide the details
                             </menu>
@@ -542,7 +659,8 @@ async def entrypoint(ctx: JobContext):
                                 - Each item in the items list should include item_name, quantity, and optional special_instructions
                                 - Use get_order_by_id() to retrieve specific order details
                                 - For modifying orders, use modify_order() to add items, remove items, update quantities, or change special instructions
-                                - Use update_order_status() to change order status (pending, preparing, ready, served, completed, cancelled)
+                                - Use update_order_status() to change order status; orders move pending -> preparing -> ready -> served -> completed, and only pending or preparing orders can be cancelled
+                                - Use get_order_eta() when a customer asks when their order will be ready, and get_kitchen_queue() for what the kitchen should prepare next
                                 - For finding customer orders, use search_orders() to locate orders by customer name, status, or date range
                                 - Use delete_order() to cancel an order rather than physically deleting it
                                 - Confirm all order details before creating or modifying, and provide order summaries for verification
@@ -585,8 +703,9 @@ async def entrypoint(ctx: JobContext):
         fnc_ctx=fnc_ctx,
         chat_ctx=chat_ctx
     )
+    timer.attach(agent, "agent_started_speaking")
     agent.start(ctx.room)
     # agent.generate_reply()
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, worker_type=WorkerType.ROOM))
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm, worker_type=WorkerType.ROOM))
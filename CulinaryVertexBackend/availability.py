@@ -0,0 +1,267 @@
+import logging
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date as Date, datetime, timedelta
+from time import monotonic
+from typing import Any, Dict, List, Optional, Tuple
+
+from database import get_repository
+from policy_catalog import PolicyCatalog, get_policy_catalog_async
+from schedule import format_time, get_schedule_async, opening_intervals, parse_date, parse_time
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+# Reservations start on this grid and hold their seats for DINING_MINUTES
+SLOT_MINUTES = int(os.getenv("RESERVATION_SLOT_MINUTES", "15"))
+DINING_MINUTES = int(os.getenv("RESERVATION_DURATION_MINUTES", "90"))
+# Seat count override; otherwise the "Entire Restaurant" buyout capacity from the policies
+SEAT_CAPACITY = os.getenv("RESTAURANT_SEAT_CAPACITY")
+DEFAULT_SEAT_CAPACITY = 100
+# How long a day's counts are trusted before re-reading reservations made by other workers
+DAY_TTL_SECONDS = float(os.getenv("AVAILABILITY_TTL_SECONDS", "60"))
+
+ACTIVE_FILTER = {"status": {"$ne": "cancelled"}}
+
+
+def seat_capacity(policies: PolicyCatalog) -> int:
+    if SEAT_CAPACITY:
+        return int(SEAT_CAPACITY)
+    for doc in policies.by_type("private_dining"):
+        for option in doc.get("buyoutOptions", []):
+            if option.get("area") == "Entire Restaurant" and option.get("capacity"):
+                return int(option["capacity"])
+    return DEFAULT_SEAT_CAPACITY
+
+
+def party_size_error(party_size: Any) -> Optional[str]:
+    """Why `party_size` cannot be booked, or None for a whole number of at least one."""
+    if isinstance(party_size, bool) or not isinstance(party_size, int) or party_size < 1:
+        return "The party size must be a whole number of at least one person."
+    return None
+
+
+def request_error(day: str, minute: int, party_size: Any, now: Optional[datetime] = None) -> Optional[str]:
+    """The rule every availability check and booking applies before counting seats."""
+    error = party_size_error(party_size)
+    if error is not None:
+        return error
+    if datetime.fromisoformat(day) + timedelta(minutes=minute) < (now or datetime.now()):
+        return f"{day} at {format_time(minute)} is in the past."
+    return None
+
+
+class _MaxTree:
+    """Segment tree of per-slot free seats, for nearest-slot-with-room searches in O(log n)."""
+
+    def __init__(self, values: List[int]):
+        self._n = len(values)
+        self._size = 1
+        while self._size < max(self._n, 1):
+            self._size *= 2
+        self._tree = [-1] * (2 * self._size)
+        self._tree[self._size:self._size + self._n] = values
+        for node in range(self._size - 1, 0, -1):
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+
+    def update(self, index: int, value: int) -> None:
+        node = self._size + index
+        self._tree[node] = value
+        node //= 2
+        while node:
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+            node //= 2
+
+    def first_at_least(self, lo: int, value: int, node: int = 1, node_lo: int = 0, node_hi: Optional[int] = None) -> Optional[int]:
+        """Smallest index >= lo holding at least `value`."""
+        if node_hi is None:
+            node_hi = self._size - 1
+        if node_hi < lo or self._tree[node] < value:
+            return None
+        if node_lo == node_hi:
+            return node_lo
+        mid = (node_lo + node_hi) // 2
+        found = self.first_at_least(lo, value, 2 * node, node_lo, mid)
+        return found if found is not None else self.first_at_least(lo, value, 2 * node + 1, mid + 1, node_hi)
+
+    def last_at_least(self, hi: int, value: int, node: int = 1, node_lo: int = 0, node_hi: Optional[int] = None) -> Optional[int]:
+        """Largest index <= hi holding at least `value`."""
+        if node_hi is None:
+            node_hi = self._size - 1
+        if node_lo > hi or self._tree[node] < value:
+            return None
+        if node_lo == node_hi:
+            return node_lo
+        mid = (node_lo + node_hi) // 2
+        found = self.last_at_least(hi, value, 2 * node + 1, mid + 1, node_hi)
+        return found if found is not None else self.last_at_least(hi, value, 2 * node, node_lo, mid)
+
+
+class DayAvailability:
+    """Seats in use for one date, in SLOT_MINUTES buckets.
+
+    `starts` holds every bookable start time (sorted); a party booked at a
+    start occupies the buckets of the following DINING_MINUTES, which must
+    fit inside one opening interval, so nothing is booked across the break.
+    The free seats at each start are mirrored in a max segment tree.
+    """
+
+    def __init__(self, day: str, intervals: List[Tuple[int, int]], capacity: int, policy_version: int = 0):
+        self.day = day
+        self.intervals = intervals
+        self.capacity = capacity
+        self.policy_version = policy_version
+        self.loaded_at = monotonic()
+
+        self.starts: List[int] = [
+            minute
+            for open_at, close_at in intervals
+            for minute in range(open_at, close_at - DINING_MINUTES + 1, SLOT_MINUTES)
+        ]
+        self._base = intervals[0][0] if intervals else 0
+        self._span = -(-DINING_MINUTES // SLOT_MINUTES)
+        last = intervals[-1][1] if intervals else 0
+        self._used = [0] * ((last - self._base) // SLOT_MINUTES + self._span + 1)
+        self._free = _MaxTree([capacity] * len(self.starts))
+
+    def _buckets(self, minute: int) -> range:
+        first = max((minute - self._base) // SLOT_MINUTES, 0)
+        last = min(-(-(minute + DINING_MINUTES - self._base) // SLOT_MINUTES), len(self._used))
+        return range(first, last)
+
+    def is_bookable(self, minute: int) -> bool:
+        return any(open_at <= minute <= close_at - DINING_MINUTES for open_at, close_at in self.intervals)
+
+    def seats_left(self, minute: int) -> int:
+        buckets = self._buckets(minute)
+        return self.capacity - max((self._used[b] for b in buckets), default=0)
+
+    def booked_at(self, minute: int) -> int:
+        """Seats taken in the bucket containing `minute`."""
+        bucket = (minute - self._base) // SLOT_MINUTES
+        return self._used[bucket] if 0 <= bucket < len(self._used) else 0
+
+    def add(self, minute: int, party_size: int) -> None:
+        """Count a party starting at `minute`; a negative size releases seats."""
+        for bucket in self._buckets(minute):
+            self._used[bucket] += party_size
+        # Only starts whose dining window overlaps this party's window change
+        lo = bisect_left(self.starts, minute - DINING_MINUTES + 1)
+        hi = bisect_right(self.starts, minute + DINING_MINUTES - 1)
+        for index in range(lo, hi):
+            self._free.update(index, self.seats_left(self.starts[index]))
+
+    def alternatives(self, minute: int, party_size: int) -> List[int]:
+        """Nearest earlier and later starts with room for the party, nearest first."""
+        index = bisect_left(self.starts, minute)
+        found = []
+        earlier = self._free.last_at_least(index - 1, party_size) if index > 0 else None
+        later = self._free.first_at_least(index, party_size)
+        for candidate in (earlier, later):
+            if candidate is not None and candidate < len(self.starts) and self.starts[candidate] != minute:
+                found.append(self.starts[candidate])
+        return sorted(found, key=lambda start: abs(start - minute))
+
+    def hours_text(self) -> str:
+        return ", ".join(f"{format_time(a)}-{format_time(b)}" for a, b in self.intervals)
+
+
+class AvailabilityEngine:
+    """Worker-wide cache of DayAvailability, loaded per date from the reservations collection."""
+
+    def __init__(self, ttl_seconds: float = DAY_TTL_SECONDS):
+        self._ttl = ttl_seconds
+        self._days: Dict[str, DayAvailability] = {}
+        self._lock = threading.Lock()
+
+    async def day(self, day: str) -> DayAvailability:
+        policies = await get_policy_catalog_async()
+        cached = self._days.get(day)
+        if (cached is not None and cached.policy_version == policies.version
+                and monotonic() - cached.loaded_at < self._ttl):
+            return cached
+
+        availability = DayAvailability(day, opening_intervals(policies, day), seat_capacity(policies), policies.version)
+        reservations = await get_repository().reservations.find(
+            {"date": day, **ACTIVE_FILTER}, {"_id": 0, "time": 1, "party_size": 1}
+        )
+        for reservation in reservations:
+            minute = parse_time(reservation.get("time"))
+            if minute is not None:
+                availability.add(minute, int(reservation.get("party_size") or 0))
+        with self._lock:
+            self._days[day] = availability
+        return availability
+
+    async def check(self, date: str, time: str, party_size: int) -> Dict[str, Any]:
+        """Availability of one slot, with the nearest alternatives when it is not bookable."""
+        day = parse_date(date)
+        minute = parse_time(time)
+        if day is None or minute is None:
+            return {"available": False, "reason": "Could not understand the requested date or time."}
+        error = request_error(day, minute, party_size)
+        if error is not None:
+            return {"date": day, "time": format_time(minute), "party_size": party_size, "available": False, "reason": error}
+
+        availability = await self.day(day)
+        result: Dict[str, Any] = {"date": day, "time": format_time(minute), "party_size": party_size}
+        if not availability.intervals:
+            reason = f"We are closed on {Date.fromisoformat(day).strftime('%A')}, {day}."
+            reopens = (await get_schedule_async()).next_opening(datetime.fromisoformat(day) + timedelta(days=1))
+            if reopens is not None:
+                reason += f" We next open on {reopens.strftime('%A')}, {reopens.date().isoformat()} at {format_time(reopens.hour * 60 + reopens.minute)}."
+            result.update(available=False, reason=reason)
+            return result
+        if party_size > availability.capacity:
+            result.update(available=False, reason="The party is larger than the restaurant can seat; please call us directly.")
+            return result
+
+        if not availability.is_bookable(minute):
+            result.update(
+                available=False,
+                reason=f"Reservations on {day} can start within our opening hours ({availability.hours_text()}) "
+                       f"and must start at least {DINING_MINUTES} minutes before closing or the afternoon break.",
+            )
+        else:
+            seats = availability.seats_left(minute)
+            if seats >= party_size:
+                result.update(available=True, seats_left=seats)
+                return result
+            result.update(available=False, reason="That time is fully booked.")
+
+        result["alternatives"] = [format_time(start) for start in availability.alternatives(minute, party_size)]
+        return result
+
+    def record(self, date: str, time: str, party_size: int) -> Optional[str]:
+        """Reflect a booking in the cached day; returns the validation error instead when it is rejected."""
+        day = parse_date(date)
+        minute = parse_time(time)
+        if day is None or minute is None:
+            return "Could not understand the requested date or time."
+        error = request_error(day, minute, party_size)
+        if error is None:
+            self._add(day, minute, party_size)
+        return error
+
+    def release(self, date: str, time: str, party_size: int) -> None:
+        """Give back the seats of a cancelled or moved booking in the cached day."""
+        day = parse_date(date)
+        minute = parse_time(time)
+        if day is not None and minute is not None and party_size_error(party_size) is None:
+            self._add(day, minute, -party_size)
+
+    def _add(self, day: str, minute: int, party_size: int) -> None:
+        availability = self._days.get(day)
+        if availability is not None:
+            with self._lock:
+                availability.add(minute, party_size)
+
+_engine: Optional[AvailabilityEngine] = None
+
+
+def get_availability_engine() -> AvailabilityEngine:
+    global _engine
+    if _engine is None:
+        _engine = AvailabilityEngine()
+    return _engine
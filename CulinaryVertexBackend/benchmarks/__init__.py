@@ -0,0 +1,2 @@
+# Benchmarks for the backend modules, kept out of the code the agents import.
+# Run from CulinaryVertexBackend: python -m benchmarks.<module>_bench
@@ -0,0 +1,47 @@
+"""Fires parallel bookings at one slot and checks nothing is overbooked and the counters agree."""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from pymongo.database import Database
+
+from booking import SLOTS_COLLECTION, BookingService
+from indexes import INDEXES
+
+
+def run(db: Database, bookings: int = 1000, capacity: int = 40, workers: int = 64) -> None:
+    """Fire `bookings` parallel two-seat bookings (plus retries) at one slot."""
+    for name in ("reservations", SLOTS_COLLECTION):
+        db[name].drop()
+    db["reservations"].create_indexes(INDEXES["reservations"])
+    service = BookingService(db)
+
+    def attempt(n: int) -> str:
+        reservation = {
+            "customer_name": f"Guest {n % (bookings // 2)}",  # every caller is sent twice
+            "contact_number": f"555-{n % (bookings // 2):07d}",
+            "date": "2030-01-01",
+            "time": "19:00",
+            "party_size": 2,
+            "status": "confirmed",
+            "created_at": datetime.now(),
+        }
+        return service.book_sync(reservation, capacity).status
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        statuses = list(pool.map(attempt, range(bookings)))
+
+    booked = statuses.count("booked")
+    seats = sum(doc["party_size"] for doc in db["reservations"].find({"date": "2030-01-01"}))
+    counters = {doc["_id"]: doc["booked"] for doc in db[SLOTS_COLLECTION].find()}
+    print(f"booked={booked} duplicate={statuses.count('duplicate')} full={statuses.count('full')}")
+    print(f"seats on file={seats} capacity={capacity} counters={sorted(set(counters.values()))}")
+    assert seats <= capacity, "overbooked"
+    assert all(value == seats for value in counters.values()), "counters out of step with reservations"
+
+
+
+if __name__ == "__main__":
+    from database import get_db_helper
+
+    # Runs against a scratch database on the configured server, never restaurant_db
+    run(get_db_helper().client["restaurant_db_booking_stress"])
@@ -0,0 +1,14 @@
+"""Per-role instruction sizes and compose time against the current catalogs (needs MongoDB)."""
+from context_composer import ROLE_SLICES, get_context_composer
+
+
+def main() -> None:
+    composer = get_context_composer()
+    for role in ROLE_SLICES:
+        composer.compose(role, f"You are the {role} agent.", "")
+    for role, size in composer.sizes.items():
+        print(f"{role:>12}: {size['chars']:>6.0f} chars, ~{size['tokens']:>5.0f} tokens, {size['ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Per-handoff latency against call length: the previous context copy vs. the ConversationLog delta."""
+import time
+from typing import Any, Dict, List
+
+from conversation_log import CONVERSATION_LOG_MAX_ITEMS, ConversationLog
+
+
+class Item:
+    """The fields of a chat item the log reads."""
+
+    __slots__ = ("id", "type", "role")
+
+    def __init__(self, id: str, role: str):
+        self.id = id
+        self.type = "message"
+        self.role = role
+
+
+def previous_handoff(prev_items: List[Any], own_items: List[Any], limit: int) -> List[Any]:
+    """The handoff ConversationLog replaced: id set over the receiver's context, walk of the sender's."""
+    existing_ids = {item.id for item in own_items}
+    copied: List[Any] = []
+    for item in reversed(prev_items):
+        if not (item.type == "message" and item.role == "system"):
+            copied.append(item)
+        if len(copied) >= limit:
+            break
+    return [item for item in copied[::-1] if item.id not in existing_ids]
+
+
+def main(history_sizes=(100, 1_000, 10_000, 50_000), turns_per_handoff: int = 6, handoffs: int = 200) -> None:
+    """Two agents alternate; before every handoff the active agent adds
+    `turns_per_handoff` items, on top of a history of the given length.
+    """
+    for size in history_sizes:
+        results: Dict[str, float] = {}
+        for label in ("previous", "log"):
+            contexts: Dict[str, List[Any]] = {"A": [], "B": []}
+            log = ConversationLog(max_items=max(size, CONVERSATION_LOG_MAX_ITEMS))
+            counter = 0
+            for n in range(size):
+                contexts["A" if (n // turns_per_handoff) % 2 == 0 else "B"].append(Item(f"warm-{n}", "user"))
+            if label == "log":
+                log.capture("A", contexts["A"])
+                log.capture("B", contexts["B"])
+                log.delta("A")
+                log.delta("B")
+
+            elapsed = 0.0
+            active, other = "A", "B"
+            for _ in range(handoffs):
+                for _ in range(turns_per_handoff):
+                    counter += 1
+                    contexts[active].append(Item(f"turn-{counter}", "user" if counter % 2 else "assistant"))
+                started = time.perf_counter()
+                if label == "previous":
+                    contexts[other].extend(previous_handoff(contexts[active], contexts[other], limit=10))
+                else:
+                    log.capture(active, contexts[active])
+                    contexts[other].extend(log.delta(other, limit=10))
+                    log.mark_captured(other, contexts[other])
+                elapsed += time.perf_counter() - started
+                active, other = other, active
+            results[label] = elapsed / handoffs
+        print(
+            f"{size:>7} items of history: previous {results['previous'] * 1e6:>8.1f} us, "
+            f"log {results['log'] * 1e6:>6.1f} us per handoff"
+        )
+
+
+
+if __name__ == "__main__":
+    main()
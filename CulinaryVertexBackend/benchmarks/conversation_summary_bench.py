@@ -0,0 +1,56 @@
+"""Context handed to the model per turn, with and without the rolling window, and the hot-path cost."""
+import asyncio
+import json
+import time
+from typing import Any, List
+
+from conversation_log import ConversationLog
+from conversation_summary import MenuMentions, RollingSummarizer
+
+
+class Message:
+    """The fields of a chat message the log and the summarizer read."""
+
+    __slots__ = ("id", "type", "role", "text_content")
+
+    def __init__(self, id: str, role: str, text: str):
+        self.id = id
+        self.type = "message"
+        self.role = role
+        self.text_content = text
+
+
+async def main(turns: int = 400, window: int = 10) -> None:
+    names = ["Oysters", "Wagyu Burger", "Sticky Toffee Pudding", "Espresso Martini", "Caesar Salad"]
+    mentions = MenuMentions(names)
+    summarizer = RollingSummarizer(mentions=lambda: mentions)
+    log = ConversationLog(window=window, on_evict=summarizer.submit)
+    context: List[Any] = []
+    full_chars = windowed_chars = 0
+    hot_path = 0.0
+    for n in range(turns):
+        role = "user" if n % 2 == 0 else "assistant"
+        dish = names[n % len(names)]
+        text = (f"Could I get {n % 3 + 1} {dish} for a party of {n % 6 + 2} on June {n % 28 + 1} at 7:30 pm"
+                if role == "user" else f"Of course, I have noted the {dish}. Anything else?")
+        context.append(Message(f"item-{n}", role, text))
+        full_chars += sum(len(item.text_content) for item in context)
+
+        started = time.perf_counter()
+        log.capture("agent", context)
+        hot_path += time.perf_counter() - started
+        await asyncio.sleep(0)  # lets the folding task pick up the queue, as between real turns
+
+        recent = context[-window:]
+        windowed_chars += sum(len(item.text_content) for item in recent) + len(json.dumps(summarizer.as_dict()))
+
+    await summarizer.drain()
+    print(f"{turns} turns, window {window}: {hot_path / turns * 1e6:.1f} us/turn on the hot path (capture and queueing)")
+    print(f"  full history:     {full_chars / turns / 4:>6.0f} tokens/turn on average, {sum(len(i.text_content) for i in context) // 4} at the end")
+    print(f"  window + summary: {windowed_chars / turns / 4:>6.0f} tokens/turn on average")
+    print(f"  summary after {summarizer.summary.turns} folded turns: {json.dumps(summarizer.as_dict())}")
+
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Audio cadence while concurrent tool calls hit a Mongo stand-in with a fixed latency per query."""
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from database import AsyncRepository
+
+
+class _SlowCollection:
+    """Stand-in for a collection on a slow server: every call blocks for `latency` seconds."""
+
+    def __init__(self, latency: float):
+        self._latency = latency
+
+    def find_one(self, *args, **kwargs) -> Dict[str, Any]:
+        time.sleep(self._latency)
+        return {"name": "Oysters"}
+
+
+async def _audio_cadence(
+    calls: int, latency: float, offload: bool, frame_ms: float = 20.0, max_workers: int = 10
+) -> Dict[str, float]:
+    """Lateness of a 20 ms audio-frame callback while `calls` tool calls run concurrently.
+
+    A small pool keeps the calls queued for a while, so many frames fall
+    inside the burst.
+    """
+    collection = _SlowCollection(latency)
+    helper = SimpleNamespace(
+        menu_collection=collection, reservations_collection=collection,
+        orders_collection=collection, policies_collection=collection, db={},
+    )
+    repo = AsyncRepository(helper, max_workers=max_workers)
+    late: List[float] = []
+    done = asyncio.Event()
+
+    async def audio_frames() -> None:
+        interval = frame_ms / 1000
+        expected = time.perf_counter() + interval
+        while not done.is_set():
+            await asyncio.sleep(max(expected - time.perf_counter(), 0))
+            late.append(max(time.perf_counter() - expected, 0.0) * 1000)
+            expected += interval
+
+    async def tool_call() -> Dict[str, Any]:
+        if offload:
+            return await repo.menu.find_one({"name": "Oysters"})
+        return collection.find_one({"name": "Oysters"})  # the previous, blocking call inside async def
+
+    first_frame = time.perf_counter()
+    frames = asyncio.create_task(audio_frames())
+    await asyncio.sleep(frame_ms / 1000 * 3)
+    started = time.perf_counter()
+    await asyncio.gather(*(tool_call() for _ in range(calls)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await frames
+    repo.shutdown()
+    late.sort()
+    return {
+        "calls_ms": elapsed * 1000,
+        "max_late_ms": late[-1],
+        "p99_late_ms": late[min(len(late) - 1, int(len(late) * 0.99))],
+        "frames": len(late),
+        "expected_frames": int((time.perf_counter() - first_frame) * 1000 / frame_ms),
+    }
+
+
+async def main(calls: int = 100, latency: float = 0.1, frame_ms: float = 20.0) -> None:
+    for offload in (False, True):
+        stats = await _audio_cadence(calls, latency, offload, frame_ms)
+        label = "thread pool" if offload else "blocking"
+        print(
+            f"{label:>11}: {calls} calls done in {stats['calls_ms']:.0f} ms, audio frames late by "
+            f"max {stats['max_late_ms']:.1f} ms / p99 {stats['p99_late_ms']:.1f} ms, "
+            f"{stats['frames']} of {stats['expected_frames']} frames delivered"
+        )
+    assert stats["max_late_ms"] < frame_ms, f"audio frames fell behind by {stats['max_late_ms']:.1f} ms"
+
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+import random
+from typing import Any, Dict, List
+
+
+def synthetic_menu(size: int, seed: int = 5) -> List[Dict[str, Any]]:
+    """Menu documents across food and drink categories, some drinks priced by glass and bottle."""
+    rng = random.Random(seed)
+    categories = ["Starters", "Mains", "Pasta", "Dessert", "Sides", "Red Wine", "Cocktails", "Beer"]
+    fragments = ["house-made focaccia", "seasonal vegetables", "chantilly cream", "lemon butter sauce",
+                 "toasted hazelnuts", "aged parmesan", "chili oil", "fresh herbs", "black truffle"]
+    menu = []
+    for n in range(size):
+        category = categories[n % len(categories)]
+        drink = category in ("Red Wine", "Cocktails", "Beer")
+        price: Any = round(rng.uniform(6, 48), 1)
+        if drink and n % 3 == 0:
+            price = {"glass": round(rng.uniform(9, 18)), "bottle": round(rng.uniform(40, 120))}
+        menu.append({
+            "name": f"{category} Dish {n}",
+            "category": category,
+            "menu_type": "Drinks" if drink else ["Lunch", "Dinner"],
+            "price": price,
+            "description": ", ".join(rng.sample(fragments, 3)),
+            "dietary": rng.choice([[], ["Vegetarian"], ["GF"], ["Vegan", "GF"]]),
+        })
+    return menu
+
+
+def dish_menu(size: int, seed: int = 3) -> List[Dict[str, Any]]:
+    """Distinct dish names built from a few hundred restaurant words, with short descriptions."""
+    rng = random.Random(seed)
+    styles = ["Crispy", "Braised", "Smoked", "Roasted", "Seared", "Grilled", "Poached", "Charred", "Glazed", "Cured",
+              "Pickled", "Whipped", "Spiced", "Truffled", "Honeyed", "Blackened", "Confit", "Wild", "Heirloom", "Aged"]
+    bases = ["Duck", "Salmon", "Oysters", "Lamb", "Pork Belly", "Octopus", "Burrata", "Halibut", "Scallops", "Venison",
+             "Risotto", "Gnocchi", "Tagliatelle", "Cauliflower", "Beetroot", "Quail", "Brisket", "Mussels", "Tuna",
+             "Chicken", "Ribeye", "Crab", "Prawns", "Mushrooms", "Carrots", "Pudding", "Tart", "Souffle", "Panna Cotta",
+             "Cheesecake", "Martini", "Negroni", "Spritz", "Old Fashioned", "Pinot Noir", "Riesling", "Cremant"]
+    sides = ["Miso", "Yuzu", "Chimichurri", "Romesco", "Beurre Blanc", "Salsa Verde", "Gremolata", "Harissa", "Dashi",
+             "Brown Butter", "Pistachio", "Hazelnut", "Saffron", "Tamarind", "Elderflower", "Sorrel", "Fennel",
+             "Black Garlic", "Sumac", "Bourbon", "Sherry", "Calvados", "Rhubarb", "Quince", "Blood Orange"]
+    names = set()
+    while len(names) < size:
+        names.add(f"{rng.choice(styles)} {rng.choice(bases)} with {rng.choice(sides)}")
+    return [
+        {"name": name, "description": ", ".join(rng.sample(sides, 2)).lower() + " and seasonal greens"}
+        for name in sorted(names)
+    ]
+
+
+def mistranscribe(name: str, rng: random.Random) -> str:
+    """What speech-to-text tends to make of a dish name: lowercase, dropped words and letters, sound-alikes."""
+    words = name.lower().split()
+    if len(words) > 3 and rng.random() < 0.5:
+        words.remove("with")
+    index = rng.randrange(len(words))
+    word = words[index]
+    for written, heard in (("ph", "f"), ("que", "k"), ("ch", "sh"), ("ll", "l"), ("ck", "k"), ("ou", "o")):
+        if written in word:
+            word = word.replace(written, heard)
+            break
+    else:
+        if len(word) > 4:
+            cut = rng.randrange(1, len(word) - 1)
+            word = word[:cut] + word[cut + 1:]
+    words[index] = word
+    return " ".join(words)
@@ -0,0 +1,40 @@
+"""Event write throughput: one insert_one per event versus the journal's batched insert_many."""
+import time
+from datetime import datetime
+from typing import Any, Dict
+
+from pymongo.database import Database
+
+from journal import EVENTS_COLLECTION, JOURNAL_BATCH_SIZE
+
+
+def run(db: Database, events: int = 20_000, batch_size: int = JOURNAL_BATCH_SIZE) -> None:
+    """Throughput of one insert_one per event versus batched insert_many."""
+    collection = db[EVENTS_COLLECTION]
+
+    def make(n: int) -> Dict[str, Any]:
+        return {"session_id": f"session-{n % 50}", "event": "update_party_size", "data": {"size": n % 8 + 1}, "at": datetime.now()}
+
+    results = {}
+    for label, batch in (("single", 1), ("batched", batch_size)):
+        collection.drop()
+        docs = [make(n) for n in range(events)]
+        started = time.perf_counter()
+        if batch == 1:
+            for doc in docs:
+                collection.insert_one(doc)
+        else:
+            for start in range(0, events, batch):
+                collection.insert_many(docs[start:start + batch], ordered=False)
+        results[label] = events / (time.perf_counter() - started)
+        print(f"{label:>8}: {results[label]:,.0f} events/s")
+    print(f"batched is {results['batched'] / results['single']:.1f}x single writes (batch size {batch_size})")
+    collection.drop()
+
+
+
+if __name__ == "__main__":
+    from database import get_db_helper
+
+    # Runs against a scratch database on the configured server, never restaurant_db
+    run(get_db_helper().client["restaurant_db_journal_benchmark"])
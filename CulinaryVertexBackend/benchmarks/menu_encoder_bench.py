@@ -0,0 +1,25 @@
+"""Tokens and encode time of the menu block per menu size, against the previous JSON rendering."""
+import json
+import time
+
+from benchmarks.fixtures import synthetic_menu
+from menu_encoder import MENU_TOKEN_BUDGET, encode_menu, estimate_tokens
+
+
+def main(sizes=(50, 200, 1_000, 5_000), budget: int = MENU_TOKEN_BUDGET) -> None:
+    for size in sizes:
+        menu = synthetic_menu(size)
+        started = time.perf_counter()
+        encoded = encode_menu(menu, token_budget=budget)
+        elapsed = time.perf_counter() - started
+        unbounded = encode_menu(menu, token_budget=10 ** 9)
+        as_json = estimate_tokens(json.dumps(menu, indent=2))
+        print(
+            f"{size:>6} items: {encoded.tokens:>6} tokens ({len(encoded.included)} listed, "
+            f"{len(encoded.overflow)} tiered out) in {elapsed * 1000:.1f} ms; "
+            f"full dense {unbounded.tokens} tokens, pretty JSON {as_json} tokens"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Build time, lookup latency and accuracy of MenuResolver against a synthetic menu, vs. exact name lookup."""
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.fixtures import dish_menu, mistranscribe
+from menu_resolver import DESCRIPTION_WEIGHT, NAME_WEIGHT, PHONETIC_WEIGHT, MenuResolver, normalize, phonetic_keys, trigrams
+
+
+class PreviousResolver:
+    """The per-item scoring loop MenuResolver replaced, kept to check that rankings match."""
+
+    def __init__(self, items: List[Dict[str, Any]]):
+        self._items = items
+        self._names = [normalize(item.get("name", "")) for item in items]
+        self._name_grams = [trigrams(name) if name else set() for name in self._names]
+        self._name_keys = [phonetic_keys(name) for name in self._names]
+        self._description_grams = [
+            trigrams(normalize(item.get("description", ""))) if item.get("description") else set() for item in items
+        ]
+        self._name_postings: Dict[str, List[int]] = defaultdict(list)
+        self._phonetic_postings: Dict[str, List[int]] = defaultdict(list)
+        for index in range(len(items)):
+            for gram in self._name_grams[index]:
+                self._name_postings[gram].append(index)
+            for key in self._name_keys[index]:
+                self._phonetic_postings[key].append(index)
+
+    def resolve(self, query: str, limit: int = 5, min_score: float = 0.3) -> List[Tuple[Dict[str, Any], float]]:
+        text = normalize(query)
+        if not text:
+            return []
+        query_grams = trigrams(text)
+        name_hits: Counter = Counter()
+        for gram in query_grams:
+            name_hits.update(self._name_postings.get(gram, ()))
+        query_keys = phonetic_keys(text)
+        phonetic_hits: Counter = Counter()
+        for key in query_keys:
+            phonetic_hits.update(self._phonetic_postings.get(key, ()))
+
+        scored = []
+        for index in name_hits.keys() | phonetic_hits.keys():
+            name_score = 2.0 * name_hits.get(index, 0) / (len(query_grams) + len(self._name_grams[index]))
+            key_total = len(query_keys | self._name_keys[index])
+            phonetic_score = phonetic_hits.get(index, 0) / key_total if key_total else 0.0
+            description_score = len(query_grams & self._description_grams[index]) / len(query_grams)
+            score = NAME_WEIGHT * name_score + PHONETIC_WEIGHT * phonetic_score + DESCRIPTION_WEIGHT * description_score
+            if score >= min_score:
+                scored.append((score, index))
+        scored.sort(key=lambda pair: (-pair[0], pair[1]))
+        return [(self._items[index], round(score, 3)) for score, index in scored[:limit]]
+
+
+def main(size: int = 10_000, queries: int = 2_000, seed: int = 5) -> None:
+    rng = random.Random(seed)
+    menu = dish_menu(size)
+    started = time.perf_counter()
+    resolver = MenuResolver(menu)
+    build = time.perf_counter() - started
+    previous = PreviousResolver(menu)
+
+    exact = {item["name"] for item in menu}
+    targets = [rng.choice(menu)["name"] for _ in range(queries)]
+    spoken = [mistranscribe(name, rng) for name in targets]
+
+    timings: List[float] = []
+    top1 = top5 = exact_hits = agree = 0
+    for name, query in zip(targets, spoken):
+        started = time.perf_counter()
+        ranked = resolver.resolve(query, limit=5)
+        timings.append(time.perf_counter() - started)
+        names = [item["name"] for item, _ in ranked]
+        top1 += bool(names) and names[0] == name
+        top5 += name in names
+        exact_hits += query in exact
+        agree += ranked == previous.resolve(query, limit=5)
+    started = time.perf_counter()
+    for query in spoken[:200]:
+        previous.resolve(query, limit=5)
+    previous_ms = (time.perf_counter() - started) / 200 * 1000
+    timings.sort()
+    p50, p99 = timings[len(timings) // 2] * 1000, timings[int(len(timings) * 0.99)] * 1000
+    print(f"{size} items indexed in {build * 1000:.0f} ms")
+    print(f"{queries} mistranscribed lookups: p50 {p50:.3f} ms, p99 {p99:.3f} ms (per-item scoring loop: {previous_ms:.3f} ms mean)")
+    print(f"top-1 {top1 / queries:.1%}, top-5 {top5 / queries:.1%}; exact name lookup finds {exact_hits / queries:.1%}")
+    print(f"same ranking and scores as the per-item scoring loop for {agree / queries:.1%} of lookups")
+    assert agree == queries, "vectorized scoring disagrees with the per-item scoring loop"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Price synthetic baskets drawn from a synthetic menu with variants and add-ons."""
+import random
+import time
+
+from pricing import PriceTable
+
+
+def main(basket_count: int = 100_000, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    menu = []
+    for index in range(500):
+        item = {"name": f"Item {index}", "price": round(rng.uniform(4, 60), 2)}
+        if index % 3 == 0:
+            item["price"] = {"full": round(rng.uniform(15, 60), 2), "side": round(rng.uniform(5, 15), 2)}
+        if index % 4 == 0:
+            item["add_ons"] = [{"name": f"Extra {n}", "price": n + 1.5} for n in range(3)]
+        menu.append(item)
+
+    started = time.perf_counter()
+    table = PriceTable(menu)
+    compiled = time.perf_counter() - started
+
+    baskets = []
+    for _ in range(basket_count):
+        basket = []
+        for item in rng.sample(menu, rng.randint(1, 6)):
+            line = {"item_name": item["name"], "quantity": rng.randint(1, 3)}
+            if isinstance(item["price"], dict):
+                line["variant"] = rng.choice(list(item["price"]))
+            if item.get("add_ons") and rng.random() < 0.5:
+                line["add_ons"] = ["Extra 0"]
+            basket.append(line)
+        baskets.append(basket)
+
+    started = time.perf_counter()
+    result = table.price_baskets(baskets, service_charge_rate=0.20)
+    elapsed = time.perf_counter() - started
+
+    lines = sum(len(basket) for basket in baskets)
+    print(f"compiled {len(menu)} items in {compiled * 1000:.1f} ms")
+    print(f"priced {basket_count} baskets ({lines} lines) in {elapsed * 1000:.1f} ms "
+          f"({elapsed / basket_count * 1e6:.2f} us/basket), grand total ${result[:, 2].sum():,.2f}")
+
+
+
+if __name__ == "__main__":
+    main()
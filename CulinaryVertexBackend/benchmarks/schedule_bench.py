@@ -0,0 +1,41 @@
+"""Build time and per-query cost of is_open / next_opening against scanning regularHours."""
+import time
+from datetime import datetime, timedelta
+
+from schedule import DAY_MINUTES, WEEKDAYS, WeeklySchedule, entry_intervals
+
+
+def main(queries: int = 100_000) -> None:
+    hours = {"regularHours": [
+        {"dayOfWeek": day, "openTime": "11:00", "closeTime": "23:00" if day in ("Friday", "Saturday") else "22:00",
+         "breakStart": "15:30", "breakEnd": "16:30"}
+        for day in WEEKDAYS
+    ], "holidayHours": [{"date": "2025-12-25", "closed": True}]}
+
+    started = time.perf_counter()
+    schedule = WeeklySchedule(hours)
+    build = time.perf_counter() - started
+
+    base = datetime(2025, 12, 1)
+    moments = [base + timedelta(minutes=(n * 37) % (14 * DAY_MINUTES)) for n in range(queries)]
+
+    def scan(at: datetime) -> bool:
+        day = at.strftime("%A")
+        for entry in hours["regularHours"]:
+            if entry["dayOfWeek"] == day:
+                minute = at.hour * 60 + at.minute
+                return any(a <= minute < b for a, b in entry_intervals(entry))
+        return False
+
+    for label, fn in (("scan regularHours", scan), ("is_open", schedule.is_open), ("next_opening", schedule.next_opening)):
+        started = time.perf_counter()
+        for at in moments:
+            fn(at)
+        elapsed = time.perf_counter() - started
+        print(f"{label:>18}: {elapsed / queries * 1e6:.2f} us/query")
+    print(f"schedule built in {build * 1000:.1f} ms")
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Name and phone lookup latency on reservations as the collection grows."""
+import random
+import time
+
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+
+from search_keys import NAME_KEY, PHONE_KEY, name_filter, phone_filter, with_search_keys
+
+
+def run(collection: Collection, sizes=(1_000, 10_000, 100_000, 1_000_000), lookups: int = 200) -> None:
+    """Lookup latency against a scratch collection as it grows."""
+    rng = random.Random(11)
+    first = ["john", "joanna", "maria", "jose", "li", "amir", "chloe", "sven", "ngozi", "kenji"]
+    last = ["smith", "garcia", "o neil", "nguyen", "muller", "okafor", "tanaka", "rossi", "kowalski", "dubois"]
+    collection.drop()
+    collection.create_index([(NAME_KEY, ASCENDING), ("date", ASCENDING)])
+    collection.create_index([(PHONE_KEY, ASCENDING), ("date", ASCENDING)])
+
+    inserted = 0
+    for size in sizes:
+        docs = []
+        for n in range(inserted, size):
+            name = f"{rng.choice(first).title()} {rng.choice(last).title()} {n}"
+            docs.append(with_search_keys({
+                "customer_name": name,
+                "contact_number": f"555-{n // 10000 % 1000:03d}-{n % 10000:04d}",
+                "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            }))
+            if len(docs) >= 10_000:
+                collection.insert_many(docs, ordered=False)
+                docs = []
+        if docs:
+            collection.insert_many(docs, ordered=False)
+        inserted = size
+
+        started = time.perf_counter()
+        for _ in range(lookups):
+            n = rng.randrange(size)
+            list(collection.find(name_filter(f"{rng.choice(first)} {str(n)[:3]}"), {"_id": 1}).limit(20))
+            list(collection.find(phone_filter(f"(555) {n // 10000 % 1000:03d} {n % 10000:04d}"), {"_id": 1}).limit(20))
+        elapsed = (time.perf_counter() - started) / (2 * lookups)
+        print(f"{size:>9,} reservations: {elapsed * 1000:.2f} ms per lookup")
+
+    collection.drop()
+
+
+
+if __name__ == "__main__":
+    from database import get_db_helper
+
+    # A scratch collection on the configured server; it is dropped afterwards
+    run(get_db_helper().db["reservations_search_benchmark"])
@@ -0,0 +1,56 @@
+"""Encode synthetic search_orders results with the previous json.dumps path and with serialization."""
+import copy
+import json
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+
+from bson import ObjectId
+
+from serialization import TOOL_RESULT_MAX_BYTES, dumps, encode
+
+
+def stdlib_dumps(value: Any) -> str:
+    """The previous path: stringify `_id` by hand, then json.dumps with str() for the rest."""
+    for doc in value:
+        doc["_id"] = str(doc["_id"])
+    return json.dumps(value, default=str)
+
+
+def main(results: int = 1_000, rounds: int = 200) -> None:
+    docs = [
+        {
+            "_id": ObjectId(),
+            "customer_name": f"Guest {n}",
+            "items": [
+                {"item_name": "Oysters", "variant": "Half Dozen", "add_ons": [], "quantity": 2, "price": 18.0},
+                {"item_name": "Sticky Toffee Pudding", "variant": None, "add_ons": ["Cream"], "quantity": 1, "price": 9.5},
+            ],
+            "subtotal": 45.5,
+            "service_charge": Decimal("9.10"),
+            "total_price": 54.6,
+            "status": "pending",
+            "created_at": datetime.now(),
+            "updated_at": datetime.now(),
+        }
+        for n in range(results)
+    ]
+    copies = [copy.deepcopy(docs) for _ in range(rounds)]
+
+    started = time.perf_counter()
+    for batch in copies:
+        stdlib_dumps(batch)
+    stdlib = (time.perf_counter() - started) / rounds
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        encode(docs)
+    fast = (time.perf_counter() - started) / rounds
+
+    print(f"{results} orders: json.dumps {stdlib * 1000:.2f} ms, orjson {fast * 1000:.2f} ms ({stdlib / fast:.1f}x)")
+    print(f"capped at {TOOL_RESULT_MAX_BYTES} bytes: {len(dumps(docs))} bytes returned")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Prompt tokens over simulated turns: the seeded menu snapshot vs. re-injecting the menu every turn."""
+import asyncio
+import json
+import time
+
+from livekit.agents import llm
+
+from benchmarks.fixtures import synthetic_menu
+from menu_catalog import MenuCatalog
+from menu_encoder import estimate_tokens
+from Voice_pipeline import MENU_CONTEXT_HEADER, MenuContextSeeder
+
+
+def _context_tokens(chat_ctx: llm.ChatContext) -> int:
+    return sum(estimate_tokens(message.content) for message in chat_ctx.messages if isinstance(message.content, str))
+
+
+async def main(turns: int = 50, menu_size: int = 200) -> None:
+    """Both contexts get the same conversation; whatever the menu adds on top
+    of it must stay flat with the seeder, across a menu version swap half way.
+    """
+    catalog = {"current": MenuCatalog(synthetic_menu(menu_size), version=1)}
+
+    async def load_catalog():
+        return catalog["current"]
+
+    seeder = MenuContextSeeder(load_catalog)
+    seeded = llm.ChatContext().append(text="System instructions", role="system")
+    previous = llm.ChatContext().append(text="System instructions", role="system")
+    conversation = llm.ChatContext().append(text="System instructions", role="system")
+    menu_tokens = []
+    seeding = 0.0
+    for turn in range(turns):
+        if turn == turns // 2:
+            catalog["current"] = MenuCatalog(synthetic_menu(menu_size, seed=6), version=2)
+        for chat_ctx in (seeded, previous, conversation):
+            chat_ctx.append(text=f"Turn {turn}: could you recommend something from the menu?", role="user")
+
+        started = time.perf_counter()
+        await seeder.refresh()
+        seeder.seed(seeded)
+        seeding += time.perf_counter() - started
+        # The previous before_llm_cb: re-query, re-serialize and append every turn
+        previous.append(text=json.dumps(catalog["current"].items, indent=2), role="assistant")
+
+        menu_tokens.append(_context_tokens(seeded) - _context_tokens(conversation))
+        if turn in (0, turns // 2 - 1, turns - 1):
+            print(
+                f"turn {turn + 1:>3}: seeded {_context_tokens(seeded):>7} tokens (menu {menu_tokens[-1]}), "
+                f"re-injected {_context_tokens(previous):>7} tokens"
+            )
+
+    snapshots = [m for m in seeded.messages if isinstance(m.content, str) and m.content.startswith(MENU_CONTEXT_HEADER)]
+    assert len(snapshots) == 1, f"{len(snapshots)} menu snapshots in the seeded context"
+    half = turns // 2
+    assert len(set(menu_tokens[:half])) == 1 and len(set(menu_tokens[half:])) == 1, f"menu tokens grew: {menu_tokens}"
+    print(f"menu tokens flat over {turns} turns ({menu_tokens[0]} -> {menu_tokens[-1]} after the version swap), "
+          f"{seeding / turns * 1000:.2f} ms per turn in before_llm_cb")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+"""Entrypoint setup time with and without the worker prewarm hook.
+
+This is not dispatch to first audio: room connection, the LLM and TTS are
+left out, as they cost the same either way. It times the shared state an
+entrypoint reads before starting its agent (repository, menu and policy
+snapshots, prompt fragments, VAD). The first job builds that state inside
+the entrypoint, as a worker's first call did before prewarm existed; later
+jobs find it already loaded.
+
+Needs what a real worker needs: MONGO_DB_URL, and silero for VAD.
+"""
+import logging
+import time
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from database import get_repository
+from menu_catalog import get_menu_catalog
+from prompt_cache import get_prompt_fragments
+from snapshot_watcher import start_snapshot_watcher
+from worker import prewarm
+
+
+def entrypoint_setup_ms(proc: Any, setup: Callable[[], None]) -> float:
+    """`setup`, then the reads an entrypoint does before `agent.start()`."""
+    started = time.perf_counter()
+    setup()
+    get_repository()
+    start_snapshot_watcher()
+    get_menu_catalog()
+    proc.userdata.get("prompt_fragments") or get_prompt_fragments()
+    proc.userdata.get("vad")
+    return (time.perf_counter() - started) * 1000
+
+
+def main(jobs: int = 5) -> None:
+    proc = SimpleNamespace(userdata={})
+    cold = entrypoint_setup_ms(proc, lambda: prewarm(proc))
+    warm = sorted(entrypoint_setup_ms(proc, lambda: None) for _ in range(jobs))
+    median = warm[len(warm) // 2]
+    print(f"entrypoint setup without prewarm: {cold:.0f} ms")
+    print(f"entrypoint setup after prewarm: {median * 1000:.1f} us median over {jobs} jobs")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
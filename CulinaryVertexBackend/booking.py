@@ -0,0 +1,329 @@
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from availability import (
+    DINING_MINUTES,
+    SLOT_MINUTES,
+    format_time,
+    get_availability_engine,
+    parse_date,
+    parse_time,
+    party_size_error,
+    request_error,
+    seat_capacity,
+)
+from database import get_repository
+from policy_catalog import get_policy_catalog_async
+from search_keys import name_tokens, phone_digits, search_keys, with_search_keys
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+# One counter document per date and SLOT_MINUTES bucket: {"_id": "2025-06-14T19:00", "date", "booked"}
+SLOTS_COLLECTION = "reservation_slots"
+IDEMPOTENCY_KEY = "idempotency_key"
+# Reservation fields that decide which seats it holds
+SLOT_FIELDS = ("date", "time", "party_size")
+
+
+def idempotency_key(name: str, phone: str, date: str, time: str, party_size: int) -> str:
+    """Same caller, slot and party size -> same key, so a retried tool call books once."""
+    parts = [" ".join(name_tokens(name)), phone_digits(phone), date, time, str(party_size)]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def slot_ids(date: str, time: str) -> List[str]:
+    """Counter ids of every bucket a party starting at `time` occupies."""
+    minute = parse_time(time)
+    first = minute - minute % SLOT_MINUTES
+    return [f"{date}T{format_time(m)}" for m in range(first, minute + DINING_MINUTES, SLOT_MINUTES)]
+
+
+def _check_party_size(party_size: Any) -> None:
+    error = party_size_error(party_size)
+    if error is not None:
+        raise ValueError(f"{error} Got {party_size!r}.")
+
+
+def seat_changes(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, int]:
+    """Per-bucket seat difference between two (date, time, party_size) bookings."""
+    seats: Dict[str, int] = {}
+    for booking, sign in ((before, -1), (after, 1)):
+        _check_party_size(booking["party_size"])
+        for slot in slot_ids(booking["date"], booking["time"]):
+            seats[slot] = seats.get(slot, 0) + sign * int(booking["party_size"])
+    return {slot: count for slot, count in seats.items() if count}
+
+
+@dataclass
+class BookingResult:
+    # "booked", "duplicate" (an earlier identical call already booked it), "full" or
+    # "unavailable" (rejected before any seat was taken, see `reason`); modify also returns "updated", "not_found", "unavailable" and "conflict" (edited concurrently)
+    status: str
+    reservation_id: Optional[str] = None
+    reservation: Dict[str, Any] = field(default_factory=dict)
+    reason: Optional[str] = None
+
+
+class SlotCounters:
+    """Per-bucket seat counters, claimed with conditional `$inc` updates.
+
+    Every bucket is claimed with `find_one_and_update` filtered on
+    `booked <= capacity - party_size`, so two callers can never both take
+    the last seats. When a later bucket is full, the buckets already taken
+    are given back before returning. Counts below one raise ValueError: a
+    zero or negative `$inc` would pass the filter and free other parties' seats.
+    """
+
+    def __init__(self, db: Database):
+        self.collection = db[SLOTS_COLLECTION]
+
+    def _ensure(self, ids: List[str], initial: Dict[str, int]) -> None:
+        requests = [
+            UpdateOne(
+                {"_id": slot},
+                {"$setOnInsert": {"date": slot.partition("T")[0], "booked": initial.get(slot, 0)}},
+                upsert=True,
+            )
+            for slot in ids
+        ]
+        try:
+            self.collection.bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            # Concurrent upserts of the same new bucket: the loser's duplicate key is harmless
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+
+    def claim(self, date: str, time: str, party_size: int, capacity: int, initial: Optional[Dict[str, int]] = None) -> bool:
+        _check_party_size(party_size)
+        return self.claim_seats(dict.fromkeys(slot_ids(date, time), party_size), capacity, initial)
+
+    def claim_seats(self, seats: Dict[str, int], capacity: int, initial: Optional[Dict[str, int]] = None) -> bool:
+        """Take `seats[slot]` seats in every bucket, all or nothing."""
+        if not seats:
+            return True
+        for count in seats.values():
+            _check_party_size(count)
+        self._ensure(list(seats), initial or {})
+        claimed: Dict[str, int] = {}
+        for slot, count in seats.items():
+            counter = self.collection.find_one_and_update(
+                {"_id": slot, "booked": {"$lte": capacity - count}},
+                {"$inc": {"booked": count}},
+            )
+            if counter is None:
+                self.release_seats(claimed)
+                return False
+            claimed[slot] = count
+        return True
+
+    def release(self, date: str, time: str, party_size: int) -> None:
+        self.release_seats(dict.fromkeys(slot_ids(date, time), party_size))
+
+    def release_seats(self, seats: Dict[str, int]) -> None:
+        by_count: Dict[int, List[str]] = {}
+        for slot, count in seats.items():
+            by_count.setdefault(count, []).append(slot)
+        for count, ids in by_count.items():
+            self.collection.update_many({"_id": {"$in": ids}}, {"$inc": {"booked": -count}})
+
+
+class BookingService:
+    """Race-free, idempotent reservation booking shared by every agent."""
+
+    def __init__(self, db: Optional[Database] = None):
+        self._db = db
+
+    @property
+    def db(self) -> Database:
+        return self._db if self._db is not None else get_repository().db_helper.db
+
+    def book_sync(self, reservation: Dict[str, Any], capacity: int, initial: Optional[Dict[str, int]] = None) -> BookingResult:
+        """Claim seats for `reservation` (normalized "date"/"time") and insert it.
+
+        The idempotency key is stored on the reservation behind a unique
+        index; a repeated call returns the first booking untouched.
+        """
+        error = party_size_error(reservation.get("party_size"))
+        if error is not None:
+            return BookingResult("unavailable", reservation=reservation, reason=error)
+        reservations = self.db["reservations"]
+        key = reservation.setdefault(IDEMPOTENCY_KEY, idempotency_key(
+            reservation.get("customer_name", ""),
+            reservation.get("contact_number") or reservation.get("customer_phone", ""),
+            reservation["date"],
+            reservation["time"],
+            reservation["party_size"],
+        ))
+
+        existing = reservations.find_one({IDEMPOTENCY_KEY: key})
+        if existing is not None:
+            return BookingResult("duplicate", str(existing["_id"]), existing)
+
+        counters = SlotCounters(self.db)
+        if not counters.claim(reservation["date"], reservation["time"], reservation["party_size"], capacity, initial):
+            return BookingResult("full", reservation=reservation)
+
+        try:
+            result = reservations.insert_one(with_search_keys(reservation))
+        except DuplicateKeyError:
+            # The same request raced us between the lookup and the insert
+            counters.release(reservation["date"], reservation["time"], reservation["party_size"])
+            existing = reservations.find_one({IDEMPOTENCY_KEY: key})
+            return BookingResult("duplicate", str(existing["_id"]) if existing else None, existing or reservation)
+        except Exception:
+            counters.release(reservation["date"], reservation["time"], reservation["party_size"])
+            raise
+        return BookingResult("booked", str(result.inserted_id), reservation)
+
+    async def book(self, reservation: Dict[str, Any]) -> BookingResult:
+        """Async entry point for tools; also keeps the availability cache in step."""
+        engine = get_availability_engine()
+        policies = await get_policy_catalog_async()
+        # Counters created for the first time start from the reservations already on file
+        day = await engine.day(reservation["date"])
+        initial = {slot: day.booked_at(parse_time(slot[len(reservation["date"]) + 1:]))
+                   for slot in slot_ids(reservation["date"], reservation["time"])}
+
+        result = await get_repository().run(self.book_sync, reservation, seat_capacity(policies), initial)
+        if result.status == "booked":
+            engine.record(reservation["date"], reservation["time"], reservation["party_size"])
+        return result
+
+    def modify_sync(
+        self,
+        current: Dict[str, Any],
+        fields: Dict[str, Any],
+        seats: Dict[str, int],
+        capacity: int,
+        initial: Optional[Dict[str, int]] = None,
+    ) -> BookingResult:
+        """Move `current` to the slot in `fields`, given the per-bucket `seats` difference.
+
+        Extra seats are claimed before the reservation is touched; the update
+        is filtered on the slot the reservation was read with, so an edit that
+        raced us is never overwritten. Seats no longer needed are given back last.
+        """
+        error = party_size_error(fields.get("party_size", current.get("party_size")))
+        if error is not None:
+            return BookingResult("unavailable", str(current["_id"]), current, error)
+        counters = SlotCounters(self.db)
+        gained = {slot: count for slot, count in seats.items() if count > 0}
+        freed = {slot: -count for slot, count in seats.items() if count < 0}
+        reservation_id = str(current["_id"])
+        if not counters.claim_seats(gained, capacity, initial):
+            return BookingResult("full", reservation_id, current)
+
+        guard = {"_id": current["_id"], **{name: current.get(name) for name in SLOT_FIELDS}}
+        try:
+            updated = self.db["reservations"].find_one_and_update(
+                guard, {"$set": fields}, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # The new idempotency key belongs to another booking of the same caller
+            counters.release_seats(gained)
+            return BookingResult(
+                "unavailable", reservation_id, current,
+                "There is already a reservation under this name for that date, time and party size.",
+            )
+        except Exception:
+            counters.release_seats(gained)
+            raise
+        if updated is None:
+            counters.release_seats(gained)
+            return BookingResult("conflict", reservation_id, current)
+        counters.release_seats(freed)
+        return BookingResult("updated", reservation_id, updated)
+
+    async def modify(self, reservation_id: str, changes: Dict[str, Any]) -> BookingResult:
+        """Apply tool-supplied changes to a reservation in as few round trips as possible.
+
+        Name and phone edits are one `find_one_and_update` returning the new
+        document. A new date, time or party size also needs the stored slot,
+        so the reservation is read first and its seats moved by `modify_sync`.
+        The idempotency key follows the edit: it is recomputed for the new
+        slot, and dropped on a name or phone edit, which is not read first,
+        so booking the original details again is not taken for a retry.
+        """
+        repo = get_repository()
+        _id = ObjectId(reservation_id)
+        fields = {
+            **changes,
+            **search_keys(changes.get("customer_name"), changes.get("contact_number")),
+            "updated_at": datetime.now(),
+        }
+        if not any(name in changes for name in SLOT_FIELDS):
+            update: Dict[str, Any] = {"$set": fields}
+            if "customer_name" in changes or "contact_number" in changes:
+                update["$unset"] = {IDEMPOTENCY_KEY: ""}
+            updated = await repo.reservations.find_one_and_update(
+                {"_id": _id}, update, return_document=ReturnDocument.AFTER
+            )
+            if updated is None:
+                return BookingResult("not_found", reservation_id)
+            return BookingResult("updated", reservation_id, updated)
+
+        current = await repo.reservations.find_one({"_id": _id})
+        if current is None:
+            return BookingResult("not_found", reservation_id)
+
+        day = parse_date(changes.get("date", current["date"]))
+        minute = parse_time(changes.get("time", current["time"]))
+        if day is None or minute is None:
+            return BookingResult("unavailable", reservation_id, current, "Could not understand the requested date or time.")
+        party_size = changes.get("party_size", current["party_size"])
+        error = request_error(day, minute, party_size)
+        if error is not None:
+            return BookingResult("unavailable", reservation_id, current, error)
+        fields.update(date=day, time=format_time(minute), party_size=party_size)
+        fields[IDEMPOTENCY_KEY] = idempotency_key(
+            changes.get("customer_name", current.get("customer_name", "")),
+            changes.get("contact_number") or current.get("contact_number") or current.get("customer_phone", ""),
+            day,
+            fields["time"],
+            fields["party_size"],
+        )
+
+        engine = get_availability_engine()
+        policies = await get_policy_catalog_async()
+        availability = await engine.day(day)
+        if not availability.is_bookable(minute):
+            hours = availability.hours_text() or "closed"
+            return BookingResult(
+                "unavailable", reservation_id, current,
+                f"Reservations on {day} must start within our opening hours ({hours}) "
+                f"at least {DINING_MINUTES} minutes before closing.",
+            )
+
+        held = current.get("status") != "cancelled"
+        seats = seat_changes(current, fields) if held else {}
+        initial = {slot: availability.booked_at(parse_time(slot[len(day) + 1:]))
+                   for slot in seats if slot.startswith(day)}
+        result = await repo.run(self.modify_sync, current, fields, seats, seat_capacity(policies), initial)
+        if result.status == "updated" and held:
+            engine.release(current["date"], current["time"], int(current["party_size"]))
+            engine.record(day, fields["time"], fields["party_size"])
+        return result
+
+    async def release(self, date: str, time: str, party_size: int) -> None:
+        await get_repository().run(SlotCounters(self.db).release, date, time, party_size)
+        get_availability_engine().release(date, time, party_size)
+
+
+_service: Optional[BookingService] = None
+
+
+def get_booking_service() -> BookingService:
+    global _service
+    if _service is None:
+        _service = BookingService()
+    return _service
+
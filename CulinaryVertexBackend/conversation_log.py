@@ -0,0 +1,118 @@
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+# Items kept per call; older ones are dropped in chunks once the log holds twice this many
+CONVERSATION_LOG_MAX_ITEMS = int(os.getenv("CONVERSATION_LOG_MAX_ITEMS", "500"))
+
+_FUNCTION_ITEMS = ("function_call", "function_call_output")
+
+
+class ConversationLog:
+    """Append-only log of one call's chat items, shared by its agents.
+
+    Each agent has two cursors: how much of its own chat context has been
+    captured into the log, and how much of the log it has been handed.
+    `capture` reads only the items an agent added since its last capture
+    and `delta` returns only log entries the receiving agent has not seen,
+    so a handoff costs the size of the delta, not of the whole history.
+    Items (anything with `id`, `type` and, for messages, `role`) are
+    de-duplicated by id, which keeps copies handed between agents from
+    being logged twice.
+
+    With `on_evict`, every entry is passed to it once, in order, as soon
+    as `window` newer entries have been logged (the rolling summarizer
+    folds them), and only entries already passed on are trimmed.
+    """
+
+    def __init__(
+        self,
+        max_items: int = CONVERSATION_LOG_MAX_ITEMS,
+        window: int = 10,
+        on_evict: Optional[Callable[[List[Any]], None]] = None,
+    ):
+        self._max_items = max(max_items, window)
+        self._window = window
+        self._on_evict = on_evict
+        self._evicted = 0  # log position up to which entries were passed to on_evict
+        self._entries: List[Tuple[str, Any]] = []  # (author agent, item)
+        self._start = 0  # log position of _entries[0]
+        self._positions: Dict[str, int] = {}
+        self._captured: Dict[str, int] = {}
+        self._cursors: Dict[str, int] = {}
+
+    @property
+    def end(self) -> int:
+        """Log position after the newest entry."""
+        return self._start + len(self._entries)
+
+    def capture(self, agent: str, items: Sequence[Any]) -> int:
+        """Log the items `agent` added to its context since the last capture; returns how many were new."""
+        seen = self._captured.get(agent, 0)
+        if seen > len(items):
+            seen = 0  # the context was truncated or replaced; ids keep the rescan from duplicating
+        added = 0
+        for item in items[seen:]:
+            if item.id not in self._positions:
+                self._positions[item.id] = self.end
+                self._entries.append((agent, item))
+                added += 1
+        self._captured[agent] = len(items)
+        self._evict()
+        self._trim()
+        return added
+
+    def mark_captured(self, agent: str, items: Sequence[Any]) -> None:
+        """Record that `agent`'s context already holds `items`, such as a delta it was just handed."""
+        self._captured[agent] = len(items)
+
+    def delta(self, agent: str, limit: int = 10, keep_function_call: bool = True) -> List[Any]:
+        """The newest `limit` items `agent` has not been handed yet, oldest first.
+
+        Skips the agent's own items and system messages, and function calls
+        unless `keep_function_call`; the result never starts with a
+        function call or output.
+        """
+        cursor = max(self._cursors.get(agent, self._start), self._start)
+        self._cursors[agent] = self.end
+
+        items: List[Any] = []
+        for author, item in reversed(self._entries[cursor - self._start:]):
+            if author == agent:
+                continue
+            if item.type == "message" and item.role == "system":
+                continue
+            if not keep_function_call and item.type in _FUNCTION_ITEMS:
+                continue
+            items.append(item)
+            if len(items) >= limit:
+                break
+        items.reverse()
+
+        start = 0
+        while start < len(items) and items[start].type in _FUNCTION_ITEMS:
+            start += 1
+        return items[start:]
+
+    def _evict(self) -> None:
+        upto = self.end - self._window
+        if self._on_evict is None or upto <= self._evicted:
+            return
+        evicted = [item for _, item in self._entries[self._evicted - self._start:upto - self._start]]
+        self._evicted = upto
+        self._on_evict(evicted)
+
+    def _trim(self) -> None:
+        if len(self._entries) <= 2 * self._max_items:
+            return
+        drop = len(self._entries) - self._max_items
+        if self._on_evict is not None:
+            drop = min(drop, self._evicted - self._start)
+        for _, item in self._entries[:drop]:
+            self._positions.pop(item.id, None)
+        del self._entries[:drop]
+        self._start += drop
+
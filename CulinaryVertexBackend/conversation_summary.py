@@ -0,0 +1,214 @@
+import asyncio
+import copy
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from menu_catalog import get_menu_catalog
+from menu_resolver import normalize
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+# Bounds of the structured summary; older entries are forgotten first
+SUMMARY_MAX_REQUESTS = int(os.getenv("SUMMARY_MAX_REQUESTS", "6"))
+SUMMARY_MAX_MENTIONS = int(os.getenv("SUMMARY_MAX_MENTIONS", "12"))
+SUMMARY_MAX_ACTIONS = int(os.getenv("SUMMARY_MAX_ACTIONS", "8"))
+SUMMARY_TEXT_CHARS = 160
+# Items an agent's context may grow past its window before it is compacted
+COMPACT_SLACK_ITEMS = int(os.getenv("CONVERSATION_COMPACT_SLACK", "8"))
+
+_MONTHS = "january|february|march|april|may|june|july|august|september|october|november|december"
+_DATE = re.compile(
+    rf"\b(\d{{4}}-\d{{2}}-\d{{2}}|(?:{_MONTHS})\s+\d{{1,2}}(?:st|nd|rd|th)?|\d{{1,2}}(?:st|nd|rd|th)?\s+of\s+(?:{_MONTHS})"
+    r"|today|tomorrow|tonight|(?:this|next)\s+(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|week(?:end)?)"
+    r"|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b",
+    re.IGNORECASE,
+)
+_TIME = re.compile(r"\b(\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.)|\d{1,2}:\d{2}|noon|midnight)", re.IGNORECASE)
+# A bare "for 7" is left out: "for 7:30" and "for 8 pm" are times, not party sizes
+_PARTY = re.compile(
+    r"\b(?:party of|table for)\s+(\d{1,2})\b(?!\s*(?::\d|[ap]\.?m\b|o'?clock))"
+    r"|\b(\d{1,2})\s+(?:people|guests|persons|of us)\b",
+    re.IGNORECASE,
+)
+_MAX_NAME_WORDS = 6
+
+
+def _remember(values: List[Any], value: Any, limit: int) -> None:
+    """Move `value` to the newest end of a bounded, duplicate-free list."""
+    if value in values:
+        values.remove(value)
+    values.append(value)
+    del values[:-limit]
+
+
+def _clip(text: str, limit: int = SUMMARY_TEXT_CHARS) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def item_text(item: Any) -> str:
+    """Plain text of a chat message, whatever shape its content takes."""
+    text = getattr(item, "text_content", None)
+    if isinstance(text, str):
+        return text
+    content = getattr(item, "content", None)
+    if isinstance(content, str):
+        return content
+    return " ".join(part for part in content or [] if isinstance(part, str))
+
+
+class MenuMentions:
+    """Finds menu item names in free text by matching word n-grams against normalized names."""
+
+    def __init__(self, names: List[str]):
+        self._names: Dict[str, str] = {}
+        for name in names:
+            key = normalize(name)
+            if key:
+                self._names.setdefault(key, name)
+        self._longest = min(max((key.count(" ") + 1 for key in self._names), default=0), _MAX_NAME_WORDS)
+
+    def find(self, text: str) -> List[str]:
+        words = normalize(text).split()
+        found: List[str] = []
+        for start in range(len(words)):
+            for size in range(min(self._longest, len(words) - start), 0, -1):
+                name = self._names.get(" ".join(words[start:start + size]))
+                if name is not None:
+                    if name not in found:
+                        found.append(name)
+                    break
+        return found
+
+
+@dataclass
+class ConversationSummary:
+    """Bounded, structured digest of the turns that no longer fit an agent's context."""
+
+    turns: int = 0
+    items_mentioned: List[str] = field(default_factory=list)
+    dates_mentioned: List[str] = field(default_factory=list)
+    times_mentioned: List[str] = field(default_factory=list)
+    party_sizes: List[int] = field(default_factory=list)
+    customer_requests: List[str] = field(default_factory=list)
+    actions: List[str] = field(default_factory=list)
+
+    def fold(self, items: List[Any], mentions: Optional[MenuMentions] = None) -> None:
+        """Merge chat items into the summary; system messages are skipped."""
+        for item in items:
+            kind = getattr(item, "type", None)
+            if kind == "function_call":
+                self.turns += 1
+                _remember(self.actions, _clip(f"{item.name}({item.arguments})", 120), SUMMARY_MAX_ACTIONS)
+                continue
+            if kind != "message" or item.role not in ("user", "assistant"):
+                continue
+            self.turns += 1
+            text = item_text(item)
+            if not text:
+                continue
+            if item.role == "user":
+                _remember(self.customer_requests, _clip(text), SUMMARY_MAX_REQUESTS)
+                for match in _DATE.findall(text):
+                    _remember(self.dates_mentioned, match.lower(), 4)
+                for match in _TIME.findall(text):
+                    _remember(self.times_mentioned, match.lower(), 4)
+                for size, size_alt in _PARTY.findall(text):
+                    _remember(self.party_sizes, int(size or size_alt), 3)
+            if mentions is not None:
+                for name in mentions.find(text):
+                    _remember(self.items_mentioned, name, SUMMARY_MAX_MENTIONS)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Non-empty fields only, for merging into UserData.summarize()."""
+        data = {
+            "turns_summarized": self.turns,
+            "items_mentioned": self.items_mentioned,
+            "dates_mentioned": self.dates_mentioned,
+            "times_mentioned": self.times_mentioned,
+            "party_sizes": self.party_sizes,
+            "customer_requests": self.customer_requests,
+            "actions": self.actions,
+        }
+        return {key: value for key, value in data.items() if value}
+
+
+_mentions: Optional[Tuple[int, MenuMentions]] = None
+_mentions_lock = threading.Lock()
+
+
+def _menu_mentions() -> Optional[MenuMentions]:
+    """Name matcher for the current menu snapshot, rebuilt when the snapshot version changes."""
+    global _mentions
+    try:
+        catalog = get_menu_catalog()
+    except Exception as e:
+        logger.error(f"Summary cannot match menu items: {e}")
+        return None
+    with _mentions_lock:
+        cached = _mentions
+        if cached is None or cached[0] != catalog.version:
+            cached = _mentions = (catalog.version, MenuMentions([item["name"] for item in catalog.items if item.get("name")]))
+    return cached[1]
+
+
+class RollingSummarizer:
+    """Folds evicted chat items into a ConversationSummary in the background.
+
+    `submit` is the only call on the conversation's hot path: it queues the
+    items and makes sure a folding task is running. Folding happens in a
+    worker thread on a copy of the summary, which is swapped in back on the
+    event loop, so `as_dict` never sees a half-folded summary. `drain` waits
+    for the queue to empty, so a compaction can put an up-to-date summary in
+    place of the items it drops.
+    """
+
+    def __init__(self, mentions: Callable[[], Optional[MenuMentions]] = _menu_mentions):
+        self.summary = ConversationSummary()
+        self._mentions = mentions
+        self._pending: List[Any] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def submit(self, items: List[Any]) -> None:
+        self._pending.extend(items)
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._fold(self._take())  # no loop (scripts, tests): fold inline
+            return
+        self._task = loop.create_task(self._run())
+
+    def _take(self) -> List[Any]:
+        items, self._pending = self._pending, []
+        return items
+
+    def _fold(self, items: List[Any]) -> None:
+        self.summary.fold(items, self._mentions())
+
+    def _folded(self, summary: ConversationSummary, items: List[Any]) -> ConversationSummary:
+        summary = copy.deepcopy(summary)
+        summary.fold(items, self._mentions())
+        return summary
+
+    async def _run(self) -> None:
+        while self._pending:
+            try:
+                # Only this task replaces the summary, so no fold is lost between copy and swap
+                self.summary = await asyncio.to_thread(self._folded, self.summary, self._take())
+            except Exception as e:
+                logger.error(f"Conversation summary failed: {e}")
+
+    async def drain(self) -> None:
+        if self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return self.summary.as_dict()
+
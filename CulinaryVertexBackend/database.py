@@ -0,0 +1,252 @@
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import certifi
+from dotenv import load_dotenv
+from livekit.agents import JobProcess
+from pymongo import MongoClient, monitoring
+
+load_dotenv(dotenv_path=".env")
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+DATABASE_NAME = "restaurant_db"
+
+# Pool tuning, shared by every session running in the worker process
+MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "5"))
+MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+
+# Threads used to offload blocking driver calls; bounded by the pool so every thread can get a connection
+EXECUTOR_WORKERS = int(os.getenv("MONGO_EXECUTOR_WORKERS", str(MAX_POOL_SIZE)))
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Counts connection pool events so the shared pool can be monitored."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters = {
+            "created": 0,
+            "closed": 0,
+            "checked_out": 0,
+            "checked_in": 0,
+            "checkout_failed": 0,
+            "pool_cleared": 0,
+        }
+
+    def _incr(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        self._incr("pool_cleared")
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        self._incr("created")
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        self._incr("closed")
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def connection_check_out_failed(self, event) -> None:
+        self._incr("checkout_failed")
+
+    def connection_checked_out(self, event) -> None:
+        self._incr("checked_out")
+
+    def connection_checked_in(self, event) -> None:
+        self._incr("checked_in")
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["open"] = stats["created"] - stats["closed"]
+        stats["in_use"] = stats["checked_out"] - stats["checked_in"]
+        stats["idle"] = stats["open"] - stats["in_use"]
+        return stats
+
+
+class MongoDBHelper:
+    def __init__(self, connection_uri: str):
+        self.pool_listener = PoolStatsListener()
+        self.client = MongoClient(
+            connection_uri,
+            tlsCAFile=certifi.where(),
+            maxPoolSize=MAX_POOL_SIZE,
+            minPoolSize=MIN_POOL_SIZE,
+            maxIdleTimeMS=MAX_IDLE_TIME_MS,
+            waitQueueTimeoutMS=WAIT_QUEUE_TIMEOUT_MS,
+            event_listeners=[self.pool_listener],
+        )
+        self.db = self.client[DATABASE_NAME]
+        self.menu_collection = self.db["menu"]
+        self.reservations_collection = self.db["reservations"]
+        self.orders_collection = self.db["orders"]
+        self.policies_collection = self.db["policies"]
+
+    def ping(self) -> None:
+        """Round-trip to the server so the TLS handshake happens before the first tool call."""
+        self.client.admin.command("ping")
+
+    def pool_stats(self) -> Dict[str, Any]:
+        stats = self.pool_listener.snapshot()
+        stats["max_pool_size"] = MAX_POOL_SIZE
+        stats["min_pool_size"] = MIN_POOL_SIZE
+        return stats
+
+    def close_connection(self):
+        if self.client:
+            self.client.close()
+
+
+class AsyncCollection:
+    """Async facade over a pymongo collection.
+
+    Every call runs on the repository's bounded thread pool, so a slow
+    round-trip never blocks the LiveKit event loop (and the audio of the
+    other sessions on this worker). Cursors are materialized in the worker
+    thread and returned as lists.
+    """
+
+    def __init__(self, collection, executor: ThreadPoolExecutor):
+        self.collection = collection
+        self._executor = executor
+
+    async def _run(self, fn: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def find(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        return await self._run(lambda: list(self.collection.find(*args, **kwargs)))
+
+    async def aggregate(self, pipeline: List[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
+        return await self._run(lambda: list(self.collection.aggregate(pipeline, **kwargs)))
+
+    async def find_one(self, *args, **kwargs):
+        return await self._run(self.collection.find_one, *args, **kwargs)
+
+    async def insert_one(self, *args, **kwargs):
+        return await self._run(self.collection.insert_one, *args, **kwargs)
+
+    async def insert_many(self, *args, **kwargs):
+        return await self._run(self.collection.insert_many, *args, **kwargs)
+
+    async def update_one(self, *args, **kwargs):
+        return await self._run(self.collection.update_one, *args, **kwargs)
+
+    async def update_many(self, *args, **kwargs):
+        return await self._run(self.collection.update_many, *args, **kwargs)
+
+    async def find_one_and_update(self, *args, **kwargs):
+        return await self._run(self.collection.find_one_and_update, *args, **kwargs)
+
+    async def delete_one(self, *args, **kwargs):
+        return await self._run(self.collection.delete_one, *args, **kwargs)
+
+    async def bulk_write(self, *args, **kwargs):
+        return await self._run(self.collection.bulk_write, *args, **kwargs)
+
+    async def count_documents(self, *args, **kwargs) -> int:
+        return await self._run(self.collection.count_documents, *args, **kwargs)
+
+
+class AsyncRepository:
+    """Non-blocking access to the restaurant collections for tool handlers."""
+
+    def __init__(self, db_helper: MongoDBHelper, max_workers: int = EXECUTOR_WORKERS):
+        self.db_helper = db_helper
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mongo")
+        self.menu = AsyncCollection(db_helper.menu_collection, self._executor)
+        self.reservations = AsyncCollection(db_helper.reservations_collection, self._executor)
+        self.orders = AsyncCollection(db_helper.orders_collection, self._executor)
+        self.policies = AsyncCollection(db_helper.policies_collection, self._executor)
+
+    def collection(self, name: str) -> AsyncCollection:
+        """Async facade for any other collection in the restaurant database."""
+        return AsyncCollection(self.db_helper.db[name], self._executor)
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run an arbitrary blocking callable on the database thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+_db_helper: Optional[MongoDBHelper] = None
+_db_helper_lock = threading.Lock()
+_repository: Optional[AsyncRepository] = None
+
+
+def get_db_helper() -> MongoDBHelper:
+    """Return the worker-wide MongoDB helper, creating the shared pool on first use."""
+    global _db_helper
+    if _db_helper is None:
+        with _db_helper_lock:
+            if _db_helper is None:
+                _db_helper = MongoDBHelper(os.getenv("MONGO_DB_URL"))
+    return _db_helper
+
+
+def get_repository() -> AsyncRepository:
+    """Return the worker-wide async repository built on the shared pool."""
+    global _repository
+    if _repository is None:
+        db_helper = get_db_helper()
+        with _db_helper_lock:
+            if _repository is None:
+                _repository = AsyncRepository(db_helper)
+    return _repository
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Connection pool counters for the shared client, for monitoring."""
+    if _db_helper is None:
+        return {}
+    return _db_helper.pool_stats()
+
+
+def close_db_helper() -> None:
+    global _db_helper, _repository
+    with _db_helper_lock:
+        if _repository is not None:
+            _repository.shutdown()
+            _repository = None
+        if _db_helper is not None:
+            _db_helper.close_connection()
+            _db_helper = None
+
+
+def prewarm(proc: JobProcess) -> None:
+    """Worker prewarm hook: open the shared pool and warm it up before jobs arrive."""
+    db_helper = get_db_helper()
+    try:
+        db_helper.ping()
+    except Exception as e:
+        logger.error(f"MongoDB warm-up ping failed: {e}")
+    proc.userdata["db_helper"] = db_helper
+    proc.userdata["repository"] = get_repository()
+    logger.info(f"MongoDB pool ready: {db_helper.pool_stats()}")
+
@@ -0,0 +1,129 @@
+import logging
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.database import Database
+from pymongo.errors import OperationFailure
+
+from database import get_db_helper
+from order_lifecycle import ACTIVE_FILTER
+from search_keys import NAME_KEY, PHONE_KEY, name_filter, phone_filter
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+# Indexes each collection needs for the tools' hot queries. Keys follow
+# equality -> sort -> range order so a single index serves each query shape.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "menu": [
+        IndexModel([("name", ASCENDING)], name="name_1"),
+        IndexModel([("category", ASCENDING), ("menu_type", ASCENDING)], name="category_1_menu_type_1"),
+    ],
+    "policies": [
+        IndexModel([("type", ASCENDING)], name="type_1"),
+    ],
+    "reservations": [
+        IndexModel([("date", ASCENDING), ("time", ASCENDING)], name="date_1_time_1"),
+        IndexModel([("contact_number", ASCENDING), ("date", ASCENDING)], name="contact_number_1_date_1"),
+        IndexModel([(NAME_KEY, ASCENDING), ("date", ASCENDING)], name="search_tokens_1_date_1"),
+        IndexModel([(PHONE_KEY, ASCENDING), ("date", ASCENDING)], name="search_phone_1_date_1"),
+        # Unique per booking request, so a retried create_reservation cannot insert twice
+        IndexModel(
+            [("idempotency_key", ASCENDING)],
+            name="idempotency_key_1",
+            unique=True,
+            partialFilterExpression={"idempotency_key": {"$exists": True}},
+        ),
+    ],
+    "orders": [
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING)], name="status_1_created_at_-1"),
+        IndexModel([("created_at", DESCENDING)], name="created_at_-1"),
+        IndexModel([(NAME_KEY, ASCENDING), ("created_at", DESCENDING)], name="search_tokens_1_created_at_-1"),
+        IndexModel([(PHONE_KEY, ASCENDING), ("created_at", DESCENDING)], name="search_phone_1_created_at_-1"),
+        # Only orders still in the kitchen, so rebuilding the kitchen queue never scans history
+        IndexModel(
+            [("created_at", ASCENDING), ("status", ASCENDING)],
+            name="active_created_at_1_status_1",
+            partialFilterExpression=ACTIVE_FILTER,
+        ),
+    ],
+    "session_events": [
+        IndexModel([("session_id", ASCENDING), ("at", ASCENDING)], name="session_id_1_at_1"),
+    ],
+}
+
+# Representative filters for the hot queries, checked by `collscan_report`
+HOT_QUERIES: List[Tuple[str, Dict[str, Any]]] = [
+    ("menu", {"name": "Sticky Toffee Pudding"}),
+    ("policies", {"type": "service_charge"}),
+    ("reservations", {"date": "2025-01-01"}),
+    ("reservations", {"contact_number": "555-555-5555"}),
+    ("reservations", name_filter("john smi")),
+    ("reservations", phone_filter("(555) 555-5555")),
+    ("orders", name_filter("john smi")),
+    ("orders", {"status": "pending", "created_at": {"$gte": datetime(2025, 1, 1)}}),
+    ("orders", {"created_at": {"$gte": datetime(2025, 1, 1), "$lte": datetime(2025, 1, 2)}}),
+    ("orders", ACTIVE_FILTER),
+]
+
+
+def ensure_indexes(db: Optional[Database] = None) -> Dict[str, List[str]]:
+    """Create every declared index; a no-op for indexes that already exist.
+
+    Indexes are created one at a time, so one the server rejects (such as
+    the `$in` partial filter before MongoDB 6.0) does not take the rest of
+    its collection down with it.
+    """
+    db = db if db is not None else get_db_helper().db
+    created: Dict[str, List[str]] = {}
+    failed: List[str] = []
+    for collection, models in INDEXES.items():
+        for model in models:
+            name = model.document["name"]
+            try:
+                created.setdefault(collection, []).extend(db[collection].create_indexes([model]))
+            except OperationFailure as e:
+                # Usually an index with the same name but different options was created by hand,
+                # or a server too old for the index's options
+                logger.error(f"Could not create index {name} on {collection}: {e}")
+                failed.append(f"{collection}.{name}")
+    logger.info(f"Indexes ensured on {', '.join(created)}" + (f"; failed: {', '.join(failed)}" if failed else ""))
+    return created
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = [plan["stage"]] if "stage" in plan else []
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+def winning_plan_stages(db: Database, collection: str, query: Dict[str, Any]) -> List[str]:
+    explain = db[collection].find(query).explain()
+    return _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+
+
+def collscan_report(db: Optional[Database] = None) -> List[Dict[str, Any]]:
+    """Hot queries whose winning plan still contains a COLLSCAN."""
+    db = db if db is not None else get_db_helper().db
+    report = []
+    for collection, query in HOT_QUERIES:
+        stages = winning_plan_stages(db, collection, query)
+        if "COLLSCAN" in stages:
+            report.append({"collection": collection, "query": query, "stages": stages})
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    ensure_indexes()
+    scans = collscan_report()
+    for scan in scans:
+        print(f"COLLSCAN on {scan['collection']}: {scan['query']} -> {' > '.join(scan['stages'])}")
+    print(f"{len(HOT_QUERIES) - len(scans)}/{len(HOT_QUERIES)} hot queries use an index")
+    sys.exit(1 if scans else 0)
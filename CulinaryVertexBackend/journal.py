@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from database import get_repository
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+# Audit events are appended; the latest state of each session is upserted by session id
+EVENTS_COLLECTION = "session_events"
+STATE_COLLECTION = "session_state"
+
+# Events held in memory at most; beyond this the oldest are dropped rather than blocking a call
+JOURNAL_MAX_EVENTS = int(os.getenv("JOURNAL_MAX_EVENTS", "10000"))
+JOURNAL_BATCH_SIZE = int(os.getenv("JOURNAL_BATCH_SIZE", "500"))
+JOURNAL_FLUSH_SECONDS = float(os.getenv("JOURNAL_FLUSH_SECONDS", "2"))
+
+
+class Journal:
+    """Write-behind journal for session audit events and state snapshots.
+
+    `record` and `snapshot` only touch memory and never wait on MongoDB.
+    A background task writes whatever has accumulated every
+    JOURNAL_FLUSH_SECONDS (sooner once a batch is full): events with one
+    `insert_many`, snapshots with one `bulk_write` of upserts, where only
+    the newest snapshot of each session is kept. The event buffer is
+    bounded; when MongoDB cannot keep up, the oldest events are dropped and
+    counted. Sessions call `close_session` on shutdown to flush their tail.
+    """
+
+    def __init__(
+        self,
+        max_events: int = JOURNAL_MAX_EVENTS,
+        batch_size: int = JOURNAL_BATCH_SIZE,
+        flush_seconds: float = JOURNAL_FLUSH_SECONDS,
+    ):
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._batch_size = batch_size
+        self._flush_seconds = flush_seconds
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+
+    def _start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop yet; the next call from a tool starts the writer
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = loop.create_task(self._run())
+
+    def record(self, session_id: str, event: str, **data: Any) -> None:
+        """Queue an audit event."""
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+        self._events.append({"session_id": session_id, "event": event, "data": data, "at": datetime.now()})
+        self._start()
+        if self._wakeup is not None and len(self._events) >= self._batch_size:
+            self._wakeup.set()
+
+    def snapshot(self, session_id: str, state: Dict[str, Any]) -> None:
+        """Replace the pending snapshot of a session's state."""
+        self._snapshots[session_id] = {**state, "updated_at": datetime.now()}
+        self._start()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Journal flush failed: {e}")
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns the number of events written."""
+        if not self._events and not self._snapshots:
+            return 0
+        self._start()
+        async with self._flush_lock:
+            events = [self._events.popleft() for _ in range(len(self._events))]
+            snapshots, self._snapshots = self._snapshots, {}
+            written = await get_repository().run(self._write, events, snapshots)
+            # Telemetry is best effort: a failed batch is counted as lost, not retried forever
+            self.written += written
+            self.dropped += len(events) - written
+            return written
+
+    def _write(self, events: List[Dict[str, Any]], snapshots: Dict[str, Dict[str, Any]]) -> int:
+        db = get_repository().db_helper.db
+        written = 0
+        for start in range(0, len(events), self._batch_size):
+            batch = events[start:start + self._batch_size]
+            try:
+                db[EVENTS_COLLECTION].insert_many(batch, ordered=False)
+                written += len(batch)
+            except BulkWriteError as e:
+                written += e.details.get("nInserted", 0)
+                logger.error(f"Journal dropped {len(batch) - e.details.get('nInserted', 0)} events: {e}")
+            except PyMongoError as e:
+                logger.error(f"Journal dropped {len(batch)} events: {e}")
+        if snapshots:
+            try:
+                db[STATE_COLLECTION].bulk_write(
+                    [UpdateOne({"_id": session_id}, {"$set": state}, upsert=True) for session_id, state in snapshots.items()],
+                    ordered=False,
+                )
+            except PyMongoError as e:
+                logger.error(f"Journal could not save {len(snapshots)} session snapshots: {e}")
+        return written
+
+    async def close_session(self, session_id: str) -> None:
+        """Record the end of a session and flush, so nothing it logged is left in memory."""
+        self.record(session_id, "session_end")
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Journal flush on session end failed: {e}")
+        logger.info(f"Journal: {self.written} events written, {self.dropped} dropped")
+
+
+_journal: Optional[Journal] = None
+
+
+def get_journal() -> Journal:
+    global _journal
+    if _journal is None:
+        _journal = Journal()
+    return _journal
+
@@ -3,6 +3,7 @@ import os
 import certifi
 from dotenv import load_dotenv
 import json
+from datetime import datetime
 
 load_dotenv(dotenv_path=".env")
 
@@ -25,10 +26,16 @@ class MongoDBHelper:
             return []
 
     def clean_menu_items(self, items):
-        """Ensure price keys are strings for dictionary-based prices."""
+        """Ensure price keys are strings for dictionary-based prices and stamp metadata.
+
+        metadata.lastUpdated lets running agents notice the change when change
+        streams are unavailable (see snapshot_watcher.py).
+        """
+        now = datetime.now()
         for item in items:
             if isinstance(item.get("price"), dict):
                 item["price"] = {str(k): v for k, v in item["price"].items()}
+            item.setdefault("metadata", {})["lastUpdated"] = now
         return items
 
     def close_connection(self):
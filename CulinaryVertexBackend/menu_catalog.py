@@ -0,0 +1,188 @@
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from database import get_db_helper, get_repository
+from menu_resolver import MenuResolver
+from pricing import PriceTable
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+
+def _as_list(value: Any) -> List[str]:
+    """menu_type and dietary are stored either as a single string or a list."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(v) for v in value]
+
+
+# Bookkeeping fields (metadata.lastUpdated is stamped for snapshot_watcher) kept out of tool results
+_HIDDEN_FIELDS = ("_id", "metadata")
+
+
+def _fold(value: str) -> str:
+    return value.strip().casefold()
+
+
+class MenuCatalog:
+    """Immutable, indexed snapshot of the `menu` collection.
+
+    Names and categories are served from hash indexes. Dietary tags and
+    menu types are kept as bitsets (one bit per item) so combined filters
+    are a couple of integer ANDs. Prices are compiled into a PriceTable. Returned documents are shared between
+    sessions and must be treated as read-only.
+    """
+
+    def __init__(self, items: Iterable[Dict[str, Any]], version: int = 0):
+        self.version = version
+        self._items: tuple = tuple(
+            {k: v for k, v in item.items() if k not in _HIDDEN_FIELDS} for item in items
+        )
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        self._by_folded_name: Dict[str, Dict[str, Any]] = {}
+        self._by_category: Dict[str, List[Dict[str, Any]]] = {}
+        self._category_names: Dict[str, str] = {}
+        self._dietary_bits: Dict[str, int] = {}
+        self._menu_type_bits: Dict[str, int] = {}
+
+        for index, item in enumerate(self._items):
+            bit = 1 << index
+            name = item.get("name")
+            if name:
+                self._by_name[name] = item
+                self._by_folded_name.setdefault(_fold(name), item)
+
+            category = item.get("category", "Other")
+            self._by_category.setdefault(category, []).append(item)
+            self._category_names.setdefault(_fold(category), category)
+
+            for tag in _as_list(item.get("dietary")):
+                key = _fold(tag)
+                self._dietary_bits[key] = self._dietary_bits.get(key, 0) | bit
+
+            for menu_type in _as_list(item.get("menu_type")):
+                key = _fold(menu_type)
+                self._menu_type_bits[key] = self._menu_type_bits.get(key, 0) | bit
+
+        self._all_bits = (1 << len(self._items)) - 1
+        self.resolver = MenuResolver(self._items)
+        self.prices = PriceTable(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def items(self) -> List[Dict[str, Any]]:
+        return list(self._items)
+
+    @property
+    def categories(self) -> List[str]:
+        return list(self._by_category)
+
+    @property
+    def dietary_tags(self) -> List[str]:
+        return list(self._dietary_bits)
+
+    @property
+    def menu_types(self) -> List[str]:
+        return list(self._menu_type_bits)
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Exact name lookup, falling back to a case-insensitive match."""
+        if not name:
+            return None
+        item = self._by_name.get(name)
+        if item is None:
+            item = self._by_folded_name.get(_fold(name))
+        return item
+
+    def resolve(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Ranked fuzzy/phonetic candidates for a transcribed item name."""
+        return [item for item, _ in self.resolver.resolve(query, limit=limit)]
+
+    def lookup(self, name: str) -> Optional[Dict[str, Any]]:
+        """Exact lookup first, then the resolver's single confident match."""
+        return self.get(name) or self.resolver.best_match(name)
+
+    def get_many(self, names: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Look up several names in one pass, keyed by the requested name."""
+        return {name: self.lookup(name) for name in names}
+
+    def by_category(self, category: str) -> List[Dict[str, Any]]:
+        items = self._by_category.get(category)
+        if items is None:
+            items = self._by_category.get(self._category_names.get(_fold(category), ""), [])
+        return list(items)
+
+    def filter(
+        self,
+        category: Optional[str] = None,
+        dietary: Optional[Iterable[str]] = None,
+        menu_type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Items matching all given criteria; every dietary tag must be present."""
+        mask = self._all_bits
+        if isinstance(dietary, str):
+            dietary = [dietary]
+        for tag in dietary or []:
+            mask &= self._dietary_bits.get(_fold(tag), 0)
+        if menu_type:
+            mask &= self._menu_type_bits.get(_fold(menu_type), 0)
+
+        items = self._select(mask)
+        if category:
+            wanted = self._category_names.get(_fold(category))
+            items = [item for item in items if item.get("category", "Other") == wanted]
+        return items
+
+    def _select(self, mask: int) -> List[Dict[str, Any]]:
+        selected = []
+        while mask:
+            low = mask & -mask
+            selected.append(self._items[low.bit_length() - 1])
+            mask ^= low
+        return selected
+
+
+_catalog: Optional[MenuCatalog] = None
+_catalog_lock = threading.Lock()
+_version = 0
+
+
+def load_menu_catalog() -> MenuCatalog:
+    """Read the whole menu collection and build a fresh catalog."""
+    items = list(get_db_helper().menu_collection.find({}, {"_id": 0, "metadata": 0}))
+    catalog = MenuCatalog(items, version=_version)
+    logger.info(f"Loaded menu catalog with {len(catalog)} items")
+    return catalog
+
+
+def reload_menu_catalog() -> MenuCatalog:
+    """Build a new snapshot and swap it in atomically, bumping the version."""
+    global _catalog, _version
+    with _catalog_lock:
+        items = list(get_db_helper().menu_collection.find({}, {"_id": 0, "metadata": 0}))
+        _version += 1
+        _catalog = MenuCatalog(items, version=_version)
+    logger.info(f"Menu catalog reloaded (version {_version}, {len(items)} items)")
+    return _catalog
+
+
+def get_menu_catalog() -> MenuCatalog:
+    """Return the worker-wide catalog, loading it from MongoDB on first use."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = load_menu_catalog()
+    return _catalog
+
+
+async def get_menu_catalog_async() -> MenuCatalog:
+    """Like get_menu_catalog, but never blocks the event loop on the first load."""
+    if _catalog is not None:
+        return _catalog
+    return await get_repository().run(get_menu_catalog)
@@ -0,0 +1,256 @@
+import logging
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from pricing import ADD_ON_FIELDS
+from sanitizer import safe_sanitize_text
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+# Approximate token allowance for the menu block of an agent's instructions
+MENU_TOKEN_BUDGET = int(os.getenv("MENU_TOKEN_BUDGET", "1200"))
+
+# Dietary tags as stored (folded) -> code used in the encoded menu
+DIETARY_CODES = {
+    "vegetarian": "V",
+    "vegan": "VG",
+    "gf": "GF",
+    "gluten free": "GF",
+    "df": "DF",
+    "dairy free": "DF",
+    "nf": "NF",
+    "nut free": "NF",
+    "contains nuts": "N",
+    "spicy": "S",
+}
+_CODE_NAMES = {"V": "vegetarian", "VG": "vegan", "GF": "gluten-free", "DF": "dairy-free", "NF": "nut-free", "N": "contains nuts", "S": "spicy"}
+
+# Description fragments shorter than this cost about as much as their reference
+_MIN_SHARED_FRAGMENT = 12
+_REF = re.compile(r"~\d+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English menu text)."""
+    return (len(text) + 3) // 4
+
+
+def _as_list(value: Any) -> List[str]:
+    if not value:
+        return []
+    return [value] if isinstance(value, str) else [str(entry) for entry in value]
+
+
+def _number(value: Any) -> str:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return safe_sanitize_text(value)
+    return f"{value:g}"
+
+
+def _price(price: Any) -> str:
+    """18.0 -> "18"; {"glass": 14, "bottle": 52} -> "glass 14/bottle 52"."""
+    if isinstance(price, dict):
+        return "/".join(f"{safe_sanitize_text(variant)} {_number(value)}" for variant, value in price.items())
+    return _number(price)
+
+
+def _dietary(item: Dict[str, Any]) -> List[str]:
+    codes = []
+    for tag in _as_list(item.get("dietary")):
+        folded = tag.replace("-", " ").strip().casefold()
+        code = DIETARY_CODES.get(folded, safe_sanitize_text(tag))
+        if code not in codes:
+            codes.append(code)
+    return codes
+
+
+def _fragments(description: str) -> List[str]:
+    return [part.strip() for part in description.split(",") if part.strip()]
+
+
+@dataclass
+class EncodedMenu:
+    text: str
+    tokens: int
+    included: List[str] = field(default_factory=list)  # items listed with price and description
+    overflow: List[str] = field(default_factory=list)  # items left to the lookup tool
+
+
+class _Entry:
+    __slots__ = ("name", "category", "line", "tokens")
+
+    def __init__(self, name: str, category: str, line: str):
+        self.name = name
+        self.category = category
+        self.line = line
+        self.tokens = estimate_tokens(line) + 1
+
+
+def _section_key(item: Dict[str, Any]) -> Tuple[str, str]:
+    types = _as_list(item.get("menu_type"))
+    return safe_sanitize_text(item.get("category") or "Other"), "/".join(safe_sanitize_text(t) for t in types)
+
+
+def encode_menu(
+    menu_items: List[Dict[str, Any]],
+    token_budget: int = MENU_TOKEN_BUDGET,
+    lookup_tool: str = "lookup_menu_item",
+) -> EncodedMenu:
+    """Dense menu text for agent instructions, kept under `token_budget`.
+
+    Items are grouped under "## Category [menu types]" headers, prices are
+    bare numbers, dietary tags become short codes and description
+    fragments repeated across items are written once in a legend and
+    referenced as ~n. Food is listed before drinks; items that do not fit
+    the budget are named in a closing "more" section (or only counted per
+    category when even the names do not fit), for `lookup_tool` to fetch.
+    """
+    seen = set()
+    items = []
+    for item in menu_items:
+        name = item.get("name")
+        if name and name not in seen:
+            seen.add(name)
+            items.append(item)
+    # Stable: categories keep their catalog order, drinks move after food
+    items.sort(key=lambda item: "drinks" in (t.casefold() for t in _as_list(item.get("menu_type"))))
+
+    counts = Counter(
+        fragment
+        for item in items
+        for fragment in set(_fragments(safe_sanitize_text(item.get("description") or "")))
+        if len(fragment) >= _MIN_SHARED_FRAGMENT
+    )
+    shared = {fragment: f"~{n}" for n, fragment in enumerate((f for f, c in counts.most_common() if c > 1), 1)}
+
+    sections: Dict[Tuple[str, str], List[_Entry]] = {}
+    codes_used = set()
+    for item in items:
+        name = safe_sanitize_text(item["name"])
+        codes = _dietary(item)
+        codes_used.update(codes)
+        parts = [shared.get(fragment, fragment) for fragment in _fragments(safe_sanitize_text(item.get("description") or ""))]
+        line = f"{name} {_price(item.get('price', 0))}"
+        if codes:
+            line += f" {','.join(codes)}"
+        if parts:
+            line += f": {', '.join(parts)}"
+        key = _section_key(item)
+        sections.setdefault(key, []).append(_Entry(name, key[0], line))
+
+    entries = [entry for section in sections.values() for entry in section]
+    included = len(entries)
+    while True:
+        text = _render(sections, entries[:included], entries[included:], shared, codes_used, lookup_tool, list_names=True)
+        tokens = estimate_tokens(text)
+        if tokens > token_budget and included < len(entries):
+            # Names alone may still not fit; fall back to per-category counts
+            text = _render(sections, entries[:included], entries[included:], shared, codes_used, lookup_tool, list_names=False)
+            tokens = estimate_tokens(text)
+        if tokens <= token_budget or included == 0:
+            break
+        # Drop roughly enough trailing items to close the gap, at least one
+        over = tokens - token_budget
+        while included > 0 and over > 0:
+            included -= 1
+            over -= entries[included].tokens
+
+    if tokens > token_budget:
+        logger.warning(f"Menu encoding needs {tokens} tokens, over the budget of {token_budget}")
+    return EncodedMenu(
+        text=text,
+        tokens=tokens,
+        included=[entry.name for entry in entries[:included]],
+        overflow=[entry.name for entry in entries[included:]],
+    )
+
+
+def _render(
+    sections: Dict[Tuple[str, str], List[_Entry]],
+    listed: List[_Entry],
+    overflow: List[_Entry],
+    shared: Dict[str, str],
+    codes_used: set,
+    lookup_tool: str,
+    list_names: bool,
+) -> str:
+    listed_ids = {id(entry) for entry in listed}
+    body: List[str] = []
+    for (category, types), section in sections.items():
+        lines = [entry.line for entry in section if id(entry) in listed_ids]
+        if lines:
+            body.append(f"## {category} [{types}]" if types else f"## {category}")
+            body.extend(lines)
+
+    referenced = set(_REF.findall("\n".join(body)))
+    refs = {ref: fragment for fragment, ref in shared.items() if ref in referenced}
+    header = ["Menu, prices in $."]
+    codes = sorted(code for code in codes_used if code in _CODE_NAMES)
+    if codes:
+        header.append("Dietary: " + " ".join(f"{code}={_CODE_NAMES[code]}" for code in codes) + ".")
+    lines = [" ".join(header)]
+    if refs:
+        lines.append("Notes: " + "; ".join(f"{ref}={fragment}" for ref, fragment in sorted(refs.items(), key=lambda r: int(r[0][1:]))))
+    lines.extend(body)
+
+    if overflow:
+        by_category: Dict[str, List[str]] = {}
+        for entry in overflow:
+            by_category.setdefault(entry.category, []).append(entry.name)
+        if list_names:
+            more = "; ".join(f"{category}: {', '.join(names)}" for category, names in by_category.items())
+        else:
+            more = "; ".join(f"{category} ({len(names)})" for category, names in by_category.items())
+        lines.append(f"More (call {lookup_tool} for price and details): {more}")
+    return "\n".join(lines)
+
+
+def _entries(value: Any) -> str:
+    """{"Bacon": 3}, [{"name": "Bacon", "price": 3}] or ["Bacon"] -> "Bacon (+$3)"; free entries are just named."""
+    if isinstance(value, str):
+        return safe_sanitize_text(value)
+    if isinstance(value, dict):
+        pairs = list(value.items())
+    else:
+        pairs = [(entry.get("name"), entry.get("price")) if isinstance(entry, dict) else (entry, None) for entry in value]
+    parts = []
+    for name, price in pairs:
+        if not name:
+            continue
+        try:
+            price = float(price or 0)
+        except (TypeError, ValueError):
+            parts.append(f"{name} ({price})")
+            continue
+        if not price:
+            parts.append(str(name))
+        else:
+            parts.append(f"{name} (+${price:.0f})" if price.is_integer() else f"{name} (+${price:.2f})")
+    return safe_sanitize_text(", ".join(parts))
+
+
+def describe_item(item: Dict[str, Any]) -> str:
+    """Full one-item description for the on-demand lookup tool."""
+    name = safe_sanitize_text(item.get("name", ""))
+    category, types = _section_key(item)
+    text = f"{name} ({category}{', ' + types if types else ''}): ${_price(item.get('price', 0))}"
+    dietary = [_CODE_NAMES.get(code, code) for code in _dietary(item)]
+    if dietary:
+        text += f", {', '.join(dietary)}"
+    description = safe_sanitize_text(item.get("description") or "")
+    if description:
+        text += f". {description}"
+    for field_name in ADD_ON_FIELDS + ("options",):
+        value = item.get(field_name)
+        if value:
+            entries = _entries(value)
+            if entries:
+                text += f". {field_name.replace('_', ' ').capitalize()}: {entries}"
+    return text
+
@@ -0,0 +1,219 @@
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_VOWELS = "AEIOU"
+
+# Weights of the three signals combined into a candidate's score
+NAME_WEIGHT = 0.65
+PHONETIC_WEIGHT = 0.25
+DESCRIPTION_WEIGHT = 0.10
+
+
+def normalize(text: str) -> str:
+    """Casefold, strip accents and collapse punctuation to single spaces."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", stripped.casefold()).strip()
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def phonetic_key(word: str) -> str:
+    """Simplified Metaphone encoding (primary key only) of a normalized word."""
+    w = word.upper()
+    if not w:
+        return ""
+    if w[:2] in ("KN", "GN", "PN", "WR", "AE", "PS"):
+        w = w[1:]
+    elif w[:2] == "WH":
+        w = "W" + w[2:]
+    elif w[0] == "X":
+        w = "S" + w[1:]
+
+    out = []
+    length = len(w)
+    i = 0
+    while i < length:
+        c = w[i]
+        prev = w[i - 1] if i > 0 else ""
+        nxt = w[i + 1] if i + 1 < length else ""
+        after = w[i + 2] if i + 2 < length else ""
+
+        if c == prev and c != "C":
+            pass
+        elif c in _VOWELS:
+            if i == 0:
+                out.append("A")
+        elif c == "B":
+            if not (prev == "M" and i == length - 1):
+                out.append("P")
+        elif c == "C":
+            if nxt == "H":
+                out.append("X")
+                i += 1
+            elif nxt in ("I", "E", "Y"):
+                out.append("S")
+            else:
+                out.append("K")
+        elif c == "D":
+            if nxt == "G" and after in ("E", "I", "Y"):
+                out.append("J")
+                i += 1
+            else:
+                out.append("T")
+        elif c == "G":
+            if nxt == "H" and after not in _VOWELS:
+                i += 1
+            elif nxt == "N":
+                pass
+            elif nxt in ("I", "E", "Y"):
+                out.append("J")
+            else:
+                out.append("K")
+        elif c == "H":
+            if prev not in ("C", "S", "P", "T", "G") and nxt in _VOWELS:
+                out.append("H")
+        elif c == "K":
+            if prev != "C":
+                out.append("K")
+        elif c == "P":
+            if nxt == "H":
+                out.append("F")
+                i += 1
+            else:
+                out.append("P")
+        elif c == "Q":
+            out.append("K")
+        elif c == "S":
+            if nxt == "H" or (nxt == "I" and after in ("O", "A")):
+                out.append("X")
+                i += 1
+            else:
+                out.append("S")
+        elif c == "T":
+            if nxt == "H":
+                out.append("0")
+                i += 1
+            elif nxt == "I" and after in ("O", "A"):
+                out.append("X")
+            else:
+                out.append("T")
+        elif c == "V":
+            out.append("F")
+        elif c in ("W", "Y"):
+            if nxt in _VOWELS:
+                out.append(c)
+        elif c == "X":
+            out.append("KS")
+        elif c == "Z":
+            out.append("S")
+        else:
+            out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def phonetic_keys(text: str) -> set:
+    return {key for key in (phonetic_key(word) for word in text.split() if not word.isdigit()) if key}
+
+
+class MenuResolver:
+    """Ranks menu items against loosely transcribed names.
+
+    Built once per catalog snapshot: trigram postings and phonetic keys over
+    item names, plus description trigram postings used to break ties. A
+    lookup counts the hits of the query's own trigrams and keys with one
+    `bincount` per signal and scores every candidate in a single vector pass,
+    so common words shared by much of the menu do not mean a Python loop
+    over those items.
+    """
+
+    def __init__(self, items: Iterable[Dict[str, Any]]):
+        self._items: List[Dict[str, Any]] = list(items)
+        name_gram_counts: List[int] = []
+        key_counts: List[int] = []
+        name_postings: Dict[str, List[int]] = defaultdict(list)
+        phonetic_postings: Dict[str, List[int]] = defaultdict(list)
+        description_postings: Dict[str, List[int]] = defaultdict(list)
+
+        for index, item in enumerate(self._items):
+            name = normalize(item.get("name", ""))
+            name_grams = trigrams(name) if name else set()
+            name_gram_counts.append(len(name_grams))
+            for gram in name_grams:
+                name_postings[gram].append(index)
+
+            keys = phonetic_keys(name)
+            key_counts.append(len(keys))
+            for key in keys:
+                phonetic_postings[key].append(index)
+
+            description = normalize(item.get("description", ""))
+            for gram in trigrams(description) if description else ():
+                description_postings[gram].append(index)
+
+        self._name_gram_counts = np.asarray(name_gram_counts, dtype=np.float64)
+        self._key_counts = np.asarray(key_counts, dtype=np.float64)
+        self._name_postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in name_postings.items()}
+        self._phonetic_postings = {key: np.asarray(ids, dtype=np.int32) for key, ids in phonetic_postings.items()}
+        self._description_postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in description_postings.items()}
+
+    def _hits(self, postings: Dict[str, np.ndarray], keys: Iterable[str]) -> np.ndarray:
+        """Per item, how many of `keys` it is posted under."""
+        matched = [postings[key] for key in keys if key in postings]
+        if not matched:
+            return np.zeros(len(self._items), dtype=np.int64)
+        return np.bincount(np.concatenate(matched), minlength=len(self._items))
+
+    def resolve(self, query: str, limit: int = 5, min_score: float = 0.3) -> List[Tuple[Dict[str, Any], float]]:
+        """Return up to `limit` (item, score) pairs, best first, with score in [0, 1]."""
+        text = normalize(query)
+        if not text or not self._items:
+            return []
+
+        query_grams = trigrams(text)
+        query_keys = phonetic_keys(text)
+        name_hits = self._hits(self._name_postings, query_grams)
+        key_hits = self._hits(self._phonetic_postings, query_keys)
+        # Descriptions only refine the ranking: a description match alone stays
+        # below any useful threshold, so candidates come from names and keys.
+        candidates = np.flatnonzero((name_hits > 0) | (key_hits > 0))
+        if not candidates.size:
+            return []
+
+        gram_count = len(query_grams)
+        name_score = 2.0 * name_hits[candidates] / (gram_count + self._name_gram_counts[candidates])
+        shared_keys = key_hits[candidates]
+        key_total = len(query_keys) + self._key_counts[candidates] - shared_keys
+        phonetic_score = np.divide(
+            shared_keys, key_total, out=np.zeros(candidates.size), where=key_total > 0
+        )
+        description_score = self._hits(self._description_postings, query_grams)[candidates] / gram_count
+        scores = (
+            NAME_WEIGHT * name_score
+            + PHONETIC_WEIGHT * phonetic_score
+            + DESCRIPTION_WEIGHT * description_score
+        )
+
+        kept = scores >= min_score
+        candidates, scores = candidates[kept], scores[kept]
+        best = np.lexsort((candidates, -scores))[:limit]
+        return [(self._items[candidates[i]], round(float(scores[i]), 3)) for i in best]
+
+    def best_match(self, query: str, min_score: float = 0.5, margin: float = 0.05) -> Optional[Dict[str, Any]]:
+        """The single confident match for `query`, or None when it is missing or ambiguous."""
+        ranked = self.resolve(query, limit=2, min_score=min_score)
+        if not ranked:
+            return None
+        if len(ranked) > 1 and ranked[0][1] - ranked[1][1] < margin:
+            return None
+        return ranked[0][0]
+
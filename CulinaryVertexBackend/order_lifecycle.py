@@ -0,0 +1,276 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from time import monotonic
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from database import get_db_helper, get_repository
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+STATUSES = ("pending", "preparing", "ready", "served", "completed", "cancelled")
+
+# Allowed moves; completed and cancelled are final
+TRANSITIONS: Dict[str, Tuple[str, ...]] = {
+    "pending": ("preparing", "cancelled"),
+    "preparing": ("ready", "cancelled"),
+    "ready": ("served",),
+    "served": ("completed",),
+    "completed": (),
+    "cancelled": (),
+}
+ALLOWED_FROM: Dict[str, Tuple[str, ...]] = {
+    status: tuple(source for source in STATUSES if status in TRANSITIONS[source]) for status in STATUSES
+}
+
+# Orders the kitchen still has to prepare or hand over, covered by a partial index in indexes.py
+ACTIVE_STATUSES = ("pending", "preparing", "ready")
+ACTIVE_FILTER = {"status": {"$in": list(ACTIVE_STATUSES)}}
+# Orders whose lines may still change; later statuses are in or past the pass
+EDITABLE_STATUSES = ("pending", "preparing")
+QUEUE_PROJECTION = {"status": 1, "created_at": 1, "customer_name": 1, "items.quantity": 1, "order_items": 1}
+
+# Rough kitchen model for ETAs: a fixed overhead plus a few minutes per item, cooked on N stations
+KITCHEN_STATIONS = int(os.getenv("KITCHEN_STATIONS", "2"))
+BASE_PREP_MINUTES = float(os.getenv("KITCHEN_BASE_PREP_MINUTES", "5"))
+MINUTES_PER_ITEM = float(os.getenv("KITCHEN_MINUTES_PER_ITEM", "3"))
+# How long the queue is trusted before re-reading orders changed by other workers
+QUEUE_TTL_SECONDS = float(os.getenv("KITCHEN_QUEUE_TTL_SECONDS", "30"))
+
+
+class TransitionError(ValueError):
+    """Raised when an order is missing or cannot move to the requested status."""
+
+
+def order_size(order: Dict[str, Any]) -> int:
+    """Number of dishes, for both structured `items` and the realtime agents' `order_items`."""
+    if order.get("items"):
+        return sum(int(line.get("quantity", 1) or 1) for line in order["items"])
+    return len(order.get("order_items") or [])
+
+
+def prep_minutes(order: Dict[str, Any]) -> float:
+    return BASE_PREP_MINUTES + MINUTES_PER_ITEM * order_size(order)
+
+
+def transition_filter(order_id: ObjectId, status: str) -> Dict[str, Any]:
+    """Match the order only while its current status may move to `status`."""
+    sources: List[Optional[str]] = list(ALLOWED_FROM[status])
+    if "pending" in sources:
+        sources.append(None)  # orders saved before statuses existed count as pending
+    return {"_id": order_id, "status": {"$in": sources}}
+
+
+def edit_filter(order_id: ObjectId) -> Dict[str, Any]:
+    """Match the order only while its lines may still be edited."""
+    return {"_id": order_id, "status": {"$in": [*EDITABLE_STATUSES, None]}}
+
+
+async def transition(order_id: str, status: str) -> Dict[str, Any]:
+    """Move an order to `status` in one conditional `find_one_and_update`.
+
+    The allowed source statuses are part of the filter, so of two racing
+    transitions from the same state only one can succeed. A failed
+    transition pays one extra read to explain itself.
+    """
+    if status not in TRANSITIONS:
+        raise TransitionError(f"Invalid status. Must be one of: {', '.join(STATUSES)}")
+
+    repo = get_repository()
+    _id = ObjectId(order_id)
+    order = await repo.orders.find_one_and_update(
+        transition_filter(_id, status),
+        {"$set": {"status": status, "updated_at": datetime.now()}},
+        projection=QUEUE_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+    )
+    if order is None:
+        current = await repo.orders.find_one({"_id": _id}, {"status": 1})
+        if current is None:
+            raise TransitionError("Order not found")
+        current_status = current.get("status") or "pending"
+        allowed = ", ".join(TRANSITIONS.get(current_status, ())) or "nothing (final status)"
+        raise TransitionError(f"Order is {current_status} and cannot become {status}; it can move to {allowed}")
+
+    get_kitchen_queue().update(order)
+    return order
+
+
+class _Fenwick:
+    """Prefix sums of queued minutes by ticket number."""
+
+    def __init__(self, size: int):
+        self._tree = [0.0] * (size + 1)
+
+    def __len__(self) -> int:
+        return len(self._tree) - 1
+
+    def add(self, index: int, value: float) -> None:
+        index += 1
+        while index < len(self._tree):
+            self._tree[index] += value
+            index += index & -index
+
+    def prefix(self, index: int) -> float:
+        """Sum of tickets [0, index)."""
+        total = 0.0
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+
+@dataclass
+class Ticket:
+    order_id: str
+    number: int
+    status: str
+    minutes: float
+    customer_name: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class KitchenQueue:
+    """Active orders per status, in arrival (ticket) order.
+
+    `next_up` reads the head of the pending queue and `eta` looks up the
+    minutes of pending/preparing work queued ahead of an order in a Fenwick
+    tree over ticket numbers, so neither walks the whole queue. The queue is
+    rebuilt from the active-status partial index at prewarm and whenever it
+    is older than QUEUE_TTL_SECONDS; transitions made by this worker are
+    applied as they happen.
+    """
+
+    def __init__(self, stations: int = KITCHEN_STATIONS, ttl_seconds: float = QUEUE_TTL_SECONDS):
+        self.stations = max(stations, 1)
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self.loaded_at: Optional[float] = None
+        self._reset(64)
+
+    def _reset(self, capacity: int) -> None:
+        self._queues: Dict[str, "OrderedDict[str, Ticket]"] = {status: OrderedDict() for status in ACTIVE_STATUSES}
+        self._tickets: Dict[str, Ticket] = {}
+        self._work = _Fenwick(capacity)
+        self._next_number = 0
+
+    @property
+    def stale(self) -> bool:
+        return self.loaded_at is None or monotonic() - self.loaded_at >= self._ttl
+
+    def load(self, orders: Iterable[Dict[str, Any]]) -> None:
+        """Replace the contents with active orders sorted by `created_at`."""
+        orders = list(orders)
+        with self._lock:
+            self._reset(max(64, 2 * len(orders)))
+            for order in orders:
+                self._insert(order)
+            self.loaded_at = monotonic()
+
+    def refresh(self) -> "KitchenQueue":
+        """Synchronous rebuild from MongoDB (prewarm and executor threads)."""
+        orders = get_db_helper().db["orders"].find(ACTIVE_FILTER, QUEUE_PROJECTION).sort("created_at", 1)
+        self.load(orders)
+        logger.info(f"Kitchen queue rebuilt: {self.counts()}")
+        return self
+
+    def _carries_work(self, status: str) -> bool:
+        return status in ("pending", "preparing")
+
+    def _insert(self, order: Dict[str, Any]) -> None:
+        if self._next_number >= len(self._work):
+            # Compact ticket numbers into a larger tree
+            tickets = sorted(self._tickets.values(), key=lambda ticket: ticket.number)
+            self._work = _Fenwick(2 * max(len(tickets), 32))
+            for number, ticket in enumerate(tickets):
+                ticket.number = number
+                if self._carries_work(ticket.status):
+                    self._work.add(number, ticket.minutes)
+            self._next_number = len(tickets)
+
+        status = order.get("status") or "pending"
+        ticket = Ticket(
+            order_id=str(order["_id"]),
+            number=self._next_number,
+            status=status,
+            minutes=prep_minutes(order),
+            customer_name=order.get("customer_name"),
+            created_at=order.get("created_at"),
+        )
+        self._next_number += 1
+        self._tickets[ticket.order_id] = ticket
+        self._queues[status][ticket.order_id] = ticket
+        if self._carries_work(status):
+            self._work.add(ticket.number, ticket.minutes)
+
+    def update(self, order: Dict[str, Any]) -> None:
+        """Apply a new or changed order: queue it, move it between statuses or drop it."""
+        order_id = str(order["_id"])
+        status = order.get("status") or "pending"
+        with self._lock:
+            ticket = self._tickets.get(order_id)
+            if ticket is None:
+                if status in ACTIVE_STATUSES:
+                    self._insert(order)
+                return
+
+            self._queues[ticket.status].pop(order_id, None)
+            if self._carries_work(ticket.status):
+                self._work.add(ticket.number, -ticket.minutes)
+            if status not in ACTIVE_STATUSES:
+                del self._tickets[order_id]
+                return
+
+            # Keeps its ticket number; only new orders enter "pending", so it stays in arrival order
+            ticket.status = status
+            if "items" in order or "order_items" in order:
+                ticket.minutes = prep_minutes(order)
+            self._queues[status][order_id] = ticket
+            if self._carries_work(status):
+                self._work.add(ticket.number, ticket.minutes)
+
+    def next_up(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """The next `limit` pending orders to start, oldest first."""
+        with self._lock:
+            head = list(islice(self._queues["pending"].values(), limit))
+        return [{"order_id": t.order_id, "customer_name": t.customer_name, "minutes": t.minutes} for t in head]
+
+    def eta(self, order_id: str) -> Optional[float]:
+        """Estimated minutes until an active order is ready; None if it is not in the queue."""
+        with self._lock:
+            ticket = self._tickets.get(order_id)
+            if ticket is None:
+                return None
+            if ticket.status == "ready":
+                return 0.0
+            ahead = self._work.prefix(ticket.number)
+        return round(ahead / self.stations + ticket.minutes, 1)
+
+    def counts(self) -> Dict[str, int]:
+        return {status: len(queue) for status, queue in self._queues.items()}
+
+
+_queue: Optional[KitchenQueue] = None
+
+
+def get_kitchen_queue() -> KitchenQueue:
+    global _queue
+    if _queue is None:
+        _queue = KitchenQueue()
+    return _queue
+
+
+async def get_kitchen_queue_async() -> KitchenQueue:
+    """The worker's queue, rebuilt off the event loop when it has gone stale."""
+    queue = get_kitchen_queue()
+    if queue.stale:
+        await get_repository().run(queue.refresh)
+    return queue
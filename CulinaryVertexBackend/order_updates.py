@@ -0,0 +1,122 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+# Order edits are expressed as update pipelines (MongoDB 4.2+) so that merging,
+# removing and re-totalling lines happens server-side in one atomic statement.
+# Stages run in order, so each one sees the lines left by the previous one.
+
+_ITEMS = {"$ifNull": ["$items", []]}
+
+
+def _same_line(item_name: str, variant: Optional[str], add_ons: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Expression true when `$$line` is the given item (and variant / add-ons, when given)."""
+    clauses: List[Dict[str, Any]] = [{"$eq": ["$$line.item_name", item_name]}]
+    if variant is not None or add_ons is not None:
+        clauses.append({"$eq": [{"$ifNull": ["$$line.variant", None]}, variant]})
+    if add_ons is not None:
+        clauses.append({"$eq": [{"$ifNull": ["$$line.add_ons", []]}, list(add_ons)]})
+    return {"$and": clauses}
+
+
+def add_line(line: Dict[str, Any]) -> Dict[str, Any]:
+    """Stage adding a priced line, or `$inc`-ing the quantity of an identical one."""
+    match = _same_line(line["item_name"], line.get("variant"), line.get("add_ons") or [])
+    return {"$set": {"items": {"$cond": [
+        {"$in": [True, {"$map": {"input": _ITEMS, "as": "line", "in": match}}]},
+        {"$map": {"input": _ITEMS, "as": "line", "in": {"$cond": [
+            match,
+            {"$mergeObjects": ["$$line", {"quantity": {"$add": ["$$line.quantity", line.get("quantity", 1)]}}]},
+            "$$line",
+        ]}}},
+        {"$concatArrays": [_ITEMS, [{"$literal": line}]]},
+    ]}}}
+
+
+def remove_line(item_name: str, variant: Optional[str] = None, quantity: int = 1) -> Dict[str, Any]:
+    """Stage taking `quantity` off the first matching line and pulling it once it reaches zero."""
+    indices = {"$range": [0, {"$size": _ITEMS}]}
+    return {"$set": {"items": {"$let": {
+        "vars": {"target": {"$indexOfArray": [
+            {"$map": {"input": _ITEMS, "as": "line", "in": _same_line(item_name, variant)}}, True,
+        ]}},
+        "in": {"$filter": {
+            "input": {"$map": {"input": indices, "as": "index", "in": {"$let": {
+                "vars": {"line": {"$arrayElemAt": [_ITEMS, "$$index"]}},
+                "in": {"$cond": [
+                    {"$eq": ["$$index", "$$target"]},
+                    {"$mergeObjects": ["$$line", {"quantity": {"$subtract": ["$$line.quantity", quantity]}}]},
+                    "$$line",
+                ]},
+            }}}},
+            "as": "line",
+            "cond": {"$gt": ["$$line.quantity", 0]},
+        }},
+    }}}}
+
+
+def removal_filter(remove: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Query clauses requiring a line for every removal, matched the way `remove_line` matches."""
+    clauses = []
+    for item in remove:
+        line: Dict[str, Any] = {"item_name": item["item_name"]}
+        if item.get("variant") is not None:
+            line["variant"] = item["variant"]
+        clauses.append({"items": {"$elemMatch": line}})
+    return {"$and": clauses} if clauses else {}
+
+
+def missing_removals(order: Dict[str, Any], remove: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Removals with no matching line in `order`."""
+    lines = order.get("items") or []
+    return [
+        item for item in remove
+        if not any(
+            line.get("item_name") == item["item_name"]
+            and (item.get("variant") is None or line.get("variant") == item["variant"])
+            for line in lines
+        )
+    ]
+
+
+def recompute_totals(service_charge_rate: float = 0.0) -> List[Dict[str, Any]]:
+    """Stages re-deriving subtotal, service charge and total from the stored lines.
+
+    Rounds the same way as `pricing.price_order_lines`, using the unit price
+    recorded on each line.
+    """
+    subtotal = {"$round": [{"$reduce": {
+        "input": "$items",
+        "initialValue": 0.0,
+        "in": {"$add": ["$$value", {"$multiply": [
+            {"$ifNull": ["$$this.price", 0.0]}, {"$ifNull": ["$$this.quantity", 1]},
+        ]}]},
+    }}, 2]}
+    return [
+        {"$set": {"subtotal": subtotal}},
+        {"$set": {"service_charge": {"$round": [{"$multiply": ["$subtotal", service_charge_rate]}, 2]}}},
+        {"$set": {"total_price": {"$round": [{"$add": ["$subtotal", "$service_charge"]}, 2]}}},
+    ]
+
+
+def order_edit_pipeline(
+    add: Iterable[Dict[str, Any]] = (),
+    remove: Iterable[Dict[str, Any]] = (),
+    service_charge_rate: float = 0.0,
+    fields: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """Update pipeline applying added lines, removals ({"item_name", "variant", "quantity"}) and totals.
+
+    `fields` are plain values set alongside, such as `updated_at`.
+    """
+    pipeline = [add_line(line) for line in add]
+    pipeline.extend(
+        remove_line(item["item_name"], item.get("variant"), item.get("quantity", 1)) for item in remove
+    )
+    pipeline.extend(recompute_totals(service_charge_rate))
+    if fields:
+        # $literal keeps strings such as "$5 off" from being read as field paths
+        pipeline.append({"$set": {key: {"$literal": value} for key, value in fields.items()}})
+    return pipeline
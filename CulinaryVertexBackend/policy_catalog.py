@@ -0,0 +1,101 @@
+import logging
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from database import get_db_helper, get_repository
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+_PERCENT = re.compile(r"(\d+(?:\.\d+)?)\s*%")
+
+
+def parse_service_charge_rate(doc: Optional[Dict[str, Any]]) -> float:
+    """Service charge as a fraction: the first "N%" in the description, else the summed breakdown."""
+    if not doc:
+        return 0.0
+    match = _PERCENT.search(doc.get("description", ""))
+    if match:
+        return float(match.group(1)) / 100.0
+    breakdown = [part.get("percentage") for part in doc.get("breakdown", []) if isinstance(part, dict)]
+    return sum(value for value in breakdown if isinstance(value, (int, float))) / 100.0
+
+
+class PolicyCatalog:
+    """Immutable snapshot of the `policies` collection, indexed by policy type.
+
+    Returned documents are shared between sessions and must be treated as
+    read-only.
+    """
+
+    def __init__(self, documents: Iterable[Dict[str, Any]], version: int = 0):
+        self.version = version
+        self._documents: tuple = tuple(
+            {k: v for k, v in doc.items() if k != "_id"} for doc in documents
+        )
+        self._by_type: Dict[str, List[Dict[str, Any]]] = {}
+        for doc in self._documents:
+            self._by_type.setdefault(doc.get("type"), []).append(doc)
+
+        self._special_experiences: Dict[str, Dict[str, Any]] = {}
+        for doc in self._by_type.get("special_experiences", []):
+            for option in doc.get("options", []):
+                if option.get("name"):
+                    self._special_experiences[option["name"].casefold()] = option
+
+        self.service_charge_rate = parse_service_charge_rate(self.get("service_charge"))
+
+    @property
+    def documents(self) -> List[Dict[str, Any]]:
+        return list(self._documents)
+
+    def get(self, policy_type: str) -> Optional[Dict[str, Any]]:
+        """First document of the given type, or None."""
+        documents = self._by_type.get(policy_type)
+        return documents[0] if documents else None
+
+    def by_type(self, policy_type: str) -> List[Dict[str, Any]]:
+        return list(self._by_type.get(policy_type, []))
+
+    def special_experience(self, name: str) -> Optional[Dict[str, Any]]:
+        return self._special_experiences.get(name.strip().casefold())
+
+
+_catalog: Optional[PolicyCatalog] = None
+_catalog_lock = threading.Lock()
+_version = 0
+
+
+def load_policy_catalog() -> PolicyCatalog:
+    """Read the whole policies collection and build a fresh catalog."""
+    documents = list(get_db_helper().policies_collection.find({}, {"_id": 0}))
+    return PolicyCatalog(documents, version=_version)
+
+
+def reload_policy_catalog() -> PolicyCatalog:
+    """Build a new snapshot and swap it in atomically, bumping the version."""
+    global _catalog, _version
+    with _catalog_lock:
+        documents = list(get_db_helper().policies_collection.find({}, {"_id": 0}))
+        _version += 1
+        _catalog = PolicyCatalog(documents, version=_version)
+    logger.info(f"Policy catalog reloaded (version {_version}, {len(documents)} documents)")
+    return _catalog
+
+
+def get_policy_catalog() -> PolicyCatalog:
+    """Return the worker-wide policy catalog, loading it from MongoDB on first use."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = load_policy_catalog()
+    return _catalog
+
+
+async def get_policy_catalog_async() -> PolicyCatalog:
+    """Like get_policy_catalog, but never blocks the event loop on the first load."""
+    if _catalog is not None:
+        return _catalog
+    return await get_repository().run(get_policy_catalog)
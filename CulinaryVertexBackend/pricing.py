@@ -0,0 +1,208 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+# Variant key used for items with a single scalar price
+BASE_VARIANT = "regular"
+
+# Fields whose entries can be ordered on top of an item
+ADD_ON_FIELDS = ("add_ons", "enhancements", "sides")
+
+
+class PricingError(ValueError):
+    """Raised when an order line cannot be priced (unknown item, variant or add-on)."""
+
+
+def _fold(value: Any) -> str:
+    return str(value).replace("_", " ").replace("-", " ").strip().casefold()
+
+
+def _priced_entries(value: Any) -> Iterable[Tuple[str, float]]:
+    """Add-ons are stored as {name: price}, [{"name", "price"}] or plain names (free)."""
+    if isinstance(value, dict):
+        for name, price in value.items():
+            yield str(name), float(price or 0.0)
+        return
+    for entry in value or []:
+        if isinstance(entry, dict):
+            if entry.get("name"):
+                yield str(entry["name"]), float(entry.get("price", 0.0) or 0.0)
+        elif entry:
+            yield str(entry), 0.0
+
+
+@dataclass(frozen=True)
+class Quote:
+    """Unit price of one order line, with its canonical variant and add-on names."""
+    item_name: str
+    variant: Optional[str]
+    add_ons: Tuple[str, ...]
+    unit_price: float
+
+
+class PriceTable:
+    """Compiled prices for one menu snapshot.
+
+    Every (item, variant) pair gets a row in `unit_prices` and every
+    (item, add-on) pair a row in `add_on_prices`. Order lines are encoded
+    to row indices once, after which whole batches of baskets are priced
+    with a few numpy gathers and a `bincount` per basket.
+    """
+
+    def __init__(self, items: Iterable[Dict[str, Any]]):
+        unit_prices: List[float] = []
+        add_on_prices: List[float] = []
+        self._variants: Dict[str, Dict[str, Tuple[str, int]]] = {}
+        self._add_ons: Dict[str, Dict[str, Tuple[str, int]]] = {}
+
+        for item in items:
+            name = item.get("name")
+            if not name:
+                continue
+
+            price = item.get("price", 0.0)
+            if not isinstance(price, dict):
+                price = {BASE_VARIANT: price}
+            variants = {}
+            for variant, value in price.items():
+                variants[_fold(variant)] = (str(variant), len(unit_prices))
+                unit_prices.append(float(value or 0.0))
+            self._variants[name] = variants
+
+            add_ons = {}
+            for field in ADD_ON_FIELDS:
+                for add_on, value in _priced_entries(item.get(field)):
+                    add_ons.setdefault(_fold(add_on), (add_on, len(add_on_prices)))
+                    add_on_prices.append(value)
+            self._add_ons[name] = add_ons
+
+        self.unit_prices = np.asarray(unit_prices, dtype=np.float64)
+        self.add_on_prices = np.asarray(add_on_prices, dtype=np.float64)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._variants
+
+    def variants(self, name: str) -> List[str]:
+        """Orderable variants of an item; empty for single-price items."""
+        variants = self._variants.get(name, {})
+        if list(variants) == [BASE_VARIANT]:
+            return []
+        return [label for label, _ in variants.values()]
+
+    def _variant_row(self, name: str, variant: Optional[str]) -> Tuple[Optional[str], int]:
+        variants = self._variants.get(name)
+        if variants is None:
+            raise PricingError(f"{name} is not on the menu")
+        if len(variants) == 1:
+            label, row = next(iter(variants.values()))
+            return (None if label == BASE_VARIANT else label), row
+
+        wanted = _fold(variant or "")
+        if wanted:
+            if wanted in variants:
+                return variants[wanted]
+            # Spoken requests often wrap the variant ("the half dozen oysters")
+            for key, match in variants.items():
+                if key in wanted:
+                    return match
+        options = ", ".join(label for label, _ in variants.values())
+        raise PricingError(f"Please choose an option for {name}: {options}")
+
+    def encode(self, name: str, variant: Optional[str] = None, add_ons: Sequence[str] = ()) -> Tuple[Optional[str], int, Tuple[str, ...], Tuple[int, ...]]:
+        """Resolve a line to (variant, variant row, add-on names, add-on rows)."""
+        label, row = self._variant_row(name, variant)
+        available = self._add_ons.get(name, {})
+        names, rows = [], []
+        for add_on in add_ons:
+            match = available.get(_fold(add_on))
+            if match is None:
+                raise PricingError(f"{add_on} is not available with {name}")
+            names.append(match[0])
+            rows.append(match[1])
+        return label, row, tuple(names), tuple(rows)
+
+    def quote(self, name: str, variant: Optional[str] = None, add_ons: Sequence[str] = ()) -> Quote:
+        label, row, add_on_names, add_on_rows = self.encode(name, variant, add_ons)
+        unit_price = float(self.unit_prices[row]) + float(self.add_on_prices[list(add_on_rows)].sum())
+        return Quote(name, label, add_on_names, round(unit_price, 2))
+
+    def price_baskets(self, baskets: Sequence[Sequence[Dict[str, Any]]], service_charge_rate: float = 0.0) -> np.ndarray:
+        """Price many baskets of {"item_name", "variant", "add_ons", "quantity"} lines.
+
+        Returns an (n, 3) array of subtotal, service charge and total per basket.
+        """
+        basket_ids, rows, quantities = [], [], []
+        add_on_basket_ids, add_on_rows, add_on_quantities = [], [], []
+        for basket_id, basket in enumerate(baskets):
+            for line in basket:
+                _, row, _, line_add_on_rows = self.encode(
+                    line["item_name"], line.get("variant"), line.get("add_ons") or ()
+                )
+                quantity = line.get("quantity", 1)
+                basket_ids.append(basket_id)
+                rows.append(row)
+                quantities.append(quantity)
+                for add_on_row in line_add_on_rows:
+                    add_on_basket_ids.append(basket_id)
+                    add_on_rows.append(add_on_row)
+                    add_on_quantities.append(quantity)
+
+        return self.price_encoded(
+            len(baskets),
+            np.asarray(basket_ids, dtype=np.intp),
+            np.asarray(rows, dtype=np.intp),
+            np.asarray(quantities, dtype=np.float64),
+            np.asarray(add_on_basket_ids, dtype=np.intp),
+            np.asarray(add_on_rows, dtype=np.intp),
+            np.asarray(add_on_quantities, dtype=np.float64),
+            service_charge_rate,
+        )
+
+    def price_encoded(
+        self,
+        basket_count: int,
+        basket_ids: np.ndarray,
+        rows: np.ndarray,
+        quantities: np.ndarray,
+        add_on_basket_ids: np.ndarray,
+        add_on_rows: np.ndarray,
+        add_on_quantities: np.ndarray,
+        service_charge_rate: float = 0.0,
+    ) -> np.ndarray:
+        """Vectorized core of `price_baskets` for lines already encoded to row indices."""
+        subtotals = np.bincount(basket_ids, weights=self.unit_prices[rows] * quantities, minlength=basket_count)
+        if len(add_on_rows):
+            subtotals += np.bincount(
+                add_on_basket_ids,
+                weights=self.add_on_prices[add_on_rows] * add_on_quantities,
+                minlength=basket_count,
+            )
+        return totals(subtotals, service_charge_rate)
+
+
+def totals(subtotals: np.ndarray, service_charge_rate: float = 0.0) -> np.ndarray:
+    """Stack rounded subtotal, service charge and total columns."""
+    subtotals = np.round(subtotals, 2)
+    service_charges = np.round(subtotals * service_charge_rate, 2)
+    return np.column_stack((subtotals, service_charges, subtotals + service_charges))
+
+
+def price_order_lines(lines: Sequence[Dict[str, Any]], service_charge_rate: float = 0.0) -> Dict[str, float]:
+    """Totals for stored order lines, using the unit price recorded on each line."""
+    amounts = np.fromiter(
+        (float(line.get("price", 0.0) or 0.0) * line.get("quantity", 1) for line in lines),
+        dtype=np.float64,
+        count=len(lines),
+    )
+    subtotal, service_charge, total = totals(np.array([amounts.sum()]), service_charge_rate)[0]
+    return {
+        "subtotal": float(subtotal),
+        "service_charge": float(service_charge),
+        "total_price": round(float(total), 2),
+    }
+
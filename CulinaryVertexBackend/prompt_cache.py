@@ -0,0 +1,167 @@
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import date as Date
+from typing import Any, Dict, List, Optional
+
+from menu_catalog import get_menu_catalog
+from menu_encoder import encode_menu
+from policy_catalog import get_policy_catalog
+from sanitizer import safe_sanitize_text
+from schedule import WeeklySchedule, schedule_for
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+DEFAULT_MENU = "Pizza: $10, Salad: $5, Ice Cream: $3, Coffee: $2"
+DEFAULT_POLICIES = (
+    "Reservation: Reservations must be made at least 1 hour in advance.\n"
+    "Ordering: Orders must be placed at least 30 minutes before pickup time."
+)
+
+
+def format_menu(menu_items: List[Dict[str, Any]]) -> str:
+    """Render menu documents as a dense, sanitized, token-budgeted prompt fragment."""
+    if not menu_items:
+        logger.warning("No menu items found in MongoDB, using default menu")
+        return safe_sanitize_text(DEFAULT_MENU)
+
+    encoded = encode_menu(menu_items)
+    if encoded.overflow:
+        logger.info(f"Menu fragment lists {len(encoded.included)} items, {len(encoded.overflow)} left to lookup_menu_item")
+    return encoded.text
+
+
+# Policy document types rendered as "Title: description" sections
+POLICY_SECTIONS = {
+    "reservation_policy": ("reservation", "Reservation"),
+    "service_charge": ("service_charge", "Service charge"),
+    "dress_code": ("dress_code", "Dress code"),
+    "children_policy": ("children", "Children"),
+}
+ORDERING_POLICY = "Ordering: Orders must be placed at least 30 minutes before pickup time."
+
+
+def policy_sections(
+    policy_docs: List[Dict[str, Any]],
+    schedule: Optional[WeeklySchedule] = None,
+    today: Optional[Date] = None,
+) -> Dict[str, str]:
+    """Sanitized policy text keyed by section, in prompt order.
+
+    Keys: restaurant, hours, reservation, service_charge, dress_code,
+    children and ordering; sections without a source document are left out.
+    The hours line is for `today` (the current date by default), from
+    `schedule` or one compiled from the documents.
+    """
+    sections: Dict[str, str] = {}
+
+    # Extract restaurant info
+    for doc in policy_docs:
+        if doc.get("type") == "restaurant_info":
+            name = safe_sanitize_text(doc.get("name", "Gourmet Bistro"))
+            location = doc.get("location", {})
+            address = safe_sanitize_text(
+                f"{location.get('address', '')}, {location.get('city', '')}, {location.get('state', '')}"
+            )
+            sections["restaurant"] = f"Name: {name}\nLocation: {address}"
+            break
+
+    # Today's hours, honouring holiday entries
+    hours = next((doc for doc in policy_docs if doc.get("type") == "hours_of_operation"), None)
+    if hours is not None:
+        sections["hours"] = (schedule or WeeklySchedule(hours)).hours_line(today)
+
+    # Extract key text policies
+    for doc in policy_docs:
+        policy_type = doc.get("type")
+        if policy_type in POLICY_SECTIONS and "description" in doc:
+            key, section_title = POLICY_SECTIONS[policy_type]
+            description = safe_sanitize_text(doc["description"])
+            sections[key] = f"{section_title}: {description}"
+
+    sections["ordering"] = ORDERING_POLICY
+    return sections
+
+
+def format_policies(
+    policy_docs: List[Dict[str, Any]],
+    schedule: Optional[WeeklySchedule] = None,
+    today: Optional[Date] = None,
+) -> str:
+    """Transform raw policy data into a secure, token-efficient format."""
+    if not policy_docs:
+        return DEFAULT_POLICIES
+    return "\n\n".join(policy_sections(policy_docs, schedule, today).values())
+
+
+@dataclass(frozen=True)
+class PromptFragments:
+    """Rendered instruction fragments for one menu/policy snapshot pair and calendar day."""
+    menu_version: int
+    policy_version: int
+    menu: str
+    policies: str
+    day: str = ""
+
+
+_fragments: Optional[PromptFragments] = None
+_fragments_lock = threading.Lock()
+
+
+def _menu_fragment(cached: Optional[PromptFragments]) -> tuple:
+    try:
+        catalog = get_menu_catalog()
+        if cached is not None and cached.menu_version == catalog.version:
+            return cached.menu_version, cached.menu
+        return catalog.version, format_menu(catalog.items)
+    except Exception as e:
+        logger.error(f"Error fetching menu from MongoDB: {e}")
+        return -1, safe_sanitize_text(DEFAULT_MENU)
+
+
+def _policy_fragment(cached: Optional[PromptFragments], today: Date) -> tuple:
+    try:
+        catalog = get_policy_catalog()
+        if cached is not None and cached.policy_version == catalog.version and cached.day == today.isoformat():
+            return cached.policy_version, cached.policies
+        return catalog.version, format_policies(catalog.documents, schedule_for(catalog), today)
+    except Exception as e:
+        logger.error(f"Error fetching policies from MongoDB: {e}")
+        return -1, DEFAULT_POLICIES
+
+
+def get_prompt_fragments() -> PromptFragments:
+    """Return the menu/policy fragments for the current catalog versions.
+
+    Fragments are rendered once per snapshot version and shared by every
+    agent in the worker, so building an agent's instructions is a plain
+    attribute read. Only the half whose catalog changed is re-rendered,
+    and the policies once more after midnight for the new day's hours;
+    a fallback fragment (version -1) is retried on the next call.
+    """
+    global _fragments
+    cached = _fragments
+    today = Date.today()
+    if cached is not None:
+        try:
+            if (cached.menu_version == get_menu_catalog().version
+                    and cached.policy_version == get_policy_catalog().version
+                    and cached.day == today.isoformat()):
+                return cached
+        except Exception as e:
+            logger.error(f"Error checking catalog versions: {e}")
+            return cached
+
+    with _fragments_lock:
+        cached = _fragments
+        menu_version, menu = _menu_fragment(cached)
+        policy_version, policies = _policy_fragment(cached, today)
+        if cached is None or (menu_version, policy_version, today.isoformat()) != (
+                cached.menu_version, cached.policy_version, cached.day):
+            _fragments = PromptFragments(menu_version, policy_version, menu, policies, today.isoformat())
+            logger.info(
+                f"Prompt fragments built (menu v{menu_version}, policies v{policy_version}, {today.isoformat()}, "
+                f"{len(menu) + len(policies)} chars)"
+            )
+        return _fragments
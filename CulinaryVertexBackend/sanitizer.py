@@ -0,0 +1,47 @@
+from functools import lru_cache
+from typing import Any
+
+# Characters stripped before anything else: backslash, double quote, backtick, angle brackets
+_STRIP_CHARS = str.maketrans("", "", '\\"`<>')
+
+# Role/prompt markers removed in this order. Sequential removal is kept on
+# purpose: deleting one marker can splice together a later one
+# ("usesystem:r:" -> "user:"), and the order decides what survives.
+# The old ``````/<.*?> patterns are omitted: backticks and angle brackets
+# are already gone by the time they would run, so they never matched.
+_INJECTION_MARKERS = (
+    "system:",
+    "user:",
+    "assistant:",
+    "prompt:",
+    "instruction:",
+)
+
+SANITIZE_CACHE_SIZE = 4096
+# Longer texts (policy documents, transcripts) rarely repeat and would pin their size in the cache
+SANITIZE_CACHE_MAX_CHARS = 4096
+
+
+def _sanitize(text: str, max_length: int) -> str:
+    text = text.translate(_STRIP_CHARS)
+
+    # Every marker ends with a colon, so most menu/policy strings skip the loop entirely
+    if ":" in text:
+        for marker in _INJECTION_MARKERS:
+            if marker in text:
+                text = text.replace(marker, "")
+
+    return text[:max_length].strip()
+
+
+_cached_sanitize = lru_cache(maxsize=SANITIZE_CACHE_SIZE)(_sanitize)
+
+
+def safe_sanitize_text(text: Any, max_length: int = 100000) -> str:
+    """Safely sanitize text to prevent prompt injection and other security issues."""
+    if not isinstance(text, str):
+        text = str(text)
+    if len(text) > SANITIZE_CACHE_MAX_CHARS:
+        return _sanitize(text, max_length)
+    return _cached_sanitize(text, max_length)
+
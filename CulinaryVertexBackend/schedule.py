@@ -0,0 +1,209 @@
+import logging
+import threading
+from array import array
+from datetime import date as Date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from dateutil import parser
+
+from policy_catalog import PolicyCatalog, get_policy_catalog, get_policy_catalog_async
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+DAY_MINUTES = 24 * 60
+
+Intervals = Tuple[Tuple[int, int], ...]
+
+
+def parse_date(text: Any) -> Optional[str]:
+    """ISO date (YYYY-MM-DD) for "2025-06-14", "June 14" or a datetime, or None."""
+    if isinstance(text, datetime):
+        return text.date().isoformat()
+    if isinstance(text, Date):
+        return text.isoformat()
+    try:
+        return parser.parse(str(text)).date().isoformat()
+    except (ValueError, OverflowError):
+        return None
+
+
+def parse_time(text: Any) -> Optional[int]:
+    """Minutes after midnight for "19:30", "7:30 pm" or "7pm", or None."""
+    value = str(text or "").strip()
+    try:
+        hours, minutes = value.split(":")
+        return int(hours) * 60 + int(minutes)
+    except ValueError:
+        pass
+    try:
+        parsed = parser.parse(value)
+    except (ValueError, OverflowError):
+        return None
+    return parsed.hour * 60 + parsed.minute
+
+
+def format_time(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def entry_intervals(entry: Optional[Dict[str, Any]]) -> Intervals:
+    """Open [start, end) minute intervals of one regularHours/holidayHours entry, honouring its break.
+
+    An interval closing after midnight ends past DAY_MINUTES.
+    """
+    if entry is None or entry.get("closed"):
+        return ()
+
+    open_at = parse_time(entry.get("openTime"))
+    close_at = parse_time(entry.get("closeTime"))
+    if open_at is None or close_at is None:
+        return ()
+    if close_at <= open_at:
+        close_at += DAY_MINUTES  # closes after midnight
+
+    break_start = parse_time(entry.get("breakStart"))
+    break_end = parse_time(entry.get("breakEnd"))
+    if break_start is not None and break_end is not None and open_at < break_start < break_end < close_at:
+        return ((open_at, break_start), (break_end, close_at))
+    return ((open_at, close_at),)
+
+
+class _DayTable:
+    """Minute-resolution view of one calendar day, including the previous night's spill-over.
+
+    `open` flags every open minute; `next_open[m]` is the first open minute
+    at or after m on this day, or -1.
+    """
+
+    __slots__ = ("open", "next_open")
+
+    def __init__(self, intervals: Intervals, spill: Intervals):
+        self.open = bytearray(DAY_MINUTES)
+        for open_at, close_at in spill + intervals:
+            open_at, close_at = max(open_at, 0), min(close_at, DAY_MINUTES)
+            if open_at < close_at:
+                self.open[open_at:close_at] = b"\x01" * (close_at - open_at)
+        self.next_open = array("h", [-1]) * DAY_MINUTES
+        upcoming = -1
+        for minute in range(DAY_MINUTES - 1, -1, -1):
+            if self.open[minute]:
+                upcoming = minute
+            self.next_open[minute] = upcoming
+
+
+def _spill(intervals: Intervals) -> Intervals:
+    """The part of a day's intervals that runs past midnight, on the next day's clock."""
+    return tuple((max(a - DAY_MINUTES, 0), b - DAY_MINUTES) for a, b in intervals if b > DAY_MINUTES)
+
+
+class WeeklySchedule:
+    """Opening hours compiled from an `hours_of_operation` document.
+
+    Every weekday and holiday is turned into open minute intervals and a
+    1440-minute table when the schedule is built, with identical days
+    sharing one table, so `is_open` is a single index and `next_opening`
+    looks at no more than a week of day tables. Holiday entries override
+    the weekday they fall on.
+    """
+
+    def __init__(self, hours: Optional[Dict[str, Any]], version: int = 0):
+        hours = hours or {}
+        self.version = version
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        for entry in hours.get("regularHours", []):
+            if isinstance(entry, dict) and entry.get("dayOfWeek"):
+                self._entries.setdefault(entry["dayOfWeek"].casefold(), entry)
+        self._weekly: Tuple[Intervals, ...] = tuple(
+            entry_intervals(self._entries.get(day.casefold())) for day in WEEKDAYS
+        )
+        self._holidays: Dict[str, Intervals] = {}
+        for entry in hours.get("holidayHours", []):
+            day = parse_date(entry.get("date")) if isinstance(entry, dict) else None
+            if day is not None and day not in self._holidays:
+                self._holidays[day] = entry_intervals(entry)
+
+        self._tables: Dict[Tuple[Intervals, Intervals], _DayTable] = {}
+        for weekday in range(7):
+            self._table_for(self._weekly[weekday], _spill(self._weekly[weekday - 1]))
+        for day in map(Date.fromisoformat, self._holidays):
+            self._table(day)
+            self._table(day + timedelta(days=1))  # may start with the holiday's late spill-over
+
+    def _table_for(self, intervals: Intervals, spill: Intervals) -> _DayTable:
+        table = self._tables.get((intervals, spill))
+        if table is None:
+            table = self._tables[(intervals, spill)] = _DayTable(intervals, spill)
+        return table
+
+    def _table(self, day: Date) -> _DayTable:
+        return self._table_for(self.intervals(day), _spill(self.intervals(day - timedelta(days=1))))
+
+    def intervals(self, day: Any) -> Intervals:
+        """Open intervals starting on `day` (a date or ISO string); a holiday entry wins over the weekday."""
+        if isinstance(day, str):
+            day = Date.fromisoformat(day)
+        holiday = self._holidays.get(day.isoformat())
+        return holiday if holiday is not None else self._weekly[day.weekday()]
+
+    def hours_for_day(self, day_of_week: str) -> Optional[Dict[str, Any]]:
+        """The regularHours entry of a weekday name, any case."""
+        return self._entries.get(day_of_week.strip().casefold())
+
+    def is_open(self, at: Optional[datetime] = None) -> bool:
+        at = at or datetime.now()
+        return bool(self._table(at.date()).open[at.hour * 60 + at.minute])
+
+    def next_opening(self, at: Optional[datetime] = None) -> Optional[datetime]:
+        """`at` itself when open, else the next minute the restaurant opens; None if closed all week."""
+        at = (at or datetime.now()).replace(second=0, microsecond=0)
+        day, minute = at.date(), at.hour * 60 + at.minute
+        for _ in range(8):
+            found = self._table(day).next_open[minute]
+            if found >= 0:
+                return datetime.combine(day, datetime.min.time()) + timedelta(minutes=found)
+            day, minute = day + timedelta(days=1), 0
+        return None
+
+    def hours_text(self, day: Any) -> str:
+        intervals = self.intervals(day)
+        if not intervals:
+            return "closed"
+        return ", ".join(f"{format_time(a)} - {format_time(b % DAY_MINUTES)}" for a, b in intervals)
+
+    def hours_line(self, day: Optional[Date] = None) -> str:
+        """Prompt line for `day` (today by default), e.g. "Hours today (Friday, 2025-06-13): 11:00 - 15:30, 16:30 - 23:00"."""
+        day = day or Date.today()
+        return f"Hours today ({WEEKDAYS[day.weekday()]}, {day.isoformat()}): {self.hours_text(day)}"
+
+
+def opening_intervals(policies: PolicyCatalog, day: str) -> List[Tuple[int, int]]:
+    """Open [start, end) minute intervals for an ISO date, honouring breaks and holiday hours."""
+    return list(schedule_for(policies).intervals(day))
+
+
+_schedule: Optional[WeeklySchedule] = None
+_schedule_lock = threading.Lock()
+
+
+def schedule_for(policies: PolicyCatalog) -> WeeklySchedule:
+    """The compiled schedule of a policy snapshot, rebuilt only when the snapshot version changes."""
+    global _schedule
+    schedule = _schedule
+    if schedule is None or schedule.version != policies.version:
+        with _schedule_lock:
+            schedule = _schedule
+            if schedule is None or schedule.version != policies.version:
+                schedule = WeeklySchedule(policies.get("hours_of_operation"), policies.version)
+                _schedule = schedule
+    return schedule
+
+
+def get_schedule() -> WeeklySchedule:
+    return schedule_for(get_policy_catalog())
+
+
+async def get_schedule_async() -> WeeklySchedule:
+    return schedule_for(await get_policy_catalog_async())
+
@@ -0,0 +1,112 @@
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+from menu_resolver import normalize
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+# Normalized lookup fields stored on reservations and orders, indexed in indexes.py
+NAME_KEY = "search_tokens"
+PHONE_KEY = "search_phone"
+SEARCHABLE_COLLECTIONS = ("reservations", "orders")
+
+_NON_DIGIT = re.compile(r"\D+")
+
+
+def name_tokens(name: Optional[str]) -> List[str]:
+    """Casefolded, accent-stripped name tokens: "José O'Neil" -> ["jose", "o", "neil"]."""
+    return normalize(name or "").split()
+
+
+def phone_digits(phone: Optional[str]) -> str:
+    """Digits only, without a leading US country code: "+1 (555) 010-2030" -> "5550102030"."""
+    digits = _NON_DIGIT.sub("", phone or "")
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    return digits
+
+
+def search_keys(name: Optional[str] = None, phone: Optional[str] = None) -> Dict[str, Any]:
+    """Search fields for the given name and/or phone, to `$set` alongside them."""
+    keys: Dict[str, Any] = {}
+    if name is not None:
+        keys[NAME_KEY] = name_tokens(name)
+    if phone is not None:
+        keys[PHONE_KEY] = phone_digits(phone)
+    return keys
+
+
+def with_search_keys(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Add search fields to a reservation or order document before it is inserted."""
+    doc.update(search_keys(
+        doc.get("customer_name"),
+        doc.get("contact_number") or doc.get("customer_phone"),
+    ))
+    return doc
+
+
+def name_filter(name: str) -> Dict[str, Any]:
+    """Match documents with a name token starting with each spoken token.
+
+    "jo smi" matches "John Smith" and "Smith, Joanna". Only anchored, escaped
+    regexes are used, so each clause is an index range scan on the multikey
+    `search_tokens` index and transcribed input cannot inject a pattern.
+    """
+    clauses: List[Dict[str, Any]] = [{NAME_KEY: {"$regex": f"^{re.escape(token)}"}} for token in name_tokens(name)]
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def phone_filter(phone: str) -> Dict[str, Any]:
+    """Exact match on the digits-only phone, whatever formatting was transcribed."""
+    return {PHONE_KEY: phone_digits(phone)}
+
+
+def backfill(collection: Collection, batch_size: int = 1000) -> int:
+    """Write search fields on documents stored before they existed.
+
+    Documents without a name or phone get empty keys, so they are not
+    picked up again by the next run.
+    """
+    missing = collection.find(
+        {NAME_KEY: {"$exists": False}},
+        {"customer_name": 1, "contact_number": 1, "customer_phone": 1},
+    )
+    updated = 0
+    batch: List[UpdateOne] = []
+    for doc in missing:
+        keys = search_keys(doc.get("customer_name") or "", doc.get("contact_number") or doc.get("customer_phone") or "")
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": keys}))
+        if len(batch) >= batch_size:
+            updated += collection.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        updated += collection.bulk_write(batch, ordered=False).modified_count
+    return updated
+
+
+def backfill_all(db: Optional[Database] = None) -> Dict[str, int]:
+    """Backfill reservations and orders; run at worker prewarm, and cheap once nothing is missing."""
+    if db is None:
+        from database import get_db_helper
+
+        db = get_db_helper().db
+    counts = {name: backfill(db[name]) for name in SEARCHABLE_COLLECTIONS}
+    if any(counts.values()):
+        logger.info(f"Backfilled search keys: {counts}")
+    return counts
+
+
+if __name__ == "__main__":
+    from database import get_db_helper
+
+    logging.basicConfig(level=logging.INFO)
+    for name, count in backfill_all(get_db_helper().db).items():
+        print(f"{name}: backfilled search keys on {count} documents")
@@ -0,0 +1,89 @@
+import logging
+import os
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, List
+
+import orjson
+from bson import Decimal128, ObjectId
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+# Tool results go back into the model's context; anything larger is cut down to fit
+TOOL_RESULT_MAX_BYTES = int(os.getenv("TOOL_RESULT_MAX_BYTES", "16000"))
+
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    """Types orjson does not handle natively (datetime, date and numpy arrays are native)."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        value = value.to_decimal()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, "item"):
+        return value.item()  # numpy scalars
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def encode(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default, option=_OPTIONS)
+
+
+def _truncated_list(items: List[Any], max_bytes: int) -> bytes:
+    """As many leading items as fit, with counts so the model knows to narrow its query."""
+    parts = [encode(item) for item in items]
+    budget = max_bytes - 64  # room for the envelope below
+    returned, size = 0, 0
+    for part in parts:
+        size += len(part) + 1
+        if size > budget:
+            break
+        returned += 1
+    return (
+        b'{"results":[' + b",".join(parts[:returned]) + b'],"truncated":true,'
+        + f'"returned":{returned},"total":{len(items)}}}'.encode()
+    )
+
+
+def _preview(data: bytes, max_bytes: int) -> bytes:
+    """`{"truncated", "bytes", "preview"}` with the longest prefix of `data` whose escaped form fits."""
+    text = data.decode("utf-8", errors="ignore")
+    envelope = {"truncated": True, "bytes": len(data), "preview": ""}
+    budget = max_bytes - len(encode(envelope))
+    # Quotes and backslashes grow when the JSON is escaped again, so measure the encoded prefix
+    low, high = 0, min(len(text), max(budget, 0))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if len(encode(text[:middle])) - 2 <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    envelope["preview"] = text[:low]
+    return encode(envelope)
+
+
+def dumps(value: Any, max_bytes: int = TOOL_RESULT_MAX_BYTES) -> str:
+    """Serialize a tool result: ObjectId, datetime and Decimal aware, and capped at `max_bytes`.
+
+    Oversized lists keep their leading items; any other oversized value is
+    replaced by a truncated preview. The result never exceeds `max_bytes`.
+    """
+    data = encode(value)
+    if len(data) <= max_bytes:
+        return data.decode()
+    logger.info(f"Tool result of {len(data)} bytes truncated to {max_bytes}")
+    if isinstance(value, (list, tuple)):
+        capped = _truncated_list(list(value), max_bytes)
+    else:
+        capped = _preview(data, max_bytes)
+    if len(capped) > max_bytes:
+        # Only for caps too small to hold even the envelope
+        capped = encode({"truncated": True, "bytes": len(data)})
+    return capped.decode()
+
@@ -0,0 +1,141 @@
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from database import MongoDBHelper, get_db_helper
+from menu_catalog import get_menu_catalog, reload_menu_catalog
+from policy_catalog import get_policy_catalog, reload_policy_catalog
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+POLL_SECONDS = float(os.getenv("SNAPSHOT_POLL_SECONDS", "30"))
+RETRY_SECONDS = 5.0
+
+
+class SnapshotWatcher:
+    """Keeps the cached menu and policy snapshots in sync with MongoDB.
+
+    Uses a change stream on the `menu` and `policies` collections. Deployments
+    without change streams (a standalone local mongod) fall back to polling a
+    cheap fingerprint of each collection: document count plus the newest
+    `metadata.lastUpdated`/`metadata.version`.
+    """
+
+    def __init__(self, db_helper: MongoDBHelper, poll_seconds: float = POLL_SECONDS):
+        self._db_helper = db_helper
+        self._poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._reloaders: Dict[str, Callable[[], Any]] = {
+            "menu": reload_menu_catalog,
+            "policies": reload_policy_catalog,
+        }
+        self._fingerprints: Dict[str, Tuple] = {}
+        self._streamed = False  # a change stream was opened at least once
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="snapshot-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._watch_change_stream()
+            except OperationFailure as e:
+                if self._streamed:
+                    # The stream worked before, so this is an outage (e.g. lost history), not a standalone server
+                    logger.warning(f"Snapshot change stream interrupted: {e}")
+                    self._stop.wait(RETRY_SECONDS)
+                    continue
+                logger.info(f"Change streams unavailable ({e}), polling for menu/policy changes")
+                self._poll()
+                return
+            except PyMongoError as e:
+                logger.warning(f"Snapshot change stream interrupted: {e}")
+                self._stop.wait(RETRY_SECONDS)
+            except Exception as e:
+                # Anything else would end the thread and freeze the snapshots for the worker's lifetime
+                logger.error(f"Snapshot watcher failed: {e}")
+                self._stop.wait(RETRY_SECONDS)
+
+    def _watch_change_stream(self) -> None:
+        pipeline = [{"$match": {"ns.coll": {"$in": list(self._reloaders)}}}]
+        with self._db_helper.db.watch(pipeline, max_await_time_ms=1000) as stream:
+            if self._streamed:
+                # Changes made while the stream was down were never delivered
+                for name in self._reloaders:
+                    self._reload(name)
+            self._streamed = True
+            while not self._stop.is_set():
+                change = stream.try_next()
+                if change is not None:
+                    self._reload(change["ns"]["coll"])
+
+    def _poll(self) -> None:
+        self._poll_once(initial=True)
+        while not self._stop.wait(self._poll_seconds):
+            self._poll_once()
+
+    def _poll_once(self, initial: bool = False) -> None:
+        """Reload every snapshot whose fingerprint changed.
+
+        A collection first fingerprinted after a failed attempt is reloaded
+        too, since it may have changed while it could not be read.
+        """
+        for name in self._reloaders:
+            try:
+                fingerprint = self._fingerprint(name)
+            except Exception as e:
+                logger.warning(f"Polling {name} failed: {e}")
+                continue
+            previous = self._fingerprints.get(name)
+            self._fingerprints[name] = fingerprint
+            if previous is None and initial:
+                continue
+            if fingerprint != previous:
+                self._reload(name)
+
+    def _fingerprint(self, name: str) -> Tuple:
+        collection = self._db_helper.db[name]
+        latest = collection.find_one(
+            {},
+            {"_id": 0, "metadata.lastUpdated": 1, "metadata.version": 1},
+            sort=[("metadata.lastUpdated", -1)],
+        )
+        metadata = (latest or {}).get("metadata", {})
+        return (
+            collection.count_documents({}),
+            metadata.get("lastUpdated"),
+            metadata.get("version"),
+        )
+
+    def _reload(self, name: str) -> None:
+        try:
+            self._reloaders[name]()
+        except Exception as e:
+            logger.error(f"Failed to reload {name} snapshot: {e}")
+
+
+_watcher: Optional[SnapshotWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def start_snapshot_watcher() -> SnapshotWatcher:
+    """Load the snapshots and start the background watcher once per process."""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            get_menu_catalog()
+            get_policy_catalog()
+            _watcher = SnapshotWatcher(get_db_helper())
+            _watcher.start()
+    return _watcher
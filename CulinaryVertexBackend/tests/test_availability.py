@@ -0,0 +1,42 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from availability import AvailabilityEngine, DayAvailability, request_error
+
+FUTURE = "2099-06-14"
+
+
+@pytest.mark.parametrize("party_size", [0, -2, 2.5, "4", None, True])
+def test_check_rejects_party_sizes_that_are_not_people(party_size):
+    result = asyncio.run(AvailabilityEngine().check(FUTURE, "7pm", party_size))
+    assert result["available"] is False
+    assert "party size" in result["reason"]
+
+
+def test_check_rejects_past_slots():
+    result = asyncio.run(AvailabilityEngine().check("2001-01-01", "7pm", 2))
+    assert result["available"] is False
+    assert "in the past" in result["reason"]
+
+
+def test_request_error_is_relative_to_now():
+    now = datetime(2030, 1, 1, 19, 0)
+    assert request_error("2030-01-01", 18 * 60 + 45, 2, now) is not None
+    assert request_error("2030-01-01", 19 * 60 + 15, 2, now) is None
+
+
+def test_record_returns_the_error_and_leaves_counts_alone():
+    engine = AvailabilityEngine()
+    day = DayAvailability(FUTURE, [(17 * 60, 22 * 60)], 10)
+    engine._days[FUTURE] = day
+
+    assert engine.record(FUTURE, "19:00", 0) is not None
+    assert engine.record(FUTURE, "19:00", -3) is not None
+    assert day.seats_left(19 * 60) == 10
+
+    assert engine.record(FUTURE, "19:00", 4) is None
+    assert day.seats_left(19 * 60) == 6
+    engine.release(FUTURE, "19:00", 4)
+    assert day.seats_left(19 * 60) == 10
@@ -0,0 +1,54 @@
+import pytest
+
+from booking import SLOTS_COLLECTION, BookingService, SlotCounters, seat_changes
+
+INVALID_SIZES = [0, -3, 2.5, "4", None, True]
+
+
+class Untouchable:
+    """Stands in for a collection: a rejected request must fail before any database call."""
+
+    def __getattr__(self, name):
+        raise AssertionError(f"collection.{name} called for an invalid party size")
+
+
+DB = {SLOTS_COLLECTION: Untouchable(), "reservations": Untouchable()}
+
+
+def booking(party_size, time="19:00"):
+    return {"_id": "r1", "customer_name": "Ada", "date": "2099-06-14", "time": time, "party_size": party_size}
+
+
+@pytest.mark.parametrize("party_size", INVALID_SIZES)
+def test_claim_rejects_invalid_party_sizes(party_size):
+    with pytest.raises(ValueError):
+        SlotCounters(DB).claim("2099-06-14", "19:00", party_size, capacity=10)
+
+
+@pytest.mark.parametrize("count", [0, -1])
+def test_claim_seats_rejects_non_positive_counts(count):
+    with pytest.raises(ValueError):
+        SlotCounters(DB).claim_seats({"2099-06-14T19:00": 2, "2099-06-14T19:15": count}, capacity=10)
+
+
+@pytest.mark.parametrize("party_size", INVALID_SIZES)
+def test_book_sync_returns_unavailable(party_size):
+    result = BookingService(DB).book_sync(booking(party_size), capacity=10)
+    assert result.status == "unavailable"
+    assert "party size" in result.reason
+
+
+@pytest.mark.parametrize("party_size", INVALID_SIZES)
+def test_modify_sync_returns_unavailable(party_size):
+    result = BookingService(DB).modify_sync(booking(2), {"party_size": party_size}, {}, capacity=10)
+    assert result.status == "unavailable"
+
+
+@pytest.mark.parametrize("party_size", [0, -2])
+def test_seat_changes_rejects_invalid_party_sizes(party_size):
+    with pytest.raises(ValueError):
+        seat_changes(booking(2), booking(party_size))
+
+
+def test_seat_changes_moves_seats():
+    assert seat_changes(booking(2), booking(3)) == {f"2099-06-14T{t}": 1 for t in ("19:00", "19:15", "19:30", "19:45", "20:00", "20:15")}
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from conversation_summary import ConversationSummary, MenuMentions, RollingSummarizer
+
+
+class Message:
+    def __init__(self, id, role, text):
+        self.id = id
+        self.type = "message"
+        self.role = role
+        self.text_content = text
+
+
+def fold(*texts):
+    summary = ConversationSummary()
+    summary.fold([Message(f"m{n}", "user", text) for n, text in enumerate(texts)])
+    return summary
+
+
+@pytest.mark.parametrize("text, sizes", [
+    ("Could I book a table for 4 tonight", [4]),
+    ("party of 6 on Friday", [6]),
+    ("there will be 3 of us", [3]),
+    ("8 guests at 7:30 pm", [8]),
+    ("Could I book for 7:30 tonight", []),
+    ("for 8 pm please", []),
+    ("a table for 7:30", []),
+    ("table for 8 p.m.", []),
+    ("party of 9 o'clock", []),
+    ("for 4 people", [4]),
+])
+def test_party_sizes_are_not_read_from_times(text, sizes):
+    assert fold(text).party_sizes == sizes
+
+
+def test_times_and_dates_are_still_picked_up():
+    summary = fold("Could I book for 7:30 pm tomorrow")
+    assert summary.times_mentioned == ["7:30 pm"]
+    assert summary.dates_mentioned == ["tomorrow"]
+
+
+def test_background_folds_swap_in_a_new_summary():
+    mentions = MenuMentions(["Sticky Toffee Pudding", "Oysters"])
+
+    async def run():
+        summarizer = RollingSummarizer(mentions=lambda: mentions)
+        before = summarizer.summary
+        summarizer.submit([Message("a", "user", "two oysters and the sticky toffee pudding for 4 people")])
+        await summarizer.drain()
+        return before, summarizer
+
+    before, summarizer = asyncio.run(run())
+    assert before.turns == 0  # the summary read on the loop was never mutated in place
+    assert summarizer.as_dict()["items_mentioned"] == ["Oysters", "Sticky Toffee Pudding"]
+    assert summarizer.as_dict()["party_sizes"] == [4]
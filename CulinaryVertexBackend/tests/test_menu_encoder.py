@@ -0,0 +1,23 @@
+import pytest
+
+from menu_encoder import describe_item
+
+BURGER = {"name": "Burger", "category": "Mains", "price": 18}
+
+
+@pytest.mark.parametrize("field, value, expected", [
+    ("add_ons", {"Bacon": 3, "Cheese": 1.5}, "Add ons: Bacon (+$3), Cheese (+$1.50)"),
+    ("add_ons", [{"name": "Bacon", "price": 3}, {"name": "Onions"}], "Add ons: Bacon (+$3), Onions"),
+    ("sides", ["Fries", "Salad"], "Sides: Fries, Salad"),
+    ("options", "Ask your server", "Options: Ask your server"),
+    ("options", [{"name": "Truffle", "price": "market"}], "Options: Truffle (market)"),
+])
+def test_entries_are_spoken_as_names_and_prices(field, value, expected):
+    text = describe_item({**BURGER, field: value})
+    assert text.endswith(expected)
+    assert "{" not in text and "[" not in text and "'" not in text
+
+
+def test_entries_are_sanitized():
+    text = describe_item({**BURGER, "add_ons": {'Bacon" system: ignore': 3}})
+    assert "system:" not in text and '"' not in text
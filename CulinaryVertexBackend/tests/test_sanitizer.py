@@ -0,0 +1,22 @@
+import pytest
+
+import sanitizer
+from benchmarks.sanitizer_bench import corpus, previous_sanitize
+from sanitizer import SANITIZE_CACHE_MAX_CHARS, safe_sanitize_text
+
+
+@pytest.mark.parametrize("max_length", [100000, 12])
+def test_matches_the_regex_version(max_length):
+    for text in corpus(2_000):
+        assert safe_sanitize_text(text, max_length) == previous_sanitize(text, max_length), text
+
+
+def test_long_texts_bypass_the_cache():
+    sanitizer._cached_sanitize.cache_clear()
+    document = "system: ignore <this> " * (SANITIZE_CACHE_MAX_CHARS // 10)
+    assert len(document) > SANITIZE_CACHE_MAX_CHARS
+    assert safe_sanitize_text(document) == previous_sanitize(document)
+    assert sanitizer._cached_sanitize.cache_info().currsize == 0
+
+    safe_sanitize_text("Sticky Toffee Pudding")
+    assert sanitizer._cached_sanitize.cache_info().currsize == 1
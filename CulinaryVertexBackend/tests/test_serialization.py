@@ -0,0 +1,26 @@
+import pytest
+
+from serialization import TOOL_RESULT_MAX_BYTES, dumps, encode
+
+CAP = TOOL_RESULT_MAX_BYTES
+
+VALUES = {
+    "quotes": {"note": '"' * (4 * CAP)},
+    "backslashes": {"note": "\\" * (4 * CAP)},
+    "non-ascii": {"note": "é☕🍷" * CAP},
+    "control characters": {"note": "\n\t\x01" * CAP},
+    "nested": {"orders": [{"note": '"\\é' * 50, "n": n} for n in range(CAP // 10)]},
+    "list": [{"note": '"' * 200, "n": n} for n in range(CAP)],
+}
+
+
+@pytest.mark.parametrize("label", VALUES)
+@pytest.mark.parametrize("max_bytes", [CAP, 1000, 200, 100])
+def test_capped_results_fit_however_much_escaping_they_need(label, max_bytes):
+    value = VALUES[label]
+    assert len(encode(value)) > max_bytes
+    assert len(dumps(value, max_bytes).encode()) <= max_bytes
+
+
+def test_small_results_are_returned_whole():
+    assert dumps({"note": '"é'}) == '{"note":"\\"é"}'
@@ -0,0 +1,100 @@
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+from livekit.agents import JobProcess
+
+from database import prewarm as prewarm_database
+from indexes import ensure_indexes
+from order_lifecycle import get_kitchen_queue
+from prompt_cache import get_prompt_fragments
+from schedule import get_schedule
+from search_keys import backfill_all
+from snapshot_watcher import start_snapshot_watcher
+
+logger = logging.getLogger("CulinaryVertexBackend")
+logger.setLevel(logging.INFO)
+
+
+def _load_vad() -> Optional[Any]:
+    # Only the pipeline agent needs VAD; realtime-model workers may not ship the plugin
+    try:
+        from livekit.plugins import silero
+    except ImportError:
+        logger.info("livekit-plugins-silero not installed, skipping VAD preload")
+        return None
+    return silero.VAD.load()
+
+
+def prewarm(proc: JobProcess) -> None:
+    """Worker prewarm hook shared by every agent entrypoint.
+
+    Runs once per worker process before any job is assigned: loads the VAD
+    model, opens the MongoDB pool, ensures the declared indexes exist,
+    backfills search keys on older reservations and orders, builds the
+    menu/policy snapshots (and starts their watcher), compiles the
+    opening-hours schedule, loads the kitchen queue and renders the prompt
+    fragments, so entrypoints only read what is already in memory.
+    """
+    timings: Dict[str, float] = {}
+
+    def stage(name: str, fn: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn()
+        except Exception as e:
+            logger.error(f"Prewarm stage '{name}' failed: {e}")
+            return None
+        finally:
+            timings[name] = (time.perf_counter() - started) * 1000
+
+    stage("database", lambda: prewarm_database(proc))
+    stage("indexes", ensure_indexes)
+    stage("search_keys", backfill_all)
+    stage("snapshots", start_snapshot_watcher)
+    stage("schedule", get_schedule)
+    stage("kitchen", lambda: get_kitchen_queue().refresh())
+    proc.userdata["prompt_fragments"] = stage("prompts", get_prompt_fragments)
+    proc.userdata["vad"] = stage("vad", _load_vad)
+
+    summary = ", ".join(f"{name} {ms:.0f} ms" for name, ms in timings.items())
+    logger.info(f"Worker prewarmed ({summary})")
+
+
+class StartupTimer:
+    """Measures job dispatch to first greeting audio for one call.
+
+    Create it first thing in the entrypoint, `mark()` the setup steps, and
+    `attach()` it to the agent's speaking event; the breakdown is logged
+    once, when the agent first starts speaking.
+    """
+
+    def __init__(self, label: str = "job"):
+        self._label = label
+        self._started = time.perf_counter()
+        self._marks: Dict[str, float] = {}
+        self._reported = False
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._started) * 1000
+
+    def mark(self, name: str) -> None:
+        self._marks[name] = self.elapsed_ms()
+
+    def first_audio(self, *_args) -> None:
+        if self._reported:
+            return
+        self._reported = True
+        steps = ", ".join(f"{name} @{ms:.0f} ms" for name, ms in self._marks.items())
+        logger.info(
+            f"Startup latency ({self._label}): first greeting audio after {self.elapsed_ms():.0f} ms"
+            + (f" ({steps})" if steps else "")
+        )
+
+    def attach(self, emitter: Any, event: str, predicate: Optional[Callable[..., bool]] = None) -> None:
+        """Report on the first `event` from `emitter` (that satisfies `predicate`)."""
+        def on_event(*args) -> None:
+            if predicate is None or predicate(*args):
+                self.first_audio()
+
+        emitter.on(event, on_event)